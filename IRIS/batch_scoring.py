@@ -0,0 +1,221 @@
+"""
+IRIS Batch Keyword Scoring
+==========================
+Offline scoring of large utterance corpora (call-center logs) against
+INTENT_KEYWORDS and the response-bank variant keywords, for keyword tuning.
+
+    from batch_scoring import INTENT_SCORER, score_intents_batch
+    scores = score_intents_batch(lines)   # (len(lines), len(INTENT_SCORER.keys))
+
+Scores are identical to calculate_keyword_score / KeywordMatcher.score_many.
+
+Keywords are split into atoms (whitespace-free strings). A keyword atom
+occurs in the input iff it occurs inside one input token, so every distinct
+corpus token is resolved to the atoms it contains once. Texts are scored in
+chunks of CHUNK_SIZE: each chunk's (text, token) pairs are expanded with
+NumPy into a dense boolean (chunk x atoms) presence matrix. Exact and
+multi-word hits fall out of that matrix, and one matmul against a
+slot x list count matrix sums them per list. Only the order-dependent parts
+— the partial-word bonus and the phrase check for multi-word keywords whose
+words are all present — run per text in Python, on the candidate hits.
+
+Needs numpy (offline tooling only — the servers never import this module).
+
+CLI:
+    python batch_scoring.py intents utterances.txt > scores.csv
+"""
+
+import numpy as np
+
+from response_engine import INTENT_MATCHER, VARIANT_MATCHER, _normalize_input
+
+# Texts scored per NumPy pass — bounds the dense (chunk x atoms) incidence
+CHUNK_SIZE = 8192
+
+
+class BatchScorer:
+    """Vectorized KeywordMatcher.score_many over many texts at once."""
+
+    def __init__(self, matcher, chunk_size=CHUNK_SIZE):
+        self.matcher = matcher
+        self.chunk_size = chunk_size
+        self.keys = list(matcher.lists)
+        keywords = matcher.keywords
+        lists = matcher.lists
+
+        # slot x list occurrence counts (a keyword repeated in a list counts twice)
+        self._counts = np.zeros((len(keywords), len(self.keys)))
+        self._slot_cols = [set() for _ in keywords]
+        for col, key in enumerate(self.keys):
+            for slot in lists[key]:
+                self._counts[slot, col] += 1
+                self._slot_cols[slot].add(col)
+        self._list_lengths = np.array([len(lists[key]) for key in self.keys], dtype=float)
+        self._list_slots = [lists[key] for key in self.keys]
+
+        atom_of = {}
+
+        def atom(text):
+            return atom_of.setdefault(text, len(atom_of))
+
+        single_slots, single_atoms = [], []
+        self._multi = []  # (slot, kw_lower, word_count)
+        multi_atoms = []
+        self._odd = []    # (slot, kw_lower, word_count) — whitespace-padded/empty keywords
+        for slot, (kw_lower, word_count, kw_words) in enumerate(keywords):
+            if word_count > 1:
+                self._multi.append((slot, kw_lower, word_count))
+                multi_atoms.append({atom(w) for w in kw_words})
+            elif kw_words == (kw_lower,):
+                single_slots.append(slot)
+                single_atoms.append(atom(kw_lower))
+            else:
+                self._odd.append((slot, kw_lower, word_count))
+
+        self._atom_count = len(atom_of)
+        self._atom_of = atom_of
+        self._atom_lengths = sorted({len(a) for a in atom_of})
+        self._single_slots = np.array(single_slots, dtype=np.intp)
+        self._single_atoms = np.array(single_atoms, dtype=np.intp)
+        # multi x atoms membership; a row is satisfied when all its atoms are present
+        self._multi_membership = np.zeros((len(self._multi), self._atom_count))
+        for row, atoms in enumerate(multi_atoms):
+            self._multi_membership[row, list(atoms)] = 1
+        self._multi_needed = self._multi_membership.sum(axis=1)
+
+        # Corpus vocabulary: token -> id, with the atoms each token contains (CSR)
+        self._vocab = {}
+        self._vocab_ptr = [0]
+        self._vocab_atoms = []
+
+    def score(self, texts):
+        """(len(texts), len(self.keys)) float array of keyword scores."""
+        texts = list(texts)
+        out = np.zeros((len(texts), len(self.keys)))
+        for start in range(0, len(texts), self.chunk_size):
+            out[start:start + self.chunk_size] = self._score_chunk(texts[start:start + self.chunk_size])
+        return out
+
+    def _token_id(self, token):
+        token_id = self._vocab.get(token)
+        if token_id is None:
+            token_id = self._vocab[token] = len(self._vocab)
+            found = set()
+            for length in self._atom_lengths:
+                if length > len(token):
+                    break
+                for i in range(len(token) - length + 1):
+                    atom = self._atom_of.get(token[i:i + length])
+                    if atom is not None:
+                        found.add(atom)
+            self._vocab_atoms.extend(found)
+            self._vocab_ptr.append(len(self._vocab_atoms))
+        return token_id
+
+    def _score_chunk(self, texts):
+        n = len(texts)
+        normalized = [_normalize_input(text) for text in texts]
+
+        # (text, token) pairs -> dense (chunk x atoms) presence matrix
+        text_idx, token_idx = [], []
+        for i, (input_lower, _) in enumerate(normalized):
+            for token in input_lower.split():
+                text_idx.append(i)
+                token_idx.append(self._token_id(token))
+        present = np.zeros((n, self._atom_count), dtype=bool)
+        if token_idx:
+            ptr = np.asarray(self._vocab_ptr, dtype=np.intp)
+            flat_atoms = np.asarray(self._vocab_atoms, dtype=np.intp)
+            tokens = np.asarray(token_idx, dtype=np.intp)
+            starts = ptr[tokens]
+            lengths = ptr[tokens + 1] - starts
+            total = int(lengths.sum())
+            if total:
+                rows = np.repeat(np.asarray(text_idx, dtype=np.intp), lengths)
+                offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+                present[rows, flat_atoms[np.repeat(starts, lengths) + offsets]] = True
+
+        # Per-slot contribution and "hit" (exact or multi-word) matrices
+        n_slots = self._counts.shape[0]
+        contrib = np.zeros((n, n_slots))
+        hit = np.zeros((n, n_slots), dtype=bool)
+        if len(self._single_slots):
+            single_hit = present[:, self._single_atoms]
+            hit[:, self._single_slots] = single_hit
+            contrib[:, self._single_slots] = single_hit * 2.0
+        if self._multi:
+            all_present = (present.astype(float) @ self._multi_membership.T) == self._multi_needed
+            for i, m in zip(*np.nonzero(all_present)):
+                slot, kw_lower, word_count = self._multi[m]
+                hit[i, slot] = True
+                contrib[i, slot] = word_count * (2 if kw_lower in normalized[i][0] else 1.5)
+        for slot, kw_lower, word_count in self._odd:
+            for i, (input_lower, _) in enumerate(normalized):
+                if kw_lower in input_lower:
+                    hit[i, slot] = True
+                    contrib[i, slot] = word_count * 2
+
+        scores = contrib @ self._counts
+
+        # Partial-word bonus: greedy per list, each input word used once
+        for i, (_, input_words) in enumerate(normalized):
+            if not input_words:
+                continue
+            partial = self.matcher.partial_candidates(input_words)
+            if not partial:
+                continue
+            row_hit = hit[i]
+            cols = set()
+            for slot in partial:
+                if not row_hit[slot]:
+                    cols |= self._slot_cols[slot]
+            for col in cols:
+                used_words = set()
+                bonus = 0.0
+                for slot in self._list_slots[col]:
+                    if row_hit[slot]:
+                        continue
+                    for word in partial.get(slot, ()):
+                        if word not in used_words:
+                            bonus += 0.5
+                            used_words.add(word)
+                            break
+                scores[i, col] += bonus
+
+        lengths = self._list_lengths
+        return np.divide(scores, lengths, out=np.zeros_like(scores), where=lengths > 0)
+
+
+INTENT_SCORER = BatchScorer(INTENT_MATCHER)
+VARIANT_SCORER = BatchScorer(VARIANT_MATCHER)
+
+
+def score_intents_batch(texts):
+    """(texts x scenarios) intent scores; columns follow INTENT_SCORER.keys."""
+    return INTENT_SCORER.score(texts)
+
+
+def score_variants_batch(texts):
+    """(texts x variants) response-bank scores; columns follow VARIANT_SCORER.keys (variant ids)."""
+    return VARIANT_SCORER.score(texts)
+
+
+if __name__ == '__main__':
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description='Score utterances (one per line) against IRIS keywords')
+    parser.add_argument('target', choices=('intents', 'variants'))
+    parser.add_argument('path', help="utterance file, '-' for stdin")
+    args = parser.parse_args()
+
+    stream = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8')
+    with stream:
+        lines = [line.rstrip('\n') for line in stream]
+    scorer = INTENT_SCORER if args.target == 'intents' else VARIANT_SCORER
+    matrix = scorer.score(lines)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['text'] + scorer.keys)
+    for line, row in zip(lines, matrix):
+        writer.writerow([line] + [f'{v:.6g}' for v in row])
@@ -0,0 +1,238 @@
+"""
+IRIS Call Metrics
+=================
+Per-call latency timings captured in the /ws relay, aggregated into
+per-scenario histograms and exported in Prometheus text format (/metrics).
+
+  iris_call_connect_seconds            browser connect -> session.created
+  iris_session_update_seconds          session.update sent -> session.updated
+  iris_turn_latency_seconds            speech_stopped -> first response.audio.delta
+  iris_function_call_seconds           handle_function_call() run time (per function)
+  iris_barge_in_seconds                speech_started mid-response -> response cancelled
+
+Turn latency is the number to tune silence_ms against and to hold the turn
+SLO to. Histograms use fixed buckets, so recording is O(buckets) with no
+per-sample storage, and percentiles come from the buckets (here in
+snapshot(), or histogram_quantile() in Prometheus).
+
+Everything runs on the server's event loop, so there is no locking.
+"""
+
+import bisect
+import time
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+
+# Label used when a call has no (or an unknown) scenario / function — keeps label cardinality bounded
+OTHER_LABEL = 'other'
+
+# Percentiles reported by snapshot()
+SNAPSHOT_QUANTILES = (0.5, 0.9, 0.99)
+
+_METRIC_HELP = {
+    'iris_call_connect_seconds': 'Browser /ws connect to session.created sent to the browser.',
+    'iris_session_update_seconds': 'session.update sent to session.updated received.',
+    'iris_turn_latency_seconds': 'End of caller speech (speech_stopped) to first response.audio.delta.',
+    'iris_function_call_seconds': 'Time spent in handle_function_call for one tool call.',
+    'iris_barge_in_seconds': 'Caller speech during a response to that response being cancelled.',
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_float(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) for one label set."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds=LATENCY_BUCKETS_S):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket (as histogram_quantile does)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.bounds, self.counts):
+            if n and seen + n >= target:
+                return lower + (bound - lower) * (target - seen) / n
+            seen += n
+            lower = bound
+        return self.bounds[-1]
+
+
+class CallMetrics:
+    """Histograms keyed by (metric, labels), plus call counters."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_S):
+        self.buckets = buckets
+        self._histograms = {}   # (metric, labels tuple) -> Histogram
+        self.scenarios = None   # known scenario ids (None: accept any)
+        self.functions = None   # known tool names (None: accept any)
+        self.calls_total = {}   # scenario -> calls started
+        self.active_calls = 0
+
+    def configure(self, scenarios=None, functions=None):
+        """Restrict label values to known scenarios / tool names (anything else -> OTHER_LABEL)."""
+        self.scenarios = frozenset(scenarios) if scenarios is not None else None
+        self.functions = frozenset(functions) if functions is not None else None
+
+    def scenario_label(self, scenario_id):
+        if not scenario_id or (self.scenarios is not None and scenario_id not in self.scenarios):
+            return OTHER_LABEL
+        return scenario_id
+
+    def function_label(self, name):
+        if not name or (self.functions is not None and name not in self.functions):
+            return OTHER_LABEL
+        return name
+
+    def observe(self, metric, seconds, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = self._histograms[key] = Histogram(self.buckets)
+        hist.observe(seconds)
+
+    def call_timer(self, scenario_id, connected_at=None):
+        """Start timing a new call (connected_at: perf_counter() when the browser connected)."""
+        return CallTimer(self, scenario_id, connected_at)
+
+    def reset(self):
+        self._histograms.clear()
+        self.calls_total.clear()
+
+    # --- Export ---
+
+    def render_prometheus(self):
+        """All metrics in Prometheus text exposition format (0.0.4)."""
+        lines = [
+            '# HELP iris_calls_total Relay calls started.',
+            '# TYPE iris_calls_total counter',
+        ]
+        for scenario, n in sorted(self.calls_total.items()):
+            lines.append(f'iris_calls_total{{scenario="{_escape(scenario)}"}} {n}')
+        lines += [
+            '# HELP iris_active_calls Relay calls in progress.',
+            '# TYPE iris_active_calls gauge',
+            f'iris_active_calls {self.active_calls}',
+        ]
+        by_metric = {}
+        for (metric, labels), hist in self._histograms.items():
+            by_metric.setdefault(metric, []).append((labels, hist))
+        for metric in sorted(by_metric):
+            lines.append(f'# HELP {metric} {_METRIC_HELP.get(metric, metric)}')
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, hist in sorted(by_metric[metric], key=lambda item: item[0]):
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                sep = ',' if label_text else ''
+                cumulative = 0
+                for bound, n in zip(hist.bounds + (float('inf'),), hist.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label_text}{sep}le="{_format_float(bound)}"}} {cumulative}')
+                suffix = f'{{{label_text}}}' if label_text else ''
+                lines.append(f'{metric}_sum{suffix} {hist.sum!r}')
+                lines.append(f'{metric}_count{suffix} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """{metric: [{labels, count, mean, p50, p90, p99}]} with seconds rounded to 0.1ms."""
+        out = {}
+        for (metric, labels), hist in sorted(self._histograms.items()):
+            entry = {'labels': dict(labels), 'count': hist.count, 'mean': round(hist.sum / hist.count, 4)}
+            for q in SNAPSHOT_QUANTILES:
+                entry[f'p{round(q * 100)}'] = round(hist.quantile(q), 4)
+            out.setdefault(metric, []).append(entry)
+        return {'calls': dict(self.calls_total), 'activeCalls': self.active_calls, 'histograms': out}
+
+
+class CallTimer:
+    """
+    Timing state for one relayed call. The relay calls the mark_* hooks as
+    events pass through; each completed interval is observed immediately.
+    """
+
+    __slots__ = ('metrics', 'scenario', 'connected_at', 'update_sent_at', 'speech_stopped_at',
+                 'barge_in_at', 'responding', 'awaiting_audio', '_open')
+
+    def __init__(self, metrics, scenario_id, connected_at=None):
+        self.metrics = metrics
+        self.scenario = metrics.scenario_label(scenario_id)
+        self.connected_at = connected_at if connected_at is not None else time.perf_counter()
+        self.update_sent_at = None
+        self.speech_stopped_at = None
+        self.barge_in_at = None
+        self.responding = False
+        # Checked on every audio delta — a plain bool keeps the passthrough path cheap
+        self.awaiting_audio = False
+        self._open = True
+        metrics.calls_total[self.scenario] = metrics.calls_total.get(self.scenario, 0) + 1
+        metrics.active_calls += 1
+
+    def _observe(self, metric, started, **labels):
+        self.metrics.observe(metric, time.perf_counter() - started, scenario=self.scenario, **labels)
+
+    def mark_session_created(self):
+        self._observe('iris_call_connect_seconds', self.connected_at)
+
+    def mark_session_update_sent(self):
+        self.update_sent_at = time.perf_counter()
+
+    def mark_session_updated(self):
+        if self.update_sent_at is not None:
+            self._observe('iris_session_update_seconds', self.update_sent_at)
+            self.update_sent_at = None
+
+    def mark_audio_delta(self):
+        """First response.audio.delta after the caller stopped speaking."""
+        if self.speech_stopped_at is not None:
+            self._observe('iris_turn_latency_seconds', self.speech_stopped_at)
+            self.speech_stopped_at = None
+        self.awaiting_audio = False
+
+    def mark_event(self, evt_type, data):
+        """Lifecycle events (everything except audio deltas)."""
+        if evt_type == 'input_audio_buffer.speech_stopped':
+            self.speech_stopped_at = time.perf_counter()
+            self.awaiting_audio = True
+        elif evt_type == 'input_audio_buffer.speech_started':
+            if self.responding and self.barge_in_at is None:
+                self.barge_in_at = time.perf_counter()
+        elif evt_type == 'response.created':
+            self.responding = True
+        elif evt_type in ('response.done', 'response.cancelled'):
+            status = (data.get('response') or {}).get('status') if evt_type == 'response.done' else 'cancelled'
+            if status == 'cancelled' and self.barge_in_at is not None:
+                self._observe('iris_barge_in_seconds', self.barge_in_at)
+            self.barge_in_at = None
+            self.responding = False
+
+    def time_function_call(self, name, started):
+        """Observe one handle_function_call() that began at perf_counter() == started."""
+        self._observe('iris_function_call_seconds', started, function=self.metrics.function_label(name))
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self.metrics.active_calls -= 1
+
+
+# Process-wide metrics for the /ws relay
+call_metrics = CallMetrics()
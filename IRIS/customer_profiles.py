@@ -0,0 +1,180 @@
+"""
+IRIS Demo Customer Profiles
+===========================
+The built-in caller profiles (phone -> customer record). Served directly
+when IRIS_CUSTOMER_DB is unset, and used by customer_store.py as the
+templates for synthetic callers.
+
+Plain data — importing this module never opens a customer store, so the
+loader can run before the configured database exists.
+"""
+
+# ===== Customer Database (Phone → Customer Lookup) =====
+
+CUSTOMER_DB = {
+    # ── Profile 1: South Asian Male, 37, Platinum, Boston ──
+    '+1-617-555-0142': {
+        'name': 'Varun Khator',
+        'tier': 'Platinum',
+        'email': 'varun.khator@gmail.com',
+        'phone': '+1-617-555-0142',
+        'dob': 'March 15, 1988',
+        'age': 37, 'gender': 'Male', 'ethnicity': 'South Asian',
+        'address': '142 Oak Street, Apt 7B, Boston, MA 02108',
+        'member_since': 'June 2018',
+        'joint_holder': 'Priya Khator',
+        'checking': {'last_4': '4829', 'balance': 8342.15, 'type': 'Platinum Checking'},
+        'savings': {'last_4': '9088', 'balance': 45200.00, 'type': 'High-Yield Savings'},
+        'credit_card': {'last_4': '5531', 'card_type': 'Visa Platinum', 'limit': 25000, 'balance': 6200.00, 'apr': '16.9%'},
+        'auto_loan': {'last_4': '7712', 'original': 28500.00, 'balance': 14230.67, 'rate': '4.9%', 'monthly': 485.00, 'next_due': 'March 15, 2026', 'remaining': '30 months', 'vehicle': '2023 Honda Accord'},
+        'mortgage': {'last_4': '4401', 'original': 450000, 'balance': 287000, 'rate': '5.8%', 'monthly': 2645.00, 'remaining': '22 years', 'type': '30-year fixed', 'ltv': '63.8%'},
+        'credit_score': 695, 'credit_rating': 'Good', 'payment_history': '36 months on-time',
+        'accounts': {
+            'block-card': '5531', 'loan-balance': '7712', 'dispute': '5531',
+            'restructure': '4829', 'reset-password': '5531', 'activate-card': '5531',
+            'transfer-funds': '4829', 'credit-limit': '5531', 'mortgage-rate': '4401',
+            'wire-transfer': '4829',
+        },
+        'recent_transactions': [
+            {'id': 'TXN-90421', 'date': 'Feb 18, 2026', 'merchant': 'TechVault Electronics', 'location': 'Phoenix, AZ', 'amount': 847.53, 'status': 'posted', 'card': '5531', 'suspicious': True},
+            {'id': 'TXN-90422', 'date': 'Feb 18, 2026', 'merchant': 'QuickFuel Gas Station', 'location': 'Phoenix, AZ', 'amount': 234.00, 'status': 'posted', 'card': '5531', 'suspicious': True},
+            {'id': 'TXN-90389', 'date': 'Feb 17, 2026', 'merchant': 'Whole Foods Market', 'location': 'Boston, MA', 'amount': 67.23, 'status': 'posted', 'card': '5531', 'suspicious': False},
+            {'id': 'TXN-90345', 'date': 'Feb 16, 2026', 'merchant': 'Netflix', 'location': 'Online', 'amount': 15.99, 'status': 'posted', 'card': '5531', 'suspicious': False},
+            {'id': 'TXN-90301', 'date': 'Feb 15, 2026', 'merchant': 'Shell Gas Station', 'location': 'Boston, MA', 'amount': 52.40, 'status': 'posted', 'card': '5531', 'suspicious': False},
+            {'id': 'TXN-90287', 'date': 'Feb 14, 2026', 'merchant': 'Amazon.com', 'location': 'Online', 'amount': 129.99, 'status': 'posted', 'card': '5531', 'suspicious': False},
+            {'id': 'TXN-90250', 'date': 'Feb 12, 2026', 'merchant': 'Trader Joes', 'location': 'Boston, MA', 'amount': 94.67, 'status': 'posted', 'card': '5531', 'suspicious': False},
+        ],
+    },
+    # ── Profile 2: African American Male, 63, Gold, Atlanta ──
+    '+1-404-555-0278': {
+        'name': 'Marcus Thompson',
+        'tier': 'Gold',
+        'email': 'marcus.thompson@outlook.com',
+        'phone': '+1-404-555-0278',
+        'dob': 'November 8, 1962',
+        'age': 63, 'gender': 'Male', 'ethnicity': 'African American',
+        'address': '315 Peachtree Lane, Suite 2A, Atlanta, GA 30301',
+        'member_since': 'March 2015',
+        'joint_holder': 'Denise Thompson',
+        'checking': {'last_4': '6103', 'balance': 12475.30, 'type': 'Gold Checking'},
+        'savings': {'last_4': '8254', 'balance': 68900.00, 'type': 'High-Yield Savings'},
+        'credit_card': {'last_4': '3347', 'card_type': 'Visa Gold', 'limit': 20000, 'balance': 4850.00, 'apr': '18.4%'},
+        'auto_loan': {'last_4': '9981', 'original': 35000.00, 'balance': 18442.33, 'rate': '5.2%', 'monthly': 545.00, 'next_due': 'March 10, 2026', 'remaining': '34 months', 'vehicle': '2024 Toyota Camry'},
+        'mortgage': {'last_4': '2216', 'original': 320000, 'balance': 195000, 'rate': '5.5%', 'monthly': 1817.00, 'remaining': '18 years', 'type': '30-year fixed', 'ltv': '55.7%'},
+        'credit_score': 748, 'credit_rating': 'Very Good', 'payment_history': '48 months on-time',
+        'accounts': {
+            'block-card': '3347', 'loan-balance': '9981', 'dispute': '3347',
+            'restructure': '6103', 'reset-password': '3347', 'activate-card': '3347',
+            'transfer-funds': '6103', 'credit-limit': '3347', 'mortgage-rate': '2216',
+            'wire-transfer': '6103',
+        },
+        'recent_transactions': [
+            {'id': 'TXN-71204', 'date': 'Feb 18, 2026', 'merchant': 'BestBuy Electronics', 'location': 'Dallas, TX', 'amount': 623.99, 'status': 'posted', 'card': '3347', 'suspicious': True},
+            {'id': 'TXN-71205', 'date': 'Feb 18, 2026', 'merchant': 'FastLane Auto Parts', 'location': 'Dallas, TX', 'amount': 189.50, 'status': 'posted', 'card': '3347', 'suspicious': True},
+            {'id': 'TXN-71180', 'date': 'Feb 17, 2026', 'merchant': 'Kroger', 'location': 'Atlanta, GA', 'amount': 82.44, 'status': 'posted', 'card': '3347', 'suspicious': False},
+            {'id': 'TXN-71155', 'date': 'Feb 16, 2026', 'merchant': 'Hulu', 'location': 'Online', 'amount': 17.99, 'status': 'posted', 'card': '3347', 'suspicious': False},
+            {'id': 'TXN-71130', 'date': 'Feb 15, 2026', 'merchant': 'BP Gas Station', 'location': 'Atlanta, GA', 'amount': 48.75, 'status': 'posted', 'card': '3347', 'suspicious': False},
+            {'id': 'TXN-71105', 'date': 'Feb 14, 2026', 'merchant': 'Home Depot', 'location': 'Atlanta, GA', 'amount': 156.32, 'status': 'posted', 'card': '3347', 'suspicious': False},
+            {'id': 'TXN-71080', 'date': 'Feb 12, 2026', 'merchant': 'Publix', 'location': 'Atlanta, GA', 'amount': 73.21, 'status': 'posted', 'card': '3347', 'suspicious': False},
+        ],
+    },
+    # ── Profile 3: Hispanic/Latina Female, 29, Silver, Miami ──
+    '+1-305-555-0391': {
+        'name': 'Sofia Ramirez',
+        'tier': 'Silver',
+        'email': 'sofia.ramirez@yahoo.com',
+        'phone': '+1-305-555-0391',
+        'dob': 'July 22, 1996',
+        'age': 29, 'gender': 'Female', 'ethnicity': 'Hispanic/Latina',
+        'address': '88 Coral Way, Apt 12C, Miami, FL 33145',
+        'member_since': 'January 2021',
+        'joint_holder': None,
+        'checking': {'last_4': '7741', 'balance': 3215.88, 'type': 'Silver Checking'},
+        'savings': {'last_4': '2059', 'balance': 12350.00, 'type': 'Standard Savings'},
+        'credit_card': {'last_4': '8862', 'card_type': 'Visa Silver', 'limit': 8000, 'balance': 3400.00, 'apr': '21.9%'},
+        'auto_loan': {'last_4': '1537', 'original': 32000.00, 'balance': 22100.45, 'rate': '6.1%', 'monthly': 520.00, 'next_due': 'March 5, 2026', 'remaining': '42 months', 'vehicle': '2025 Hyundai Tucson'},
+        'mortgage': {'last_4': '6694', 'original': 385000, 'balance': 342000, 'rate': '6.2%', 'monthly': 2370.00, 'remaining': '28 years', 'type': '30-year fixed', 'ltv': '88.8%'},
+        'credit_score': 782, 'credit_rating': 'Excellent', 'payment_history': '18 months on-time',
+        'accounts': {
+            'block-card': '8862', 'loan-balance': '1537', 'dispute': '8862',
+            'restructure': '7741', 'reset-password': '8862', 'activate-card': '8862',
+            'transfer-funds': '7741', 'credit-limit': '8862', 'mortgage-rate': '6694',
+            'wire-transfer': '7741',
+        },
+        'recent_transactions': [
+            {'id': 'TXN-55301', 'date': 'Feb 18, 2026', 'merchant': 'MegaMart Electronics', 'location': 'Houston, TX', 'amount': 512.88, 'status': 'posted', 'card': '8862', 'suspicious': True},
+            {'id': 'TXN-55302', 'date': 'Feb 18, 2026', 'merchant': 'QuickStop Fuel', 'location': 'Houston, TX', 'amount': 147.00, 'status': 'posted', 'card': '8862', 'suspicious': True},
+            {'id': 'TXN-55280', 'date': 'Feb 17, 2026', 'merchant': 'Sedanos Supermarket', 'location': 'Miami, FL', 'amount': 54.67, 'status': 'posted', 'card': '8862', 'suspicious': False},
+            {'id': 'TXN-55260', 'date': 'Feb 16, 2026', 'merchant': 'Spotify', 'location': 'Online', 'amount': 10.99, 'status': 'posted', 'card': '8862', 'suspicious': False},
+            {'id': 'TXN-55240', 'date': 'Feb 15, 2026', 'merchant': 'Chevron', 'location': 'Miami, FL', 'amount': 41.30, 'status': 'posted', 'card': '8862', 'suspicious': False},
+            {'id': 'TXN-55220', 'date': 'Feb 14, 2026', 'merchant': 'Target', 'location': 'Miami, FL', 'amount': 87.45, 'status': 'posted', 'card': '8862', 'suspicious': False},
+            {'id': 'TXN-55200', 'date': 'Feb 12, 2026', 'merchant': 'Publix', 'location': 'Miami, FL', 'amount': 63.22, 'status': 'posted', 'card': '8862', 'suspicious': False},
+        ],
+    },
+    # ── Profile 4: East Asian Female, 46, Platinum, San Francisco ──
+    '+1-415-555-0534': {
+        'name': 'Emily Chen',
+        'tier': 'Platinum',
+        'email': 'emily.chen@gmail.com',
+        'phone': '+1-415-555-0534',
+        'dob': 'February 3, 1980',
+        'age': 46, 'gender': 'Female', 'ethnicity': 'East Asian',
+        'address': '2201 Pacific Heights Blvd, San Francisco, CA 94115',
+        'member_since': 'September 2016',
+        'joint_holder': 'David Chen',
+        'checking': {'last_4': '3285', 'balance': 24890.50, 'type': 'Platinum Checking'},
+        'savings': {'last_4': '7463', 'balance': 128500.00, 'type': 'High-Yield Savings'},
+        'credit_card': {'last_4': '4178', 'card_type': 'Visa Platinum', 'limit': 35000, 'balance': 8750.00, 'apr': '15.9%'},
+        'auto_loan': {'last_4': '5624', 'original': 52000.00, 'balance': 9810.22, 'rate': '3.9%', 'monthly': 780.00, 'next_due': 'March 20, 2026', 'remaining': '13 months', 'vehicle': '2022 Tesla Model 3'},
+        'mortgage': {'last_4': '8937', 'original': 950000, 'balance': 625000, 'rate': '5.4%', 'monthly': 5330.00, 'remaining': '24 years', 'type': '30-year fixed', 'ltv': '65.8%'},
+        'credit_score': 812, 'credit_rating': 'Exceptional', 'payment_history': '60 months on-time',
+        'accounts': {
+            'block-card': '4178', 'loan-balance': '5624', 'dispute': '4178',
+            'restructure': '3285', 'reset-password': '4178', 'activate-card': '4178',
+            'transfer-funds': '3285', 'credit-limit': '4178', 'mortgage-rate': '8937',
+            'wire-transfer': '3285',
+        },
+        'recent_transactions': [
+            {'id': 'TXN-82710', 'date': 'Feb 18, 2026', 'merchant': 'Newegg Electronics', 'location': 'Las Vegas, NV', 'amount': 1124.99, 'status': 'posted', 'card': '4178', 'suspicious': True},
+            {'id': 'TXN-82711', 'date': 'Feb 18, 2026', 'merchant': 'RapidFuel Station', 'location': 'Las Vegas, NV', 'amount': 198.00, 'status': 'posted', 'card': '4178', 'suspicious': True},
+            {'id': 'TXN-82690', 'date': 'Feb 17, 2026', 'merchant': 'Whole Foods Market', 'location': 'San Francisco, CA', 'amount': 112.88, 'status': 'posted', 'card': '4178', 'suspicious': False},
+            {'id': 'TXN-82670', 'date': 'Feb 16, 2026', 'merchant': 'Apple One', 'location': 'Online', 'amount': 22.95, 'status': 'posted', 'card': '4178', 'suspicious': False},
+            {'id': 'TXN-82650', 'date': 'Feb 15, 2026', 'merchant': 'Tesla Supercharger', 'location': 'San Francisco, CA', 'amount': 18.40, 'status': 'posted', 'card': '4178', 'suspicious': False},
+            {'id': 'TXN-82630', 'date': 'Feb 14, 2026', 'merchant': 'Nordstrom', 'location': 'San Francisco, CA', 'amount': 245.00, 'status': 'posted', 'card': '4178', 'suspicious': False},
+            {'id': 'TXN-82610', 'date': 'Feb 12, 2026', 'merchant': 'Trader Joes', 'location': 'San Francisco, CA', 'amount': 78.33, 'status': 'posted', 'card': '4178', 'suspicious': False},
+        ],
+    },
+    # ── Profile 5: Caucasian Male, 34, Gold, Chicago ──
+    '+1-312-555-0687': {
+        'name': "James O'Brien",
+        'tier': 'Gold',
+        'email': 'james.obrien@protonmail.com',
+        'phone': '+1-312-555-0687',
+        'dob': 'September 14, 1991',
+        'age': 34, 'gender': 'Male', 'ethnicity': 'Caucasian',
+        'address': '450 North Michigan Ave, Unit 18D, Chicago, IL 60611',
+        'member_since': 'August 2019',
+        'joint_holder': None,
+        'checking': {'last_4': '5498', 'balance': 6780.25, 'type': 'Gold Checking'},
+        'savings': {'last_4': '1376', 'balance': 31200.00, 'type': 'High-Yield Savings'},
+        'credit_card': {'last_4': '2643', 'card_type': 'Visa Gold', 'limit': 18000, 'balance': 5100.00, 'apr': '17.9%'},
+        'auto_loan': {'last_4': '8815', 'original': 42000.00, 'balance': 11350.90, 'rate': '5.5%', 'monthly': 625.00, 'next_due': 'March 1, 2026', 'remaining': '18 months', 'vehicle': '2023 Ford Bronco'},
+        'mortgage': {'last_4': '3072', 'original': 520000, 'balance': 410000, 'rate': '5.9%', 'monthly': 3085.00, 'remaining': '26 years', 'type': '30-year fixed', 'ltv': '78.8%'},
+        'credit_score': 731, 'credit_rating': 'Very Good', 'payment_history': '30 months on-time',
+        'accounts': {
+            'block-card': '2643', 'loan-balance': '8815', 'dispute': '2643',
+            'restructure': '5498', 'reset-password': '2643', 'activate-card': '2643',
+            'transfer-funds': '5498', 'credit-limit': '2643', 'mortgage-rate': '3072',
+            'wire-transfer': '5498',
+        },
+        'recent_transactions': [
+            {'id': 'TXN-63401', 'date': 'Feb 18, 2026', 'merchant': 'Micro Center', 'location': 'Detroit, MI', 'amount': 732.45, 'status': 'posted', 'card': '2643', 'suspicious': True},
+            {'id': 'TXN-63402', 'date': 'Feb 18, 2026', 'merchant': 'SpeedWay Fuel', 'location': 'Detroit, MI', 'amount': 167.00, 'status': 'posted', 'card': '2643', 'suspicious': True},
+            {'id': 'TXN-63380', 'date': 'Feb 17, 2026', 'merchant': 'Jewel-Osco', 'location': 'Chicago, IL', 'amount': 91.56, 'status': 'posted', 'card': '2643', 'suspicious': False},
+            {'id': 'TXN-63360', 'date': 'Feb 16, 2026', 'merchant': 'YouTube Premium', 'location': 'Online', 'amount': 13.99, 'status': 'posted', 'card': '2643', 'suspicious': False},
+            {'id': 'TXN-63340', 'date': 'Feb 15, 2026', 'merchant': 'Marathon Gas', 'location': 'Chicago, IL', 'amount': 55.20, 'status': 'posted', 'card': '2643', 'suspicious': False},
+            {'id': 'TXN-63320', 'date': 'Feb 14, 2026', 'merchant': 'REI Co-op', 'location': 'Chicago, IL', 'amount': 189.99, 'status': 'posted', 'card': '2643', 'suspicious': False},
+            {'id': 'TXN-63300', 'date': 'Feb 12, 2026', 'merchant': 'Mariano\'s', 'location': 'Chicago, IL', 'amount': 68.44, 'status': 'posted', 'card': '2643', 'suspicious': False},
+        ],
+    },
+}
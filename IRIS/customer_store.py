@@ -0,0 +1,378 @@
+"""
+IRIS Customer Store
+===================
+Where caller profiles live, behind one small interface so the mock banking
+tools and lookup_customer don't care whether there are five callers or
+100,000.
+
+  - InMemoryCustomerStore: a phone-keyed dict (the demo profiles in
+    customer_profiles.CUSTOMER_DB) — the default
+  - SQLiteCustomerStore:   one row per caller, indexed by phone, account
+    last-4 and transaction ID; records are decoded on demand, so process
+    memory and startup time don't grow with the customer file
+
+Select the store with IRIS_CUSTOMER_DB=/path/to/customers.db (unset or empty:
+the built-in demo profiles). The file must already exist and hold customers;
+the server opens it read-only and refuses to start otherwise.
+
+Bulk-load synthetic callers (derived from the demo profiles, same schema):
+    python customer_store.py load customers.db --count 100000
+"""
+
+import json
+import os
+import pathlib
+import random
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+# SQLite database to serve customers from ('' = built-in demo profiles)
+CUSTOMER_DB_PATH = os.environ.get('IRIS_CUSTOMER_DB', '')
+
+# Account keys carried by every profile
+ACCOUNT_KEYS = ('checking', 'savings', 'credit_card', 'auto_loan', 'mortgage')
+
+# Rows per executemany() batch while bulk loading
+LOAD_BATCH_SIZE = 5000
+
+
+class CustomerStoreError(Exception):
+    """The configured customer store is missing, unreadable or empty."""
+
+
+class CustomerStore(ABC):
+    """Caller profiles by phone, plus the secondary lookups the tools need."""
+
+    @abstractmethod
+    def get(self, phone):
+        """Customer record for phone, or None."""
+
+    @abstractmethod
+    def default(self):
+        """Record used when the caller isn't on file (the first profile)."""
+
+    @abstractmethod
+    def phones_for_last4(self, last4):
+        """Phones of every customer holding an account ending in last4."""
+
+    @abstractmethod
+    def transaction(self, txn_id):
+        """(phone, transaction) for a transaction ID, or None."""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of customers on file."""
+
+    def __contains__(self, phone):
+        return self.get(phone) is not None
+
+    def version(self):
+        """Token that changes whenever the stored customers may have changed
+        (cache key for anything derived from them)."""
+        return 0
+
+    def close(self):
+        pass
+
+
+class InMemoryCustomerStore(CustomerStore):
+    """Phone-keyed dict of records; secondary indexes built on first use."""
+
+    def __init__(self, records):
+        self._records = records
+        self._by_last4 = None
+        self._by_txn = None
+
+    def get(self, phone):
+        return self._records.get(phone)
+
+    def default(self):
+        return next(iter(self._records.values()), None)
+
+    def __contains__(self, phone):
+        return phone in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def _build_indexes(self):
+        by_last4, by_txn = {}, {}
+        for phone, record in self._records.items():
+            for key in ACCOUNT_KEYS:
+                account = record.get(key)
+                if account:
+                    by_last4.setdefault(account['last_4'], []).append(phone)
+            for txn in record.get('recent_transactions', ()):
+                by_txn.setdefault(txn['id'], (phone, txn))
+        self._by_last4, self._by_txn = by_last4, by_txn
+
+    def phones_for_last4(self, last4):
+        if self._by_last4 is None:
+            self._build_indexes()
+        return list(dict.fromkeys(self._by_last4.get(last4, ())))
+
+    def transaction(self, txn_id):
+        if self._by_txn is None:
+            self._build_indexes()
+        return self._by_txn.get(txn_id)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    phone  TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    phone   TEXT NOT NULL,
+    account TEXT NOT NULL,
+    last_4  TEXT NOT NULL,
+    PRIMARY KEY (phone, account)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS transactions (
+    id    TEXT PRIMARY KEY,
+    phone TEXT NOT NULL
+);
+"""
+
+# Created after a bulk load — much faster than maintaining them row by row
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS accounts_last_4 ON accounts (last_4);
+"""
+
+
+class SQLiteCustomerStore(CustomerStore):
+    """
+    Customers in a SQLite file, one JSON record per row.
+
+    Serving opens the file read-only, so a mistyped path is an error rather
+    than a new empty database; only create=True (the loader) makes the file
+    and its schema. Each thread gets its own read connection (the aiohttp
+    loop and executor threads read concurrently). version() follows the
+    file's mtime and size, so a reload under a running server is noticed.
+    """
+
+    def __init__(self, path, create=False):
+        self.path = path
+        self._local = threading.local()
+        self._default = None
+        self._default_version = None
+        if create:
+            conn = self._connect(readonly=False)
+            try:
+                conn.executescript(_SCHEMA + _INDEXES)
+            finally:
+                conn.close()
+        elif not os.path.isfile(path):
+            raise CustomerStoreError(f"Customer database {path!r} not found "
+                                     f"(create it with: python customer_store.py load {path})")
+
+    def _connect(self, readonly=True):
+        if readonly:
+            return sqlite3.connect(f'{pathlib.Path(self.path).absolute().as_uri()}?mode=ro', uri=True)
+        return sqlite3.connect(self.path)
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def get(self, phone):
+        if not isinstance(phone, str):
+            return None
+        row = self._conn.execute('SELECT record FROM customers WHERE phone = ?', (phone,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def default(self):
+        version = self.version()
+        if self._default is None or self._default_version != version:
+            row = self._conn.execute('SELECT record FROM customers ORDER BY rowid LIMIT 1').fetchone()
+            self._default = json.loads(row[0]) if row else None
+            self._default_version = version
+        return self._default
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __contains__(self, phone):
+        if not isinstance(phone, str):
+            return False
+        return self._conn.execute('SELECT 1 FROM customers WHERE phone = ?', (phone,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+
+    def phones_for_last4(self, last4):
+        if not isinstance(last4, str):
+            return []
+        rows = self._conn.execute('SELECT DISTINCT phone FROM accounts WHERE last_4 = ?', (last4,))
+        return [phone for (phone,) in rows]
+
+    def transaction(self, txn_id):
+        if not isinstance(txn_id, str):
+            return None
+        row = self._conn.execute('SELECT phone FROM transactions WHERE id = ?', (txn_id,)).fetchone()
+        if not row:
+            return None
+        record = self.get(row[0])
+        for txn in (record or {}).get('recent_transactions', ()):
+            if txn['id'] == txn_id:
+                return row[0], txn
+        return None
+
+    def load(self, records):
+        """
+        Bulk-insert an iterable of records (a phone already on file is replaced).
+
+        Streams in LOAD_BATCH_SIZE batches inside one transaction, so memory
+        stays flat however many records the iterable yields. Returns the count.
+        """
+        conn = self._connect(readonly=False)
+        count = 0
+        try:
+            conn.execute('PRAGMA journal_mode = OFF')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.executescript('DROP INDEX IF EXISTS accounts_last_4;')
+            with conn:
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= LOAD_BATCH_SIZE:
+                        count += self._insert(conn, batch)
+                        batch = []
+                if batch:
+                    count += self._insert(conn, batch)
+            conn.executescript(_INDEXES)
+        finally:
+            conn.close()
+        self._default = None
+        return count
+
+    @staticmethod
+    def _insert(conn, records):
+        # A replaced caller's old transaction IDs may linger; transaction()
+        # re-checks against the current record, so they simply stop resolving
+        conn.executemany(
+            'INSERT OR REPLACE INTO customers (phone, record) VALUES (?, ?)',
+            [(r['phone'], json.dumps(r, separators=(',', ':'))) for r in records],
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO accounts (phone, account, last_4) VALUES (?, ?, ?)',
+            [(r['phone'], key, r[key]['last_4']) for r in records for key in ACCOUNT_KEYS if r.get(key)],
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO transactions (id, phone) VALUES (?, ?)',
+            [(t['id'], r['phone']) for r in records for t in r.get('recent_transactions', ())],
+        )
+        return len(records)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def open_store(path, default_records):
+    """
+    Read-only SQLite store at path, or the in-memory store over
+    default_records when path is empty. Raises CustomerStoreError if the
+    file is missing, isn't a customer database or has no customers — a
+    server with nobody to look up would fail every tool call instead.
+    """
+    if not path:
+        return InMemoryCustomerStore(default_records)
+    store = SQLiteCustomerStore(path)
+    try:
+        count = len(store)
+    except sqlite3.Error as e:
+        store.close()
+        raise CustomerStoreError(f"Customer database {path!r} is not readable: {e}") from e
+    if not count:
+        store.close()
+        raise CustomerStoreError(f"Customer database {path!r} has no customers "
+                                 f"(load some with: python customer_store.py load {path})")
+    return store
+
+
+# ===== Synthetic Profiles =====
+
+_FIRST_NAMES = (
+    'Aisha', 'Daniel', 'Mei', 'Carlos', 'Priya', 'John', 'Fatima', 'Liam', 'Yuki', 'Grace',
+    'Omar', 'Elena', 'Kwame', 'Sara', 'Diego', 'Hannah', 'Ravi', 'Chloe', 'Mateo', 'Nadia',
+)
+_LAST_NAMES = (
+    'Patel', 'Johnson', 'Nguyen', 'Garcia', 'Okafor', 'Smith', 'Kim', 'Hernandez', 'Cohen', 'Ali',
+    'Brown', 'Rossi', 'Singh', 'Williams', 'Tanaka', 'Lopez', 'Mensah', 'Davis', 'Novak', 'Chen',
+)
+
+
+def synthetic_phone(n):
+    """Unique phone for the n-th synthetic caller (the 7xx area codes never collide with the demo)."""
+    digits = f'{7000000000 + n:010d}'
+    return f'+1-{digits[:3]}-{digits[3:6]}-{digits[6:]}'
+
+
+def synthetic_customers(count, templates, seed=0):
+    """
+    Yield count synthetic records, each a demo profile (round-robin over
+    templates) with fresh identity, last-4s, balances and transaction IDs.
+    """
+    rng = random.Random(seed)
+    templates = list(templates)
+    for n in range(count):
+        template = templates[n % len(templates)]
+        record = json.loads(json.dumps(template))  # deep copy
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        phone = synthetic_phone(n)
+        record.update({
+            'name': f'{first} {last}',
+            'phone': phone,
+            'email': f'{first.lower()}.{last.lower()}{n}@example.com',
+        })
+
+        # Fresh, distinct last-4 per account; remap the scenario -> account table
+        new_last4 = {}
+        for key, last4 in zip(ACCOUNT_KEYS, rng.sample(range(10000), len(ACCOUNT_KEYS))):
+            if record.get(key):
+                new_last4[record[key]['last_4']] = f'{last4:04d}'
+                record[key]['last_4'] = f'{last4:04d}'
+                if 'balance' in record[key]:
+                    record[key]['balance'] = round(record[key]['balance'] * rng.uniform(0.5, 1.5), 2)
+        record['accounts'] = {sid: new_last4.get(l4, l4) for sid, l4 in record['accounts'].items()}
+        for i, txn in enumerate(record.get('recent_transactions', ())):
+            txn['id'] = f'TXN-S{n}-{i}'
+            txn['card'] = new_last4.get(txn['card'], txn['card'])
+            txn['amount'] = round(txn['amount'] * rng.uniform(0.5, 1.5), 2)
+        yield record
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='IRIS customer store tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    load_cmd = sub.add_parser('load', help='bulk-load synthetic callers into a SQLite store')
+    load_cmd.add_argument('path', help='SQLite file (created if missing)')
+    load_cmd.add_argument('--count', type=int, default=100000)
+    load_cmd.add_argument('--seed', type=int, default=0)
+    load_cmd.add_argument('--no-demo', action='store_true', help="don't include the built-in demo profiles")
+    args = parser.parse_args()
+
+    from customer_profiles import CUSTOMER_DB
+
+    store = SQLiteCustomerStore(args.path, create=True)
+    started = time.perf_counter()
+    loaded = 0
+    if not args.no_demo:
+        loaded += store.load(CUSTOMER_DB.values())
+    loaded += store.load(synthetic_customers(args.count, CUSTOMER_DB.values(), args.seed))
+    print(f"Loaded {loaded} customers into {args.path} in {time.perf_counter() - started:.1f}s "
+          f"({len(store)} on file) — serve with IRIS_CUSTOMER_DB={args.path}")
@@ -0,0 +1,447 @@
+"""
+IRIS Fake Realtime Server
+=========================
+Local stand-in for the OpenAI Realtime API, so the /ws relay can be run,
+regression-tested and load-tested with no API key and no network.
+
+Speaks the event protocol the relay and browser use:
+
+  - session.created on connect; session.updated echoes session.update
+  - server VAD: non-silent input_audio_buffer.append audio starts speech,
+    silence_duration_ms (from the session's turn_detection) of all-zero
+    audio ends it -> speech_started / speech_stopped / committed /
+    input_audio_transcription.completed, then a response
+  - responses stream response.audio.delta (24 kHz PCM16 in chunk_ms
+    pieces, paced in real time) with a transcript, then response.done
+  - tool calls are scripted from SCENARIO_TOOLS: the scenario is recognized
+    from the tools in session.update, and each caller turn triggers that
+    scenario's next tool (arguments built from its JSON schema), answered
+    via response.function_call_arguments.done; end_call closes the script
+  - caller speech during a response (or response.cancel) cancels it:
+    response.done with status "cancelled"
+
+Latencies and chunk sizes are constructor arguments / CLI flags. With
+stamp=True (--stamp) every event carries "sent_at" (time.monotonic(), which
+is system-wide on Linux) so a client on the same host can measure how long
+the relay held each frame (see loadgen.py). Audio deltas also carry it at
+the start of their PCM (audio_stamp() reads it back), so it survives a
+relay that unwraps them into raw iris-pcm16 binary frames.
+
+    python fake_realtime.py --port 8765
+    OPENAI_REALTIME_URL=ws://127.0.0.1:8765 OPENAI_API_KEY=fake python serve.py
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import math
+import struct
+import time
+from collections import deque
+from http import HTTPStatus
+
+import websockets
+
+from realtime_relay import sniff_event_type
+
+try:
+    from llm_engine import END_CALL_TOOL, SCENARIO_TOOLS, customer_store
+except ImportError:
+    END_CALL_TOOL, SCENARIO_TOOLS, customer_store = None, {}, None
+
+DEFAULT_PORT = 8765
+
+# PCM16 mono at the Realtime API's 24 kHz
+SAMPLE_RATE = 24000
+BYTES_PER_MS = SAMPLE_RATE * 2 // 1000
+
+# Defaults (milliseconds)
+SESSION_LATENCY_MS = 20     # session.update -> session.updated
+FIRST_AUDIO_MS = 300        # response.created -> first audio delta
+TOOL_LATENCY_MS = 150       # response.created -> function_call_arguments.done
+CHUNK_MS = 50               # audio per response.audio.delta
+RESPONSE_AUDIO_MS = 1500    # audio per spoken response
+SILENCE_DURATION_MS = 500   # server VAD end-of-speech, unless session.update sets one
+
+# Values for schema properties that need something plausible
+ARGUMENT_HINTS = {
+    'amount': 250.0,
+    'current_limit': 25000,
+    'requested_limit': 30000,
+    'days_back': 30,
+    'recipient_name': 'Jane Doe',
+    'bank_name': 'Test Bank',
+    'country': 'US',
+    'currency': 'USD',
+    'reason': 'fraud',
+    'transaction_id': 'TXN-001',
+    'intent': 'Load test',
+    'actions_taken': 'Scripted tool calls',
+}
+
+
+_AUDIO_KEY = '"audio":"'
+
+
+def _dumps(event):
+    # Compact, with "type" first — the form the relay's sniff_event_type() expects
+    return json.dumps(event, separators=(',', ':'))
+
+
+# Stamped audio: magic + little-endian double sent_at over the first samples of the chunk
+AUDIO_STAMP_MAGIC = b'IRTS'
+_AUDIO_STAMP = struct.Struct('<4sd')
+
+
+def stamp_audio(pcm, sent_at):
+    """pcm with sent_at written over its first 12 bytes."""
+    return _AUDIO_STAMP.pack(AUDIO_STAMP_MAGIC, sent_at) + pcm[_AUDIO_STAMP.size:]
+
+
+def audio_stamp(pcm):
+    """sent_at carried by stamped PCM, or None."""
+    if len(pcm) >= _AUDIO_STAMP.size and pcm.startswith(AUDIO_STAMP_MAGIC):
+        return _AUDIO_STAMP.unpack_from(pcm)[1]
+    return None
+
+
+def _tone_chunk(chunk_ms, freq=440, amplitude=3000):
+    """base64 PCM16 sine tone, chunk_ms long (spoken-audio placeholder)."""
+    samples = chunk_ms * SAMPLE_RATE // 1000
+    pcm = bytearray()
+    for i in range(samples):
+        pcm += int(amplitude * math.sin(2 * math.pi * freq * i / SAMPLE_RATE)).to_bytes(2, 'little', signed=True)
+    return base64.b64encode(bytes(pcm)).decode('ascii')
+
+
+def scenario_for_tools(tool_names):
+    """Scenario whose SCENARIO_TOOLS are exactly the tools a session was configured with, or None."""
+    names = set(tool_names)
+    if END_CALL_TOOL:
+        names.discard(END_CALL_TOOL['name'])
+    for scenario_id, tools in SCENARIO_TOOLS.items():
+        if {tool['name'] for tool in tools} == names:
+            return scenario_id
+    return None
+
+
+def _append_audio(message):
+    """PCM16 bytes of an input_audio_buffer.append frame."""
+    start = message.find(_AUDIO_KEY)
+    if start != -1:
+        start += len(_AUDIO_KEY)
+        end = message.find('"', start)
+        if end != -1:
+            return base64.b64decode(message[start:end])
+    return base64.b64decode(json.loads(message).get('audio', ''))
+
+
+def sample_arguments(tool, scenario_id=None):
+    """Arguments for a tool call, built from its parameter schema."""
+    last4 = None
+    default = customer_store.default() if customer_store is not None else None
+    if default and scenario_id:
+        last4 = default.get('accounts', {}).get(scenario_id)
+    arguments = {}
+    for name, spec in tool.get('parameters', {}).get('properties', {}).items():
+        if 'enum' in spec:
+            arguments[name] = spec['enum'][0]
+        elif name in ARGUMENT_HINTS:
+            arguments[name] = ARGUMENT_HINTS[name]
+        elif 'last_4' in name:
+            arguments[name] = last4 or '0000'
+        elif spec.get('type') in ('number', 'integer'):
+            arguments[name] = 100
+        elif spec.get('type') == 'boolean':
+            arguments[name] = False
+        elif name == 'email' and default:
+            arguments[name] = default.get('email', '')
+        else:
+            arguments[name] = 'test'
+    return arguments
+
+
+def tool_script(scenario_id, end_call=True):
+    """(name, arguments) for every tool call the fake model makes in a scenario, in order."""
+    script = [(tool['name'], sample_arguments(tool, scenario_id)) for tool in SCENARIO_TOOLS.get(scenario_id, ())]
+    if end_call and END_CALL_TOOL and scenario_id in SCENARIO_TOOLS:
+        script.append((END_CALL_TOOL['name'], sample_arguments(END_CALL_TOOL, scenario_id)))
+    return script
+
+
+class FakeRealtimeServer:
+    """websockets server that plays the OpenAI Realtime side of a call."""
+
+    def __init__(self, session_latency_ms=SESSION_LATENCY_MS, first_audio_ms=FIRST_AUDIO_MS,
+                 tool_latency_ms=TOOL_LATENCY_MS, chunk_ms=CHUNK_MS, response_audio_ms=RESPONSE_AUDIO_MS,
+                 silence_duration_ms=SILENCE_DURATION_MS, realtime=True, tool_calls=True, end_call=True,
+                 api_key=None, stamp=False):
+        self.session_latency_ms = session_latency_ms
+        self.first_audio_ms = first_audio_ms
+        self.tool_latency_ms = tool_latency_ms
+        self.chunk_ms = chunk_ms
+        self.response_audio_ms = response_audio_ms
+        self.silence_duration_ms = silence_duration_ms
+        self.realtime = realtime          # pace audio deltas at playback speed
+        self.tool_calls = tool_calls
+        self.end_call = end_call
+        self.api_key = api_key            # require this bearer token (None: accept any)
+        self.stamp = stamp                # add "sent_at" to every event (and into delta audio)
+        self.audio_chunk = _tone_chunk(chunk_ms)
+        self.audio_pcm = base64.b64decode(self.audio_chunk)
+        self._ids = itertools.count(1)
+        self._server = None
+        self.stats = {'connections': 0, 'active': 0, 'responses': 0, 'cancelled': 0,
+                      'tool_calls': 0, 'audio_deltas': 0, 'appends': 0}
+
+    def next_id(self, prefix):
+        return f'{prefix}_{next(self._ids)}'
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """Start listening; returns the ws:// URL (port 0 picks a free port)."""
+        self._server = await websockets.serve(
+            self.handle, host, port, max_size=2**24, process_request=self._check_key,
+        )
+        bound = self._server.sockets[0].getsockname()[1]
+        return f'ws://{host}:{bound}'
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _check_key(self, connection, request):
+        if self.api_key is None:
+            return None
+        if request.headers.get('Authorization') != f'Bearer {self.api_key}':
+            return connection.respond(HTTPStatus.UNAUTHORIZED, 'Invalid API key\n')
+        return None
+
+    async def handle(self, ws):
+        self.stats['connections'] += 1
+        self.stats['active'] += 1
+        try:
+            await _FakeCall(self, ws).run()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.stats['active'] -= 1
+
+
+class _FakeCall:
+    """One Realtime session: VAD, responses and the scenario's tool script."""
+
+    def __init__(self, server, ws):
+        self.server = server
+        self.ws = ws
+        self.session = {'id': server.next_id('sess'), 'object': 'realtime.session', 'modalities': ['audio', 'text']}
+        self.silence_duration_ms = server.silence_duration_ms
+        self.script = deque()
+        self.response_task = None
+        self.response_id = None
+        self.speaking = False
+        self.silent_ms = 0.0
+        self.turns = 0
+
+    async def send(self, event):
+        if self.server.stamp:
+            event['sent_at'] = time.monotonic()
+        await self.ws.send(_dumps(event))
+
+    async def run(self):
+        await self.send({'type': 'session.created', 'event_id': self.server.next_id('event'), 'session': self.session})
+        try:
+            async for message in self.ws:
+                if sniff_event_type(message) == 'input_audio_buffer.append':
+                    await self.on_audio(message)
+                    continue
+                event = json.loads(message)
+                handler = getattr(self, 'on_' + event.get('type', '').replace('.', '_'), None)
+                if handler is not None:
+                    await handler(event)
+        finally:
+            if self.response_task and not self.response_task.done():
+                self.response_task.cancel()
+
+    # --- Client events ---
+
+    async def on_session_update(self, event):
+        session = event.get('session', {})
+        self.session.update(session)
+        turn_detection = session.get('turn_detection') or {}
+        self.silence_duration_ms = turn_detection.get('silence_duration_ms', self.silence_duration_ms)
+        if self.server.tool_calls:
+            scenario_id = scenario_for_tools(tool.get('name') for tool in session.get('tools', ()))
+            self.script = deque(tool_script(scenario_id, self.server.end_call))
+        await asyncio.sleep(self.server.session_latency_ms / 1000)
+        await self.send({'type': 'session.updated', 'event_id': self.server.next_id('event'), 'session': self.session})
+
+    async def on_response_create(self, event):
+        if self.response_task and not self.response_task.done():
+            await self.send({'type': 'error', 'event_id': self.server.next_id('event'), 'error': {
+                'type': 'invalid_request_error', 'code': 'conversation_already_has_active_response',
+                'message': 'Conversation already has an active response',
+            }})
+            return
+        self.start_response(tool_turn=False)
+
+    async def on_response_cancel(self, event):
+        await self.cancel_response()
+
+    async def on_conversation_item_create(self, event):
+        item = event.get('item', {})
+        await self.send({'type': 'conversation.item.created', 'event_id': self.server.next_id('event'),
+                         'item': {'id': self.server.next_id('item'), **item}})
+
+    async def on_input_audio_buffer_clear(self, event):
+        self.speaking = False
+        await self.send({'type': 'input_audio_buffer.cleared', 'event_id': self.server.next_id('event')})
+
+    async def on_audio(self, message):
+        """Server VAD over one append: any non-zero sample is speech."""
+        self.server.stats['appends'] += 1
+        pcm = _append_audio(message)
+        duration_ms = len(pcm) / BYTES_PER_MS
+        if pcm.strip(b'\0'):
+            self.silent_ms = 0.0
+            if not self.speaking:
+                self.speaking = True
+                await self.send({'type': 'input_audio_buffer.speech_started', 'event_id': self.server.next_id('event')})
+                # Barge-in: caller talks over the bot
+                await self.cancel_response()
+        elif self.speaking:
+            self.silent_ms += duration_ms
+            if self.silent_ms >= self.silence_duration_ms:
+                self.speaking = False
+                await self.end_of_turn()
+
+    # --- Server side ---
+
+    async def end_of_turn(self):
+        self.turns += 1
+        item_id = self.server.next_id('item')
+        for evt_type in ('input_audio_buffer.speech_stopped', 'input_audio_buffer.committed'):
+            await self.send({'type': evt_type, 'event_id': self.server.next_id('event'), 'item_id': item_id})
+        await self.send({
+            'type': 'conversation.item.input_audio_transcription.completed', 'event_id': self.server.next_id('event'),
+            'item_id': item_id, 'content_index': 0, 'transcript': f'Scripted caller turn {self.turns}.',
+        })
+        if not (self.response_task and not self.response_task.done()):
+            self.start_response(tool_turn=True)
+
+    def start_response(self, tool_turn):
+        call = self.script.popleft() if tool_turn and self.script else None
+        self.response_task = asyncio.ensure_future(self.respond(call))
+
+    async def cancel_response(self):
+        task = self.response_task
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        self.server.stats['cancelled'] += 1
+        await self.send({'type': 'response.done', 'event_id': self.server.next_id('event'), 'response': {
+            'id': self.response_id, 'object': 'realtime.response', 'status': 'cancelled',
+            'status_details': {'type': 'cancelled', 'reason': 'turn_detected'}, 'output': [],
+        }})
+
+    async def respond(self, call):
+        server = self.server
+        response_id = self.response_id = server.next_id('resp')
+        server.stats['responses'] += 1
+        await self.send({'type': 'response.created', 'event_id': server.next_id('event'),
+                         'response': {'id': response_id, 'object': 'realtime.response', 'status': 'in_progress'}})
+        item_id = server.next_id('item')
+        if call is not None:
+            name, arguments = call
+            await asyncio.sleep(server.tool_latency_ms / 1000)
+            server.stats['tool_calls'] += 1
+            item = {'id': item_id, 'type': 'function_call', 'name': name,
+                    'call_id': server.next_id('call'), 'arguments': json.dumps(arguments)}
+            await self.send({'type': 'response.output_item.added', 'event_id': server.next_id('event'),
+                             'response_id': response_id, 'output_index': 0, 'item': {**item, 'arguments': ''}})
+            await self.send({'type': 'response.function_call_arguments.done', 'event_id': server.next_id('event'),
+                             'response_id': response_id, 'item_id': item_id, 'output_index': 0,
+                             'call_id': item['call_id'], 'name': name, 'arguments': item['arguments']})
+            output = [item]
+        else:
+            transcript = f'Scripted reply {server.stats["responses"]}.'
+            await asyncio.sleep(server.first_audio_ms / 1000)
+            await self.send({'type': 'response.audio_transcript.delta', 'event_id': server.next_id('event'),
+                             'response_id': response_id, 'item_id': item_id, 'output_index': 0,
+                             'content_index': 0, 'delta': transcript})
+            # Every delta frame is identical apart from event_id — build it around one prefix
+            prefix = ('{"type":"response.audio.delta","response_id":"%s","item_id":"%s","output_index":0,'
+                      '"content_index":0,"event_id":"' % (response_id, item_id))
+            suffix = '","delta":"' + server.audio_chunk + '"}'
+            stamp = server.stamp
+            chunks = max(1, server.response_audio_ms // server.chunk_ms)
+            pace = server.chunk_ms / 1000 if server.realtime else 0
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for n in range(chunks):
+                if stamp:
+                    sent_at = time.monotonic()
+                    frame = '%s%s","sent_at":%.6f,"delta":"%s"}' % (
+                        prefix, server.next_id('event'), sent_at,
+                        base64.b64encode(stamp_audio(server.audio_pcm, sent_at)).decode('ascii'))
+                else:
+                    frame = prefix + server.next_id('event') + suffix
+                await self.ws.send(frame)
+                server.stats['audio_deltas'] += 1
+                if pace:
+                    # Absolute schedule, so send time doesn't accumulate as drift
+                    await asyncio.sleep(max(0.0, started + (n + 1) * pace - loop.time()))
+            for evt_type in ('response.audio.done', 'response.audio_transcript.done'):
+                await self.send({'type': evt_type, 'event_id': server.next_id('event'), 'response_id': response_id,
+                                 'item_id': item_id, 'output_index': 0, 'content_index': 0,
+                                 **({'transcript': transcript} if evt_type.endswith('transcript.done') else {})})
+            output = [{'id': item_id, 'type': 'message', 'role': 'assistant',
+                       'content': [{'type': 'audio', 'transcript': transcript}]}]
+        await self.send({'type': 'response.done', 'event_id': server.next_id('event'), 'response': {
+            'id': response_id, 'object': 'realtime.response', 'status': 'completed', 'output': output,
+        }})
+
+
+async def serve_forever(server, host, port):
+    url = await server.start(host, port)
+    print(f"Fake Realtime server on {url}")
+    print(f"  Relay to it with OPENAI_REALTIME_URL={url} (any OPENAI_API_KEY)")
+    try:
+        await asyncio.Future()
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI Realtime API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--session-latency-ms', type=int, default=SESSION_LATENCY_MS)
+    parser.add_argument('--first-audio-ms', type=int, default=FIRST_AUDIO_MS)
+    parser.add_argument('--tool-latency-ms', type=int, default=TOOL_LATENCY_MS)
+    parser.add_argument('--chunk-ms', type=int, default=CHUNK_MS)
+    parser.add_argument('--response-audio-ms', type=int, default=RESPONSE_AUDIO_MS)
+    parser.add_argument('--no-pacing', action='store_true', help='send audio deltas as fast as possible')
+    parser.add_argument('--no-tools', action='store_true', help="don't script tool calls")
+    parser.add_argument('--api-key', help='reject connections without this bearer token (HTTP 401)')
+    parser.add_argument('--stamp', action='store_true', help='add "sent_at" (monotonic clock) to every event')
+    args = parser.parse_args()
+
+    fake = FakeRealtimeServer(
+        session_latency_ms=args.session_latency_ms, first_audio_ms=args.first_audio_ms,
+        tool_latency_ms=args.tool_latency_ms, chunk_ms=args.chunk_ms, response_audio_ms=args.response_audio_ms,
+        realtime=not args.no_pacing, tool_calls=not args.no_tools, api_key=args.api_key,
+        stamp=args.stamp,
+    )
+    try:
+        asyncio.run(serve_forever(fake, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -3,6 +3,8 @@ IRIS AI IVR Guardrails
 Server-side transaction limit enforcement and PII protection.
 """
 
+import json
+import os
 import re
 
 # ===== Transaction Limits =====
@@ -90,10 +92,15 @@ def _parse_number(value):
 
 # ===== PII Scrubbing =====
 
+def _strip_separators(digits):
+    """Drop whitespace and dashes from a card-number match (same set as [\s-])."""
+    return ''.join(digits.split()).replace('-', '')
+
+
 def _mask_digits_factory(keep_last):
     """Create a masking function that keeps the last N digits."""
     def _mask(match):
-        raw = re.sub(r'[\s-]', '', match.group(1))  # strip spaces/dashes
+        raw = _strip_separators(match.group(1))
         if len(raw) < 8:
             return match.group(0)  # too short, probably not a card/account
         return '****' + raw[-keep_last:]
@@ -112,14 +119,249 @@ _PII_PATTERNS = [
     (re.compile(r'(?i)(?<!last )(?<!ending in )(?<!ding )\b(\d{8,12})\b'), lambda m: '****' + m.group(1)[-4:]),
 ]
 
+_CARD_RE = _PII_PATTERNS[0][0]
+
+# The four patterns above fused into one alternation, same priority order.
+# One scan replaces four re.sub passes; lastgroup picks the masker. Every
+# branch starts on a digit, so the leading (?=\d) rejects all other positions
+# before the lookbehinds and branches are tried.
+_PII_FUSED_RE = re.compile(
+    r'(?=\d)(?:(?P<card>\b\d[\d\s-]{11,17}\d\b)'
+    r'|(?P<ssn_dash>\b\d{3}-\d{2}-\d{4}\b)'
+    r'|(?P<ssn>(?<!\$)(?<!#)(?<!TRF-)(?<!WIR-)(?<!DSP-)\b\d{9}\b)'
+    r'|(?P<account>(?i:(?<!last )(?<!ending in )(?<!ding ))\b\d{8,12}\b))'
+)
+
+_PII_MASKERS = {
+    'card': lambda s: '****' + _strip_separators(s)[-4:],
+    'ssn_dash': lambda s: '***-**-' + s[-4:],
+    'ssn': lambda s: '*****' + s[-4:],
+    'account': lambda s: '****' + s[-4:],
+}
+
+_DIGIT_RE = re.compile(r'\d')
+
+
+def _scrub_sequential(text):
+    """Reference implementation: one re.sub pass per pattern, in order."""
+    for pattern, replacement in _PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
 
 def scrub_pii(text):
     """
     Scrub potential PII (card numbers, SSNs, account numbers) from text.
     Preserves 4-digit sequences (common in 'last 4 digits' references).
+
+    Single pass over the fused pattern; text without digits returns after
+    one scan. Output is identical to running _PII_PATTERNS one after another
+    — the two cases where a single leftmost scan would disagree with that
+    (a card-shaped run under 8 digits, or a card starting inside an
+    XXX-XX-XXXX match) are handed to _scrub_sequential.
     """
-    if not text:
+    if not text or not _DIGIT_RE.search(text):
         return text
-    for pattern, replacement in _PII_PATTERNS:
-        text = pattern.sub(replacement, text)
-    return text
+    parts = []
+    last = 0
+    for m in _PII_FUSED_RE.finditer(text):
+        kind = m.lastgroup
+        start, end = m.span()
+        if kind == 'card':
+            if len(_strip_separators(m.group())) < 8:
+                # Left unmasked by the card pass, but later passes still look inside it
+                return _scrub_sequential(text)
+        elif kind == 'ssn_dash':
+            # The card pass runs first over the whole text and would claim these digits
+            if _CARD_RE.match(text, start + 4) or _CARD_RE.match(text, start + 7):
+                return _scrub_sequential(text)
+        parts.append(text[last:start])
+        parts.append(_PII_MASKERS[kind](m.group()))
+        last = end
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return ''.join(parts)
+
+
+# ===== Streaming PII Scrubbing =====
+
+# Every PII pattern above matches only [\d\s-] characters, so text before the
+# last digit-bearing run of those characters can never become part of a match.
+# Lookbehinds reach back at most 10 characters ("ending in ").
+_STREAM_CONTEXT_CHARS = 16
+
+TRANSCRIPT_EVENTS = (
+    'response.audio_transcript.delta',
+    'response.audio_transcript.done',
+    'conversation.item.input_audio_transcription.completed',
+)
+
+
+def _held_run_start(text):
+    """Index of the first digit in the trailing run of digits/spaces/dashes, or len(text) if it has none."""
+    i = len(text)
+    first_digit = i
+    while i:
+        ch = text[i - 1]
+        if ch.isdecimal():
+            first_digit = i - 1
+        elif not (ch.isspace() or ch == '-'):
+            break
+        i -= 1
+    return first_digit
+
+
+def _scrub_after(context, text):
+    """scrub_pii(text) as if it followed `context` (already-released raw text)."""
+    if not _DIGIT_RE.search(text):
+        return text
+    if not context:
+        return scrub_pii(text)
+    # No match can span the boundary (context never ends inside a digit run),
+    # so the scrubbed context is an exact prefix of the scrubbed whole
+    return scrub_pii(context + text)[len(scrub_pii(context)):]
+
+
+class StreamingPIIScrubber:
+    """
+    Incremental scrub_pii for one transcript stream.
+
+    feed() returns what can be released now: everything except a trailing run
+    of digits/spaces/dashes that could still grow into a card, SSN or account
+    number in the next delta. Text without digits passes straight through.
+    finish() releases the held run at the end of the stream. The concatenated
+    output equals scrub_pii() of the concatenated input.
+    """
+
+    def __init__(self):
+        self._context = ''  # raw tail of released text — lookbehind/\b context
+        self._pending = ''  # raw digit run held back
+
+    def feed(self, delta):
+        if not self._pending and not _DIGIT_RE.search(delta):
+            # Nothing held and nothing that could start a number — release as-is
+            self._context = (self._context + delta)[-_STREAM_CONTEXT_CHARS:]
+            return delta
+        text = self._pending + delta
+        cut = _held_run_start(text)
+        ready, self._pending = text[:cut], text[cut:]
+        if not ready:
+            return ''
+        out = _scrub_after(self._context, ready)
+        self._context = (self._context + ready)[-_STREAM_CONTEXT_CHARS:]
+        return out
+
+    def finish(self):
+        out = _scrub_after(self._context, self._pending) if self._pending else ''
+        self._context = self._pending = ''
+        return out
+
+
+class TranscriptScrubber:
+    """Scrubs the transcript events of one relay connection, one stream per content part."""
+
+    def __init__(self):
+        self._streams = {}
+
+    def scrub(self, data):
+        """
+        Scrub a TRANSCRIPT_EVENTS event in place.
+
+        Returns (changed, flush): flush is a transcript delta event carrying
+        text held back from earlier deltas, to be sent before this event.
+        """
+        key = (data.get('item_id'), data.get('content_index'))
+        changed = False
+        flush = None
+        delta = data.get('delta')
+        if isinstance(delta, str):
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = StreamingPIIScrubber()
+            cleaned = stream.feed(delta)
+            if cleaned != delta:
+                data['delta'] = cleaned
+                changed = True
+        transcript = data.get('transcript')
+        if isinstance(transcript, str):
+            stream = self._streams.pop(key, None)
+            rest = stream.finish() if stream else ''
+            if rest:
+                flush = {k: v for k, v in data.items() if k not in ('transcript', 'event_id')}
+                flush['type'] = 'response.audio_transcript.delta'
+                flush['delta'] = rest
+            cleaned = scrub_pii(transcript)
+            if cleaned != transcript:
+                data['transcript'] = cleaned
+                changed = True
+        return changed, flush
+
+    def reset(self):
+        """Drop held text (e.g. response cancelled before its transcript finished)."""
+        self._streams.clear()
+
+
+# ===== Golden Corpus / Benchmark =====
+
+# Inputs paired with the output of the sequential reference scrub
+PII_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pii_corpus.jsonl')
+
+
+def load_pii_corpus(path=PII_CORPUS_PATH):
+    """[(case, text, expected scrubbed text), ...] from a JSON-lines corpus."""
+    with open(path, encoding='utf-8') as f:
+        return [(row['case'], row['text'], row['scrubbed']) for row in map(json.loads, f) if row]
+
+
+def check_pii_corpus(path=PII_CORPUS_PATH):
+    """
+    Compare scrub_pii and _scrub_sequential with the corpus and with each
+    other. Returns [(case, text, expected, fused, sequential), ...] for
+    every disagreement (empty when all match).
+    """
+    failures = []
+    for case, text, expected in load_pii_corpus(path):
+        fused, sequential = scrub_pii(text), _scrub_sequential(text)
+        if not (fused == sequential == expected):
+            failures.append((case, text, expected, fused, sequential))
+    return failures
+
+
+def bench_pii(path=PII_CORPUS_PATH, repeat=5):
+    """Best-of-repeat µs per call, fused vs sequential, on corpus texts and on word-sized deltas."""
+    import timeit
+    texts = [text for _, text, _ in load_pii_corpus(path)]
+    deltas = [word + ' ' for text in texts for word in text.split()]
+    results = {}
+    for label, inputs in (('transcripts', texts), ('deltas', deltas)):
+        for name, func in (('fused', scrub_pii), ('sequential', _scrub_sequential)):
+            best = min(timeit.repeat(lambda: [func(t) for t in inputs], number=20, repeat=repeat))
+            results[(label, name)] = best / (20 * len(inputs)) * 1e6
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='IRIS PII scrubber checks')
+    sub = parser.add_subparsers(dest='command', required=True)
+    check_cmd = sub.add_parser('check', help='verify scrub_pii against the golden corpus')
+    check_cmd.add_argument('--corpus', default=PII_CORPUS_PATH)
+    bench_cmd = sub.add_parser('bench', help='time scrub_pii against the sequential reference')
+    bench_cmd.add_argument('--corpus', default=PII_CORPUS_PATH)
+    bench_cmd.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        failures = check_pii_corpus(args.corpus)
+        for case, text, expected, fused, sequential in failures:
+            print(f"MISMATCH [{case}] {text!r}\n  expected   {expected!r}\n  fused      {fused!r}\n  sequential {sequential!r}")
+        print(f"{len(load_pii_corpus(args.corpus)) - len(failures)} ok, {len(failures)} mismatched")
+        sys.exit(1 if failures else 0)
+
+    results = bench_pii(args.corpus, args.repeat)
+    for label in ('transcripts', 'deltas'):
+        fused, sequential = results[(label, 'fused')], results[(label, 'sequential')]
+        print(f"{label:12} fused {fused:7.2f}us  sequential {sequential:7.2f}us  ({sequential / fused:.1f}x)")
@@ -0,0 +1,794 @@
+"""
+IRIS aiohttp Application
+========================
+Every IRIS HTTP endpoint and the /ws OpenAI Realtime relay as aiohttp
+handlers, shared by both servers:
+
+  - serve.py (repo root) — the whole EXL suite on one port
+  - IRIS/serve.py        — IRIS standalone on one port
+
+Everything runs on one event loop, so a slow /api/summarize or /api/tts
+upstream call only ever waits on its own request; page loads, scripted
+bot turns and live /ws audio carry on around it. Never call urlopen() (or
+anything else that blocks) inside a handler — it stalls every live call.
+"""
+
+import os
+import json
+import time
+import asyncio
+import functools
+import ipaddress
+from collections import namedtuple
+
+from aiohttp import web
+import aiohttp
+
+# Import response engine (graceful if missing)
+try:
+    from response_engine import (
+        caller_profile, get_response, extract_entities, score_yes_no, detect_intent_switch, run_batch_request,
+        run_turn_request,
+    )
+    ENGINE_AVAILABLE = True
+except ImportError:
+    ENGINE_AVAILABLE = False
+
+# Import LLM engine (graceful if missing)
+try:
+    from llm_engine import (
+        END_CALL_TOOL, SCENARIO_PROMPTS, SCENARIO_TOOLS, CallSession, handle_function_call, lookup_customer,
+        session_update_payload,
+    )
+    LLM_AVAILABLE = True
+except ImportError:
+    LLM_AVAILABLE = False
+    lookup_customer = None
+
+# Shared pooled OpenAI HTTP client (keep-alive, per-endpoint timeouts + limits)
+from openai_client import OpenAIClient, UpstreamError
+from realtime_relay import (
+    PASSTHROUGH_EVENTS, PCM16_SUBPROTOCOL, decode_audio_delta, encode_audio_append, sniff_event_type,
+)
+from tts_cache import TTS_FORMAT, TTS_MODEL, TTS_VOICE, TTS_VOICES, cache_key, etag_for, etag_matches, tts_cache
+from loop_monitor import MAX_OFFENDERS, loop_monitor
+from call_metrics import call_metrics
+
+# Import guardrails PII scrubber (graceful if missing)
+try:
+    from guardrails import TRANSCRIPT_EVENTS, TranscriptScrubber
+except ImportError:
+    TranscriptScrubber = None
+
+# WebSocket client library for OpenAI relay
+try:
+    import websockets
+    from upstream_pool import RealtimePool
+    WS_AVAILABLE = True
+except ImportError:
+    WS_AVAILABLE = False
+
+# API key — loaded from environment variable, replaced via /api/config
+API_KEY = os.environ.get('OPENAI_API_KEY', '')
+
+# Point at a local stand-in (fake_realtime.py) to run the relay offline
+OPENAI_REALTIME_URL = os.environ.get(
+    'OPENAI_REALTIME_URL', "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview")
+
+# One upstream client for the whole process — never call urlopen() inside a handler,
+# it blocks the event loop and stalls every live /ws audio relay
+openai_client = OpenAIClient()
+
+# Pre-warmed Realtime connections — a call claims one that already has session.created
+realtime_pool = RealtimePool(OPENAI_REALTIME_URL) if WS_AVAILABLE else None
+
+# Metric labels limited to real scenarios and tools (query params are caller-controlled)
+if LLM_AVAILABLE:
+    call_metrics.configure(
+        scenarios=SCENARIO_PROMPTS,
+        functions={tool['name'] for tools in SCENARIO_TOOLS.values() for tool in tools} | {END_CALL_TOOL['name']},
+    )
+
+# How /api/summarize introduces the call and labels the bot's lines
+SummaryPersona = namedtuple('SummaryPersona', ['intro', 'agent_label'])
+
+IRIS_SUMMARY = SummaryPersona(
+    intro="a customer and IRIS, an AI IVR agent for EXL Financial Services",
+    agent_label="IRIS (AI Agent)",
+)
+
+SUITE_SUMMARY = SummaryPersona(
+    intro="a customer and an AI banking assistant for EXL Bank",
+    agent_label="AI Assistant",
+)
+
+# Per-app settings (set by create_app)
+PORT_KEY = web.AppKey('port', int)
+SUMMARY_KEY = web.AppKey('summary_persona', SummaryPersona)
+
+# Never served as static files, relative to the static root
+BLOCKED_PREFIXES = ('.git', '.venv', '.vercel', '.env', '.claude', '__pycache__', 'node_modules', 'iris_history',
+                    '.tts_cache')
+
+# Serve /api/_debug/* to any client, not just loopback (stack traces — keep off on public servers)
+DEBUG_ENDPOINTS = os.environ.get('IRIS_DEBUG_ENDPOINTS', '') == '1'
+
+# Customer store files (IRIS_CUSTOMER_DB) may sit next to the app
+BLOCKED_SUFFIXES = ('.db',)
+
+
+# History is now stored in Supabase (client-side) — server endpoints kept as no-op stubs
+
+
+# ===== CORS Middleware =====
+
+def apply_cors_headers(resp):
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    resp.headers['Access-Control-Allow-Methods'] = 'GET, POST, DELETE, OPTIONS'
+    resp.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    # Uncacheable unless the handler opted in (cached TTS audio sets its own)
+    if 'Cache-Control' not in resp.headers:
+        resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        resp.headers['Pragma'] = 'no-cache'
+    return resp
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    if request.method == 'OPTIONS':
+        resp = web.Response(status=200)
+    else:
+        resp = await handler(request)
+    # Streamed responses set their headers before prepare() — can't change them now
+    if not resp.prepared:
+        apply_cors_headers(resp)
+    return resp
+
+
+# ===== Security: block sensitive paths =====
+
+def block_sensitive_paths(prefixes=BLOCKED_PREFIXES, suffixes=BLOCKED_SUFFIXES):
+    """Middleware that 404s sensitive directories and files."""
+
+    @web.middleware
+    async def middleware(request, handler):
+        path = request.path.lstrip('/')
+        for prefix in prefixes:
+            if path == prefix or path.startswith(prefix + '/'):
+                raise web.HTTPNotFound()
+        if path.endswith(suffixes):
+            raise web.HTTPNotFound()
+        return await handler(request)
+
+    return middleware
+
+
+# ===== API Handlers =====
+
+async def handle_config(request):
+    global API_KEY
+    data = await request.json() if request.content_length else {}
+    api_key = data.get('apiKey', '').strip()
+    if api_key:
+        API_KEY = api_key
+    return web.json_response({
+        'success': True,
+        'configured': bool(API_KEY),
+        'wsPort': request.app[PORT_KEY],
+        'wsAvailable': WS_AVAILABLE and LLM_AVAILABLE,
+    })
+
+
+async def handle_test_key(request):
+    global API_KEY
+    data = await request.json() if request.content_length else {}
+    api_key = data.get('apiKey', '').strip() or API_KEY
+    if not api_key:
+        return web.json_response({'valid': False, 'error': 'No API key provided'})
+    try:
+        status = await openai_client.get_model(api_key, 'gpt-4o-mini')
+        return web.json_response({'valid': status == 200, 'error': None})
+    except UpstreamError as e:
+        if e.status == 401:
+            return web.json_response({'valid': False, 'error': 'Invalid API key'})
+        elif e.status == 404:
+            return web.json_response({'valid': True, 'error': None})
+        return web.json_response({'valid': False, 'error': f'OpenAI error: HTTP {e.status}'})
+    except Exception as e:
+        return web.json_response({'valid': False, 'error': f'Connection failed: {str(e)}'})
+
+
+async def handle_summarize(request):
+    global API_KEY
+    data = await request.json() if request.content_length else {}
+    transcript = data.get('transcript', [])
+    if not transcript:
+        return web.json_response({'summary': 'No transcript available.'})
+    if not API_KEY:
+        return web.json_response({'summary': 'API key not configured.'})
+
+    persona = request.app[SUMMARY_KEY]
+    lines = []
+    for msg in transcript:
+        role = msg.get('role', 'system')
+        text = msg.get('text', '')
+        if role == 'customer':
+            lines.append(f"Customer: {text}")
+        elif role == 'bot':
+            lines.append(f"{persona.agent_label}: {text}")
+        elif role == 'system':
+            lines.append(f"[System: {text}]")
+    conversation_log = '\n'.join(lines)
+
+    prompt = (
+        f"You are an IVR call center analyst. Below is the transcript of a call between {persona.intro}. "
+        "Write a concise but detailed summary of the call. "
+        "Include:\n"
+        "- Why the customer called (intent)\n"
+        "- Key steps taken during the call\n"
+        "- Any verification or authentication performed\n"
+        "- Actions executed by the bot (e.g., card blocked, dispute filed)\n"
+        "- Whether the issue was resolved or escalated\n"
+        "- Any notable customer requests or concerns\n\n"
+        "Keep the summary to 3-5 sentences. Be factual and professional.\n\n"
+        f"--- Transcript ---\n{conversation_log}\n--- End ---"
+    )
+
+    try:
+        resp_data = await openai_client.chat_completion(API_KEY, {
+            "model": "gpt-4o-mini",
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 300,
+            "temperature": 0.3,
+        })
+        summary = resp_data['choices'][0]['message']['content'].strip()
+        return web.json_response({'summary': summary})
+    except Exception as e:
+        return web.json_response({'summary': f'Summary generation failed: {str(e)}'})
+
+
+async def handle_tts(request):
+    """
+    Text-to-Speech via OpenAI TTS API. Returns MP3 audio.
+
+    Audio is cached by hash of (text, voice, model, format): repeats are
+    served from memory/disk with an ETag, and a matching If-None-Match gets
+    a 304. GET /api/tts?text=... works too so browsers can cache prompts.
+
+    Misses stream by default: audio chunks are forwarded as they arrive
+    (chunked transfer) so playback can start on the first chunk and memory
+    stays flat. Send "stream": false to get the whole file in one response.
+    """
+    global API_KEY
+    if request.method == 'GET':
+        data = dict(request.query)
+        if data.get('stream') in ('0', 'false'):
+            data['stream'] = False
+    else:
+        data = await request.json() if request.content_length else {}
+        if not isinstance(data, dict):
+            return web.json_response({'error': 'Expected a JSON object'}, status=400)
+    text = data.get('text', '')
+    if not isinstance(text, str) or not text.strip():
+        return web.json_response({'error': 'No text provided'}, status=400)
+    text = text.strip()
+    voice = data.get('voice') or TTS_VOICE
+    if voice not in TTS_VOICES:
+        return web.json_response({'error': f"Unknown voice (expected one of: {', '.join(TTS_VOICES)})"}, status=400)
+
+    key = cache_key(text, voice)
+    cache_headers = {'ETag': etag_for(key), 'Cache-Control': 'private, max-age=86400'}
+    if etag_matches(request.headers.get('If-None-Match'), key):
+        return web.Response(status=304, headers=cache_headers)
+    audio_data = tts_cache.lookup(key)
+    if audio_data is None:
+        audio_data = await asyncio.get_running_loop().run_in_executor(None, tts_cache.load, key)
+    if audio_data is not None:
+        return web.Response(body=audio_data, content_type='audio/mpeg',
+                            headers={**cache_headers, 'X-TTS-Cache': 'hit'})
+
+    if not API_KEY:
+        return web.json_response({'error': 'API key not configured'}, status=503)
+    payload = {
+        "model": TTS_MODEL,
+        "input": text,
+        "voice": voice,
+        "response_format": TTS_FORMAT,
+    }
+    loop = asyncio.get_running_loop()
+    if data.get('stream') is False:
+        try:
+            audio_data = await openai_client.speech(API_KEY, payload)
+        except Exception as e:
+            return web.json_response({'error': f'TTS failed: {str(e)}'}, status=500)
+        await loop.run_in_executor(None, tts_cache.store, key, audio_data)
+        return web.Response(body=audio_data, content_type='audio/mpeg',
+                            headers={**cache_headers, 'X-TTS-Cache': 'miss'})
+
+    chunks = openai_client.speech_stream(API_KEY, payload)
+    try:
+        # Wait for the first chunk so upstream errors can still be sent as JSON
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b''
+    except Exception as e:
+        await chunks.aclose()
+        return web.json_response({'error': f'TTS failed: {str(e)}'}, status=500)
+
+    resp = apply_cors_headers(web.StreamResponse(headers={
+        'Content-Type': 'audio/mpeg', **cache_headers, 'X-TTS-Cache': 'miss',
+    }))
+    resp.enable_chunked_encoding()
+    received = [first_chunk]
+    try:
+        await resp.prepare(request)
+        await resp.write(first_chunk)
+        async for chunk in chunks:
+            received.append(chunk)
+            await resp.write(chunk)
+        await resp.write_eof()
+    except (ConnectionResetError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Browser went away or upstream stalled mid-stream — nothing left to send
+        print(f"  [TTS] Stream aborted: {e!r}")
+        received = None
+    finally:
+        await chunks.aclose()
+    if received:
+        # Only complete renders are cached — a truncated MP3 would be replayed forever
+        await loop.run_in_executor(None, tts_cache.store, key, b''.join(received))
+    return resp
+
+
+async def handle_respond(request):
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else {}
+    scenario_id = data.get('scenarioId')
+    turn_index = data.get('turnIndex')
+    user_input = data.get('userInput', '')
+    context = data.get('context', {})
+    if scenario_id is None or turn_index is None:
+        return web.json_response({'error': 'Missing scenarioId or turnIndex'}, status=400)
+    customer = caller_profile(context, scenario_id, lookup_customer)
+    result = get_response(scenario_id, turn_index, user_input, context, customer)
+    return web.json_response(result)
+
+
+async def handle_classify(request):
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else {}
+    text = data.get('text', '')
+    result, confidence = score_yes_no(text)
+    return web.json_response({'classification': result, 'confidence': confidence})
+
+
+async def handle_entities(request):
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else {}
+    text = data.get('text', '')
+    scenario_id = data.get('scenarioId', '')
+    entities = extract_entities(text, scenario_id)
+    return web.json_response({'entities': entities})
+
+
+async def handle_intent_switch(request):
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else {}
+    user_input = data.get('userInput', '')
+    current_scenario = data.get('currentScenarioId', '')
+    result = detect_intent_switch(user_input, current_scenario)
+    return web.json_response({'switch': result})
+
+
+async def handle_turn(request):
+    """classify + entities + intent-switch + respond for one utterance in one round trip."""
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else {}
+    try:
+        result = run_turn_request(data, lookup_customer)
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    return web.json_response(result)
+
+
+async def handle_batch(request):
+    """/api/turn over a list of utterances."""
+    if not ENGINE_AVAILABLE:
+        return web.json_response({'error': 'Response engine not available'}, status=503)
+    data = await request.json() if request.content_length else []
+    try:
+        result = run_batch_request(data, lookup_customer)
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    return web.json_response(result)
+
+
+def debug_allowed(request):
+    """Debug endpoints expose internals (stack traces): loopback clients only, unless IRIS_DEBUG_ENDPOINTS=1."""
+    if DEBUG_ENDPOINTS:
+        return True
+    try:
+        return ipaddress.ip_address(request.remote or '').is_loopback
+    except ValueError:
+        return False
+
+
+async def handle_debug_loop(request):
+    """Event-loop health: lag histogram, stalls and the stacks that caused them."""
+    if not debug_allowed(request):
+        raise web.HTTPNotFound()
+    try:
+        top = int(request.query.get('top', 10))
+    except ValueError:
+        return web.json_response({'error': 'top must be an integer'}, status=400)
+    return web.json_response(loop_monitor.snapshot(top=max(0, min(top, MAX_OFFENDERS))))
+
+
+async def handle_metrics(request):
+    """Relay latency histograms — Prometheus text, or ?format=json for percentiles."""
+    if request.query.get('format') == 'json':
+        return web.json_response(call_metrics.snapshot())
+    return web.Response(text=call_metrics.render_prometheus(), content_type='text/plain',
+                        headers={'X-Content-Type-Options': 'nosniff'}, charset='utf-8')
+
+
+# ===== Call History Handlers =====
+
+async def handle_get_history(request):
+    """Return empty — history is now in Supabase."""
+    return web.json_response([])
+
+
+async def handle_add_history(request):
+    """No-op — history is now saved to Supabase client-side."""
+    return web.json_response({'success': True, 'count': 0})
+
+
+async def handle_delete_history(request):
+    """No-op — history is now deleted from Supabase client-side."""
+    return web.json_response({'success': True})
+
+
+# ===== WebSocket Relay Handler =====
+
+def prepare_call(scenario_id, phone, silence_ms, mode):
+    """
+    (CallSession, serialized session.update) for a new call. Blocking — it
+    reads the customer store — so the relay runs it in an executor.
+    """
+    if phone:
+        customer_context = lookup_customer(phone, scenario_id)
+        print(f"  [WS] Customer: {customer_context.get('name') if customer_context else 'not found'}")
+    # Per-call state — tool calls on this relay only ever see this caller's account
+    call_session = CallSession(scenario_id, phone)
+    return call_session, session_update_payload(scenario_id, phone, silence_ms, mode)
+
+
+async def ws_relay(request):
+    """WebSocket endpoint: relay browser <-> OpenAI Realtime API."""
+    global API_KEY
+
+    connected_at = time.perf_counter()
+    scenario_id = request.query.get('scenario') or None
+    phone = request.query.get('phone') or None
+    silence_ms = int(request.query.get('silence', 1000))
+    disconnect_timeout = max(3, min(15, int(request.query.get('disconnect_timeout', 15))))
+    mode = request.query.get('mode') or None
+    print(f"  [WS] Browser connected — scenario={scenario_id}, phone={phone}, silence={silence_ms}ms, disconnect_timeout={disconnect_timeout}s, mode={mode}")
+
+    # Upgrade to WebSocket
+    browser_ws = web.WebSocketResponse(max_msg_size=2**24, protocols=(PCM16_SUBPROTOCOL,))
+    await browser_ws.prepare(request)
+    # Opt-in: browser exchanges raw PCM16 binary frames instead of base64 JSON
+    binary_audio = browser_ws.ws_protocol == PCM16_SUBPROTOCOL
+
+    # Loop already lagging — another call would degrade the live ones
+    if loop_monitor.overloaded():
+        loop_monitor.refuse()
+        print(f"  [WS] Refused call — loop lag {loop_monitor.recent_lag_ms():.0f}ms over {loop_monitor.lag_limit_ms:.0f}ms")
+        await browser_ws.send_json({
+            "type": "error",
+            "error": {"message": "Server is busy. Please try the call again in a moment."}
+        })
+        await browser_ws.close(code=aiohttp.WSCloseCode.TRY_AGAIN_LATER)
+        return browser_ws
+
+    loop = asyncio.get_running_loop()
+    # Streaming PII scrub — numbers split across transcript deltas are held until complete
+    transcript_scrubber = TranscriptScrubber() if TranscriptScrubber else None
+
+    if not API_KEY:
+        await browser_ws.send_json({
+            "type": "error",
+            "error": {"message": "No API key configured. Open Settings to add your OpenAI API key."}
+        })
+        await browser_ws.close()
+        return browser_ws
+
+    if not LLM_AVAILABLE or not WS_AVAILABLE:
+        await browser_ws.send_json({
+            "type": "error",
+            "error": {"message": "LLM engine not available." if not LLM_AVAILABLE
+                      else "WebSocket relay unavailable (pip install websockets)."}
+        })
+        await browser_ws.close()
+        return browser_ws
+
+    # Customer lookup, per-call state and the session.update frame may all hit the
+    # customer store (SQLite) — build them off the loop so live calls keep flowing
+    try:
+        call_session, update_payload = await loop.run_in_executor(
+            None, prepare_call, scenario_id, phone, silence_ms, mode)
+    except Exception as e:
+        print(f"  [WS] Call setup failed: {e!r}")
+        await browser_ws.send_json({
+            "type": "error",
+            "error": {"message": "Couldn't load the caller's account. Please try the call again."}
+        })
+        await browser_ws.close()
+        return browser_ws
+
+    # Per-call latency timings (see call_metrics.py)
+    call_timer = call_metrics.call_timer(scenario_id, connected_at)
+
+    try:
+        print(f"  [WS] Connecting to OpenAI Realtime...")
+        async with realtime_pool.session(API_KEY) as (openai_ws, session_created):
+            print(f"  [WS] Connected to OpenAI! (pool hits={realtime_pool.hits}, misses={realtime_pool.misses})")
+            print(f"  [WS] Got session.created")
+            await browser_ws.send_str(session_created)
+            call_timer.mark_session_created()
+
+            call_timer.mark_session_update_sent()
+            await openai_ws.send(update_payload)
+            print(f"  [WS] Sent session config (mode={mode})")
+
+            session_updated = await openai_ws.recv()
+            call_timer.mark_session_updated()
+            print(f"  [WS] Got session.updated")
+            await browser_ws.send_str(session_updated)
+
+            if mode != 'tts':
+                print(f"  [WS] Sending response.create for greeting")
+                await openai_ws.send(json.dumps({"type": "response.create"}))
+
+            async def browser_to_openai():
+                try:
+                    async for msg in browser_ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await openai_ws.send(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.BINARY and binary_audio:
+                            await openai_ws.send(encode_audio_append(msg.data))
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+                except Exception:
+                    pass
+
+            async def openai_to_browser():
+                msg_count = 0
+                # Silence timer: detect when user doesn't respond after AI speaks
+                SILENCE_TIMEOUT_S = disconnect_timeout
+                MAX_SILENCE_PROMPTS = 2
+                silence_timer_task = None
+                silence_prompt_count = 0
+
+                async def silence_timeout():
+                    nonlocal silence_prompt_count
+                    try:
+                        await asyncio.sleep(SILENCE_TIMEOUT_S)
+                        silence_prompt_count += 1
+                        print(f"  [SILENCE] Timeout #{silence_prompt_count} after {SILENCE_TIMEOUT_S}s")
+                        if silence_prompt_count >= MAX_SILENCE_PROMPTS:
+                            hint = "[silence - caller has not responded after multiple prompts, end the call politely]"
+                        else:
+                            hint = "[silence - caller has not responded, gently ask if they are still there]"
+                        await openai_ws.send(json.dumps({
+                            "type": "conversation.item.create",
+                            "item": {
+                                "type": "message",
+                                "role": "user",
+                                "content": [{"type": "input_text", "text": hint}]
+                            }
+                        }))
+                        await openai_ws.send(json.dumps({"type": "response.create"}))
+                    except asyncio.CancelledError:
+                        pass
+
+                try:
+                    async for message in openai_ws:
+                        if browser_ws.closed:
+                            break
+                        msg_count += 1
+                        # Fast path: audio deltas go out byte-for-byte, never decoded
+                        if sniff_event_type(message) in PASSTHROUGH_EVENTS:
+                            if call_timer.awaiting_audio:
+                                call_timer.mark_audio_delta()
+                            if msg_count % 50 == 0:
+                                print(f"  [WS] OpenAI → Browser: audio chunks ({msg_count} msgs)")
+                            if binary_audio:
+                                await browser_ws.send_bytes(decode_audio_delta(message))
+                            else:
+                                await browser_ws.send_str(message)
+                            continue
+
+                        data = json.loads(message)
+                        evt_type = data.get("type", "?")
+                        print(f"  [WS] OpenAI → Browser: {evt_type}")
+                        call_timer.mark_event(evt_type, data)
+
+                        # Silence timer management
+                        if evt_type == "response.done":
+                            if silence_timer_task and not silence_timer_task.done():
+                                silence_timer_task.cancel()
+                            silence_timer_task = asyncio.create_task(silence_timeout())
+                        if evt_type in ("input_audio_buffer.speech_started", "response.created"):
+                            if silence_timer_task and not silence_timer_task.done():
+                                silence_timer_task.cancel()
+                                silence_timer_task = None
+                            if evt_type == "input_audio_buffer.speech_started":
+                                silence_prompt_count = 0
+
+                        if data.get("type") == "response.function_call_arguments.done":
+                            func_name = data.get("name", "")
+                            call_id = data.get("call_id", "")
+                            arguments_str = data.get("arguments", "{}")
+                            try:
+                                arguments = json.loads(arguments_str)
+                            except json.JSONDecodeError:
+                                arguments = {}
+
+                            started = time.perf_counter()
+                            # Handlers read the customer store — run them off the loop
+                            result = await loop.run_in_executor(
+                                None, functools.partial(handle_function_call, func_name, arguments,
+                                                        session=call_session))
+                            call_timer.time_function_call(func_name, started)
+
+                            await openai_ws.send(json.dumps({
+                                "type": "conversation.item.create",
+                                "item": {
+                                    "type": "function_call_output",
+                                    "call_id": call_id,
+                                    "output": result
+                                }
+                            }))
+                            await openai_ws.send(json.dumps({"type": "response.create"}))
+
+                        # PII scrub on transcript text before forwarding
+                        if transcript_scrubber and evt_type in TRANSCRIPT_EVENTS:
+                            scrubbed, flush = transcript_scrubber.scrub(data)
+                            if flush:
+                                await browser_ws.send_str(json.dumps(flush))
+                            if scrubbed:
+                                message = json.dumps(data)
+                                if evt_type != 'response.audio_transcript.delta':
+                                    print(f"  [PII] Scrubbed transcript in {evt_type}")
+                        elif transcript_scrubber and evt_type == 'response.done':
+                            transcript_scrubber.reset()
+
+                        await browser_ws.send_str(message)
+
+                except websockets.exceptions.ConnectionClosed:
+                    pass
+                except Exception as e:
+                    # Ends the call — say why instead of letting it go quiet
+                    print(f"  [WS] Relay error: {e!r}")
+                    if not browser_ws.closed:
+                        try:
+                            await browser_ws.send_json({
+                                "type": "error",
+                                "error": {"message": "The call hit a server error and has ended."}
+                            })
+                        except Exception:
+                            pass
+                finally:
+                    if silence_timer_task and not silence_timer_task.done():
+                        silence_timer_task.cancel()
+
+            done, pending = await asyncio.wait(
+                [
+                    asyncio.ensure_future(browser_to_openai()),
+                    asyncio.ensure_future(openai_to_browser()),
+                ],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in pending:
+                task.cancel()
+
+    except websockets.exceptions.InvalidStatus as e:
+        status_code = e.response.status_code
+        print(f"  [WS] ERROR: OpenAI returned HTTP {status_code}")
+        error_msg = "Invalid API key" if status_code == 401 else f"OpenAI connection failed (HTTP {status_code})"
+        if not browser_ws.closed:
+            await browser_ws.send_json({
+                "type": "error",
+                "error": {"message": error_msg}
+            })
+    except Exception as e:
+        if not browser_ws.closed:
+            try:
+                await browser_ws.send_json({
+                    "type": "error",
+                    "error": {"message": f"Connection error: {str(e)}"}
+                })
+            except Exception:
+                pass
+    finally:
+        call_timer.close()
+
+    return browser_ws
+
+
+# ===== App Setup =====
+
+async def close_upstream(app):
+    """Close the pooled OpenAI HTTP client and warm Realtime connections on shutdown."""
+    await openai_client.close()
+    if realtime_pool is not None:
+        await realtime_pool.close()
+
+
+def add_routes(app):
+    """Mount the IRIS API endpoints and the /ws relay on app."""
+    app.router.add_post('/api/config', handle_config)
+    app.router.add_post('/api/test-key', handle_test_key)
+    app.router.add_post('/api/summarize', handle_summarize)
+    app.router.add_post('/api/tts', handle_tts)
+    app.router.add_get('/api/tts', handle_tts)
+    app.router.add_post('/api/respond', handle_respond)
+    app.router.add_post('/api/classify', handle_classify)
+    app.router.add_post('/api/entities', handle_entities)
+    app.router.add_post('/api/intent-switch', handle_intent_switch)
+    app.router.add_post('/api/turn', handle_turn)
+    app.router.add_post('/api/batch', handle_batch)
+    app.router.add_get('/api/history', handle_get_history)
+    app.router.add_post('/api/history', handle_add_history)
+    app.router.add_delete('/api/history', handle_delete_history)
+    app.router.add_get('/api/_debug/loop', handle_debug_loop)
+    app.router.add_get('/metrics', handle_metrics)
+
+    # WebSocket relay — mounted at /ws (browser connects to /ws?scenario=...&phone=...)
+    app.router.add_get('/ws', ws_relay)
+
+
+def create_app(static_dir, port, summary_persona=IRIS_SUMMARY, blocked_prefixes=BLOCKED_PREFIXES):
+    """
+    HTTP + WebSocket app on one port: the IRIS API, /ws, and static files
+    from static_dir (index.html at /, no directory listings).
+    """
+    app = web.Application(middlewares=[block_sensitive_paths(blocked_prefixes), cors_middleware])
+    app[PORT_KEY] = port
+    app[SUMMARY_KEY] = summary_persona
+
+    add_routes(app)
+
+    index_path = os.path.join(static_dir, 'index.html')
+
+    async def handle_root(request):
+        """Serve index.html for the root URL."""
+        return web.FileResponse(index_path)
+
+    app.router.add_get('/', handle_root)
+    app.router.add_static('/', path=static_dir, show_index=False)
+
+    app.on_startup.append(loop_monitor.on_startup)
+    app.on_cleanup.append(close_upstream)
+    app.on_cleanup.append(loop_monitor.on_cleanup)
+
+    return app
+
+
+def startup_banner(name, port):
+    """Lines printed when a server starts."""
+    engine_status = "with response engine" if ENGINE_AVAILABLE else "static only"
+    llm_status = "LLM engine ready" if LLM_AVAILABLE else "LLM engine unavailable"
+    ws_status = "WebSocket relay ready" if WS_AVAILABLE else "WebSocket unavailable (pip install websockets)"
+    return [
+        f"{name} starting on port {port} ({engine_status}, {llm_status})",
+        f"  {ws_status}",
+        f"  HTTP + WebSocket on single port {port}",
+    ]
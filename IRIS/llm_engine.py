@@ -5,8 +5,12 @@ System prompts, tool definitions, and mock banking functions
 for the OpenAI Realtime API integration.
 """
 
+import functools
 import json
 
+from customer_profiles import CUSTOMER_DB
+from customer_store import CUSTOMER_DB_PATH, open_store
+
 try:
     from guardrails import check_transaction
 except ImportError:
@@ -14,184 +18,124 @@ except ImportError:
 
 # ===== Customer Database (Phone → Customer Lookup) =====
 
-CUSTOMER_DB = {
-    # ── Profile 1: South Asian Male, 37, Platinum, Boston ──
-    '+1-617-555-0142': {
-        'name': 'Varun Khator',
-        'tier': 'Platinum',
-        'email': 'varun.khator@gmail.com',
-        'phone': '+1-617-555-0142',
-        'dob': 'March 15, 1988',
-        'age': 37, 'gender': 'Male', 'ethnicity': 'South Asian',
-        'address': '142 Oak Street, Apt 7B, Boston, MA 02108',
-        'member_since': 'June 2018',
-        'joint_holder': 'Priya Khator',
-        'checking': {'last_4': '4829', 'balance': 8342.15, 'type': 'Platinum Checking'},
-        'savings': {'last_4': '9088', 'balance': 45200.00, 'type': 'High-Yield Savings'},
-        'credit_card': {'last_4': '5531', 'card_type': 'Visa Platinum', 'limit': 25000, 'balance': 6200.00, 'apr': '16.9%'},
-        'auto_loan': {'last_4': '7712', 'original': 28500.00, 'balance': 14230.67, 'rate': '4.9%', 'monthly': 485.00, 'next_due': 'March 15, 2026', 'remaining': '30 months', 'vehicle': '2023 Honda Accord'},
-        'mortgage': {'last_4': '4401', 'original': 450000, 'balance': 287000, 'rate': '5.8%', 'monthly': 2645.00, 'remaining': '22 years', 'type': '30-year fixed', 'ltv': '63.8%'},
-        'credit_score': 695, 'credit_rating': 'Good', 'payment_history': '36 months on-time',
-        'accounts': {
-            'block-card': '5531', 'loan-balance': '7712', 'dispute': '5531',
-            'restructure': '4829', 'reset-password': '5531', 'activate-card': '5531',
-            'transfer-funds': '4829', 'credit-limit': '5531', 'mortgage-rate': '4401',
-            'wire-transfer': '4829',
-        },
-        'recent_transactions': [
-            {'id': 'TXN-90421', 'date': 'Feb 18, 2026', 'merchant': 'TechVault Electronics', 'location': 'Phoenix, AZ', 'amount': 847.53, 'status': 'posted', 'card': '5531', 'suspicious': True},
-            {'id': 'TXN-90422', 'date': 'Feb 18, 2026', 'merchant': 'QuickFuel Gas Station', 'location': 'Phoenix, AZ', 'amount': 234.00, 'status': 'posted', 'card': '5531', 'suspicious': True},
-            {'id': 'TXN-90389', 'date': 'Feb 17, 2026', 'merchant': 'Whole Foods Market', 'location': 'Boston, MA', 'amount': 67.23, 'status': 'posted', 'card': '5531', 'suspicious': False},
-            {'id': 'TXN-90345', 'date': 'Feb 16, 2026', 'merchant': 'Netflix', 'location': 'Online', 'amount': 15.99, 'status': 'posted', 'card': '5531', 'suspicious': False},
-            {'id': 'TXN-90301', 'date': 'Feb 15, 2026', 'merchant': 'Shell Gas Station', 'location': 'Boston, MA', 'amount': 52.40, 'status': 'posted', 'card': '5531', 'suspicious': False},
-            {'id': 'TXN-90287', 'date': 'Feb 14, 2026', 'merchant': 'Amazon.com', 'location': 'Online', 'amount': 129.99, 'status': 'posted', 'card': '5531', 'suspicious': False},
-            {'id': 'TXN-90250', 'date': 'Feb 12, 2026', 'merchant': 'Trader Joes', 'location': 'Boston, MA', 'amount': 94.67, 'status': 'posted', 'card': '5531', 'suspicious': False},
-        ],
-    },
-    # ── Profile 2: African American Male, 63, Gold, Atlanta ──
-    '+1-404-555-0278': {
-        'name': 'Marcus Thompson',
-        'tier': 'Gold',
-        'email': 'marcus.thompson@outlook.com',
-        'phone': '+1-404-555-0278',
-        'dob': 'November 8, 1962',
-        'age': 63, 'gender': 'Male', 'ethnicity': 'African American',
-        'address': '315 Peachtree Lane, Suite 2A, Atlanta, GA 30301',
-        'member_since': 'March 2015',
-        'joint_holder': 'Denise Thompson',
-        'checking': {'last_4': '6103', 'balance': 12475.30, 'type': 'Gold Checking'},
-        'savings': {'last_4': '8254', 'balance': 68900.00, 'type': 'High-Yield Savings'},
-        'credit_card': {'last_4': '3347', 'card_type': 'Visa Gold', 'limit': 20000, 'balance': 4850.00, 'apr': '18.4%'},
-        'auto_loan': {'last_4': '9981', 'original': 35000.00, 'balance': 18442.33, 'rate': '5.2%', 'monthly': 545.00, 'next_due': 'March 10, 2026', 'remaining': '34 months', 'vehicle': '2024 Toyota Camry'},
-        'mortgage': {'last_4': '2216', 'original': 320000, 'balance': 195000, 'rate': '5.5%', 'monthly': 1817.00, 'remaining': '18 years', 'type': '30-year fixed', 'ltv': '55.7%'},
-        'credit_score': 748, 'credit_rating': 'Very Good', 'payment_history': '48 months on-time',
-        'accounts': {
-            'block-card': '3347', 'loan-balance': '9981', 'dispute': '3347',
-            'restructure': '6103', 'reset-password': '3347', 'activate-card': '3347',
-            'transfer-funds': '6103', 'credit-limit': '3347', 'mortgage-rate': '2216',
-            'wire-transfer': '6103',
-        },
-        'recent_transactions': [
-            {'id': 'TXN-71204', 'date': 'Feb 18, 2026', 'merchant': 'BestBuy Electronics', 'location': 'Dallas, TX', 'amount': 623.99, 'status': 'posted', 'card': '3347', 'suspicious': True},
-            {'id': 'TXN-71205', 'date': 'Feb 18, 2026', 'merchant': 'FastLane Auto Parts', 'location': 'Dallas, TX', 'amount': 189.50, 'status': 'posted', 'card': '3347', 'suspicious': True},
-            {'id': 'TXN-71180', 'date': 'Feb 17, 2026', 'merchant': 'Kroger', 'location': 'Atlanta, GA', 'amount': 82.44, 'status': 'posted', 'card': '3347', 'suspicious': False},
-            {'id': 'TXN-71155', 'date': 'Feb 16, 2026', 'merchant': 'Hulu', 'location': 'Online', 'amount': 17.99, 'status': 'posted', 'card': '3347', 'suspicious': False},
-            {'id': 'TXN-71130', 'date': 'Feb 15, 2026', 'merchant': 'BP Gas Station', 'location': 'Atlanta, GA', 'amount': 48.75, 'status': 'posted', 'card': '3347', 'suspicious': False},
-            {'id': 'TXN-71105', 'date': 'Feb 14, 2026', 'merchant': 'Home Depot', 'location': 'Atlanta, GA', 'amount': 156.32, 'status': 'posted', 'card': '3347', 'suspicious': False},
-            {'id': 'TXN-71080', 'date': 'Feb 12, 2026', 'merchant': 'Publix', 'location': 'Atlanta, GA', 'amount': 73.21, 'status': 'posted', 'card': '3347', 'suspicious': False},
-        ],
-    },
-    # ── Profile 3: Hispanic/Latina Female, 29, Silver, Miami ──
-    '+1-305-555-0391': {
-        'name': 'Sofia Ramirez',
-        'tier': 'Silver',
-        'email': 'sofia.ramirez@yahoo.com',
-        'phone': '+1-305-555-0391',
-        'dob': 'July 22, 1996',
-        'age': 29, 'gender': 'Female', 'ethnicity': 'Hispanic/Latina',
-        'address': '88 Coral Way, Apt 12C, Miami, FL 33145',
-        'member_since': 'January 2021',
-        'joint_holder': None,
-        'checking': {'last_4': '7741', 'balance': 3215.88, 'type': 'Silver Checking'},
-        'savings': {'last_4': '2059', 'balance': 12350.00, 'type': 'Standard Savings'},
-        'credit_card': {'last_4': '8862', 'card_type': 'Visa Silver', 'limit': 8000, 'balance': 3400.00, 'apr': '21.9%'},
-        'auto_loan': {'last_4': '1537', 'original': 32000.00, 'balance': 22100.45, 'rate': '6.1%', 'monthly': 520.00, 'next_due': 'March 5, 2026', 'remaining': '42 months', 'vehicle': '2025 Hyundai Tucson'},
-        'mortgage': {'last_4': '6694', 'original': 385000, 'balance': 342000, 'rate': '6.2%', 'monthly': 2370.00, 'remaining': '28 years', 'type': '30-year fixed', 'ltv': '88.8%'},
-        'credit_score': 782, 'credit_rating': 'Excellent', 'payment_history': '18 months on-time',
-        'accounts': {
-            'block-card': '8862', 'loan-balance': '1537', 'dispute': '8862',
-            'restructure': '7741', 'reset-password': '8862', 'activate-card': '8862',
-            'transfer-funds': '7741', 'credit-limit': '8862', 'mortgage-rate': '6694',
-            'wire-transfer': '7741',
-        },
-        'recent_transactions': [
-            {'id': 'TXN-55301', 'date': 'Feb 18, 2026', 'merchant': 'MegaMart Electronics', 'location': 'Houston, TX', 'amount': 512.88, 'status': 'posted', 'card': '8862', 'suspicious': True},
-            {'id': 'TXN-55302', 'date': 'Feb 18, 2026', 'merchant': 'QuickStop Fuel', 'location': 'Houston, TX', 'amount': 147.00, 'status': 'posted', 'card': '8862', 'suspicious': True},
-            {'id': 'TXN-55280', 'date': 'Feb 17, 2026', 'merchant': 'Sedanos Supermarket', 'location': 'Miami, FL', 'amount': 54.67, 'status': 'posted', 'card': '8862', 'suspicious': False},
-            {'id': 'TXN-55260', 'date': 'Feb 16, 2026', 'merchant': 'Spotify', 'location': 'Online', 'amount': 10.99, 'status': 'posted', 'card': '8862', 'suspicious': False},
-            {'id': 'TXN-55240', 'date': 'Feb 15, 2026', 'merchant': 'Chevron', 'location': 'Miami, FL', 'amount': 41.30, 'status': 'posted', 'card': '8862', 'suspicious': False},
-            {'id': 'TXN-55220', 'date': 'Feb 14, 2026', 'merchant': 'Target', 'location': 'Miami, FL', 'amount': 87.45, 'status': 'posted', 'card': '8862', 'suspicious': False},
-            {'id': 'TXN-55200', 'date': 'Feb 12, 2026', 'merchant': 'Publix', 'location': 'Miami, FL', 'amount': 63.22, 'status': 'posted', 'card': '8862', 'suspicious': False},
-        ],
-    },
-    # ── Profile 4: East Asian Female, 46, Platinum, San Francisco ──
-    '+1-415-555-0534': {
-        'name': 'Emily Chen',
-        'tier': 'Platinum',
-        'email': 'emily.chen@gmail.com',
-        'phone': '+1-415-555-0534',
-        'dob': 'February 3, 1980',
-        'age': 46, 'gender': 'Female', 'ethnicity': 'East Asian',
-        'address': '2201 Pacific Heights Blvd, San Francisco, CA 94115',
-        'member_since': 'September 2016',
-        'joint_holder': 'David Chen',
-        'checking': {'last_4': '3285', 'balance': 24890.50, 'type': 'Platinum Checking'},
-        'savings': {'last_4': '7463', 'balance': 128500.00, 'type': 'High-Yield Savings'},
-        'credit_card': {'last_4': '4178', 'card_type': 'Visa Platinum', 'limit': 35000, 'balance': 8750.00, 'apr': '15.9%'},
-        'auto_loan': {'last_4': '5624', 'original': 52000.00, 'balance': 9810.22, 'rate': '3.9%', 'monthly': 780.00, 'next_due': 'March 20, 2026', 'remaining': '13 months', 'vehicle': '2022 Tesla Model 3'},
-        'mortgage': {'last_4': '8937', 'original': 950000, 'balance': 625000, 'rate': '5.4%', 'monthly': 5330.00, 'remaining': '24 years', 'type': '30-year fixed', 'ltv': '65.8%'},
-        'credit_score': 812, 'credit_rating': 'Exceptional', 'payment_history': '60 months on-time',
-        'accounts': {
-            'block-card': '4178', 'loan-balance': '5624', 'dispute': '4178',
-            'restructure': '3285', 'reset-password': '4178', 'activate-card': '4178',
-            'transfer-funds': '3285', 'credit-limit': '4178', 'mortgage-rate': '8937',
-            'wire-transfer': '3285',
-        },
-        'recent_transactions': [
-            {'id': 'TXN-82710', 'date': 'Feb 18, 2026', 'merchant': 'Newegg Electronics', 'location': 'Las Vegas, NV', 'amount': 1124.99, 'status': 'posted', 'card': '4178', 'suspicious': True},
-            {'id': 'TXN-82711', 'date': 'Feb 18, 2026', 'merchant': 'RapidFuel Station', 'location': 'Las Vegas, NV', 'amount': 198.00, 'status': 'posted', 'card': '4178', 'suspicious': True},
-            {'id': 'TXN-82690', 'date': 'Feb 17, 2026', 'merchant': 'Whole Foods Market', 'location': 'San Francisco, CA', 'amount': 112.88, 'status': 'posted', 'card': '4178', 'suspicious': False},
-            {'id': 'TXN-82670', 'date': 'Feb 16, 2026', 'merchant': 'Apple One', 'location': 'Online', 'amount': 22.95, 'status': 'posted', 'card': '4178', 'suspicious': False},
-            {'id': 'TXN-82650', 'date': 'Feb 15, 2026', 'merchant': 'Tesla Supercharger', 'location': 'San Francisco, CA', 'amount': 18.40, 'status': 'posted', 'card': '4178', 'suspicious': False},
-            {'id': 'TXN-82630', 'date': 'Feb 14, 2026', 'merchant': 'Nordstrom', 'location': 'San Francisco, CA', 'amount': 245.00, 'status': 'posted', 'card': '4178', 'suspicious': False},
-            {'id': 'TXN-82610', 'date': 'Feb 12, 2026', 'merchant': 'Trader Joes', 'location': 'San Francisco, CA', 'amount': 78.33, 'status': 'posted', 'card': '4178', 'suspicious': False},
-        ],
-    },
-    # ── Profile 5: Caucasian Male, 34, Gold, Chicago ──
-    '+1-312-555-0687': {
-        'name': "James O'Brien",
-        'tier': 'Gold',
-        'email': 'james.obrien@protonmail.com',
-        'phone': '+1-312-555-0687',
-        'dob': 'September 14, 1991',
-        'age': 34, 'gender': 'Male', 'ethnicity': 'Caucasian',
-        'address': '450 North Michigan Ave, Unit 18D, Chicago, IL 60611',
-        'member_since': 'August 2019',
-        'joint_holder': None,
-        'checking': {'last_4': '5498', 'balance': 6780.25, 'type': 'Gold Checking'},
-        'savings': {'last_4': '1376', 'balance': 31200.00, 'type': 'High-Yield Savings'},
-        'credit_card': {'last_4': '2643', 'card_type': 'Visa Gold', 'limit': 18000, 'balance': 5100.00, 'apr': '17.9%'},
-        'auto_loan': {'last_4': '8815', 'original': 42000.00, 'balance': 11350.90, 'rate': '5.5%', 'monthly': 625.00, 'next_due': 'March 1, 2026', 'remaining': '18 months', 'vehicle': '2023 Ford Bronco'},
-        'mortgage': {'last_4': '3072', 'original': 520000, 'balance': 410000, 'rate': '5.9%', 'monthly': 3085.00, 'remaining': '26 years', 'type': '30-year fixed', 'ltv': '78.8%'},
-        'credit_score': 731, 'credit_rating': 'Very Good', 'payment_history': '30 months on-time',
-        'accounts': {
-            'block-card': '2643', 'loan-balance': '8815', 'dispute': '2643',
-            'restructure': '5498', 'reset-password': '2643', 'activate-card': '2643',
-            'transfer-funds': '5498', 'credit-limit': '2643', 'mortgage-rate': '3072',
-            'wire-transfer': '5498',
-        },
-        'recent_transactions': [
-            {'id': 'TXN-63401', 'date': 'Feb 18, 2026', 'merchant': 'Micro Center', 'location': 'Detroit, MI', 'amount': 732.45, 'status': 'posted', 'card': '2643', 'suspicious': True},
-            {'id': 'TXN-63402', 'date': 'Feb 18, 2026', 'merchant': 'SpeedWay Fuel', 'location': 'Detroit, MI', 'amount': 167.00, 'status': 'posted', 'card': '2643', 'suspicious': True},
-            {'id': 'TXN-63380', 'date': 'Feb 17, 2026', 'merchant': 'Jewel-Osco', 'location': 'Chicago, IL', 'amount': 91.56, 'status': 'posted', 'card': '2643', 'suspicious': False},
-            {'id': 'TXN-63360', 'date': 'Feb 16, 2026', 'merchant': 'YouTube Premium', 'location': 'Online', 'amount': 13.99, 'status': 'posted', 'card': '2643', 'suspicious': False},
-            {'id': 'TXN-63340', 'date': 'Feb 15, 2026', 'merchant': 'Marathon Gas', 'location': 'Chicago, IL', 'amount': 55.20, 'status': 'posted', 'card': '2643', 'suspicious': False},
-            {'id': 'TXN-63320', 'date': 'Feb 14, 2026', 'merchant': 'REI Co-op', 'location': 'Chicago, IL', 'amount': 189.99, 'status': 'posted', 'card': '2643', 'suspicious': False},
-            {'id': 'TXN-63300', 'date': 'Feb 12, 2026', 'merchant': 'Mariano\'s', 'location': 'Chicago, IL', 'amount': 68.44, 'status': 'posted', 'card': '2643', 'suspicious': False},
-        ],
-    },
-}
-
-# Active customer for the current session (set dynamically per call)
-_CUST = None
-
-# Active scenario for the current session (set by handle_function_call)
-_active_scenario = None
+# Where callers are looked up: the demo profiles (customer_profiles.CUSTOMER_DB)
+# or a SQLite file (IRIS_CUSTOMER_DB)
+customer_store = open_store(CUSTOMER_DB_PATH, CUSTOMER_DB)
+
+
+# ===== Customer Index =====
+
+# (account key, record field holding its display name, default name) — in the
+# order the old per-call type map was built, so a shared last-4 resolves the same
+_ACCOUNT_TYPES = (
+    ('checking', 'type', 'Checking'),
+    ('savings', 'type', 'Savings'),
+    ('credit_card', 'card_type', 'Credit Card'),
+    ('auto_loan', None, 'Auto Loan'),
+    ('mortgage', None, 'Mortgage'),
+)
+
+
+class CustomerIndex:
+    """
+    Secondary indexes over one customer record, built once and reused by every
+    tool call on the call, so validation and lookups stay O(1) however many
+    accounts and transactions a profile carries.
+    """
+
+    __slots__ = ('customer', 'type_for_last4', 'last4_for_type', 'all_last4', 'transactions')
+
+    def __init__(self, customer):
+        self.customer = customer
+        self.type_for_last4 = {}   # last-4 -> display name ("Visa Platinum", "Auto Loan")
+        self.last4_for_type = {}   # account key ('credit_card') -> last-4
+        for key, name_field, default_name in _ACCOUNT_TYPES:
+            account = customer.get(key)
+            if not account:
+                continue
+            last4 = account['last_4']
+            self.last4_for_type[key] = last4
+            self.type_for_last4[last4] = account.get(name_field, default_name) if name_field else default_name
+        self.all_last4 = frozenset(self.type_for_last4)
+        self.transactions = {}     # txn id -> transaction (first wins, as the old scan did)
+        for txn in customer.get('recent_transactions', ()):
+            self.transactions.setdefault(txn['id'], txn)
+
+
+# Distinct callers whose CustomerIndex is kept between calls
+CUSTOMER_INDEX_CACHE_SIZE = 1024
+
+
+def customer_index(phone):
+    """
+    CustomerIndex for the stored record on phone (None if unknown), built once
+    per caller and shared by every call they make. Keyed on the store's
+    version(), so reloading the customer file rebuilds it on the next call.
+    """
+    return _cached_customer_index(phone, customer_store.version())
+
+
+@functools.lru_cache(maxsize=CUSTOMER_INDEX_CACHE_SIZE)
+def _cached_customer_index(phone, store_version):
+    customer = customer_store.get(phone)
+    return CustomerIndex(customer) if customer else None
+
+
+# ===== Per-Call Session State =====
+
+class CallSession:
+    """
+    State for one live call, owned by the relay connection that serves it.
+
+    Carries the caller's customer record, the active scenario, verification
+    status and the results of tool calls made so far. Every mock handler reads
+    from the session it is given, so concurrent calls never share state.
+    `identified` is False while the record is only the demo-default stand-in
+    for a caller whose phone isn't on file.
+    """
+
+    def __init__(self, scenario_id=None, phone=None, customer=None):
+        self.scenario_id = scenario_id
+        self.phone = phone
+        self.identified = True
+        if customer is None:
+            # Unknown/missing phone falls back to the first profile (demo default)
+            index = customer_index(phone) if isinstance(phone, str) else None
+            if index is None:
+                self.identified = False
+                default = customer_store.default()
+                index = customer_index(default['phone']) if default else None
+            customer = index.customer if index else None
+        else:
+            index = CustomerIndex(customer)
+        self.customer = customer
+        self.index = index
+        self.verified = False
+        self.verified_last_4 = None
+        self.results = []  # [(func_name, result_dict), ...] in call order
+
+    def identify(self, phone):
+        """Switch the call to the customer on file for phone; False if there is none."""
+        index = customer_index(phone)
+        if index is None:
+            return False
+        self.phone = phone
+        self.customer = index.customer
+        self.index = index
+        self.identified = True
+        return True
+
+    def record(self, name, result):
+        """Remember a tool result for the rest of the call."""
+        self.results.append((name, result))
+        if name == 'verify_identity' and result.get('verified'):
+            self.verified = True
+            self.verified_last_4 = result.get('card_last_4')
 
 
 def lookup_customer(phone, scenario_id=None):
     """Look up customer by phone number. Returns context dict or None."""
-    customer = CUSTOMER_DB.get(phone)
+    customer = customer_store.get(phone) if phone else None
     if not customer:
         return None
     account = customer['accounts'].get(scenario_id, '0000') if scenario_id else '0000'
@@ -831,13 +775,6 @@ END_CALL_TOOL = {
 
 def build_session_config(scenario_id=None, customer_context=None, phone=None, silence_ms=1000):
     """Build the session.update config for OpenAI Realtime API."""
-    global _active_scenario, _CUST
-    _active_scenario = scenario_id
-    if phone and phone in CUSTOMER_DB:
-        _CUST = CUSTOMER_DB[phone]
-    elif not _CUST:
-        _CUST = next(iter(CUSTOMER_DB.values()))
-
     # Build caller context from phone lookup
     caller_info = ""
     if customer_context:
@@ -907,15 +844,59 @@ def build_tts_session_config():
     }
 
 
+# ===== Serialized session.update Cache =====
+
+# Distinct (scenario, caller, silence, mode) payloads kept serialized
+SESSION_PAYLOAD_CACHE_SIZE = 512
+
+
+def session_update_payload(scenario_id=None, phone=None, silence_ms=1000, mode=None):
+    """
+    Serialized session.update frame for a call, ready to send upstream as-is.
+
+    Memoized per (scenario_id, phone, silence_ms, mode) and the customer
+    store's version(), so payloads built from a since-reloaded customer file
+    are never served. Unknown scenarios and phones are folded into the
+    freeform / unidentified-caller entries (they build the same payload), so
+    arbitrary query strings can't grow the cache. Prompts and tools are
+    module constants, fixed for the life of the process; only code that
+    edits them in place needs invalidate_session_cache().
+    """
+    if mode == 'tts':
+        return _cached_session_payload(None, None, None, 'tts', None)
+    if scenario_id not in SCENARIO_PROMPTS:
+        scenario_id = None
+    if phone not in customer_store:
+        phone = None
+    return _cached_session_payload(scenario_id, phone, silence_ms, None, customer_store.version())
+
+
+@functools.lru_cache(maxsize=SESSION_PAYLOAD_CACHE_SIZE)
+def _cached_session_payload(scenario_id, phone, silence_ms, mode, store_version):
+    if mode == 'tts':
+        return json.dumps(build_tts_session_config())
+    customer_context = lookup_customer(phone, scenario_id) if phone else None
+    return json.dumps(build_session_config(scenario_id, customer_context=customer_context,
+                                           phone=phone, silence_ms=silence_ms))
+
+
+def invalidate_session_cache():
+    """Drop every memoized session.update payload and customer index (customer data or prompts changed)."""
+    _cached_session_payload.cache_clear()
+    _cached_customer_index.cache_clear()
+
+
 # ===== Mock Function Call Handlers =====
 
-def handle_function_call(name, arguments, scenario_id=None, phone=None):
-    """Return mock banking data for tool calls."""
-    global _active_scenario, _CUST
-    if scenario_id:
-        _active_scenario = scenario_id
-    if phone and phone in CUSTOMER_DB:
-        _CUST = CUSTOMER_DB[phone]
+def handle_function_call(name, arguments, scenario_id=None, phone=None, session=None):
+    """
+    Return mock banking data for tool calls.
+
+    `session` is the caller's CallSession; relays should always pass their own.
+    Without one, a throwaway session is built from scenario_id/phone.
+    """
+    if session is None:
+        session = CallSession(scenario_id, phone)
 
     if isinstance(arguments, str):
         try:
@@ -925,7 +906,7 @@ def handle_function_call(name, arguments, scenario_id=None, phone=None):
 
     # Guardrail check — enforce transaction limits before executing handler
     if check_transaction:
-        customer = CUSTOMER_DB.get(phone) if phone else None
+        customer = customer_store.get(session.phone) if session.phone else None
         guardrail_result = check_transaction(name, arguments, customer)
         if guardrail_result:
             print(f"  [GUARDRAIL] Blocked {name}: {guardrail_result.get('error', '')}")
@@ -952,7 +933,7 @@ def handle_function_call(name, arguments, scenario_id=None, phone=None):
         "check_rates": _check_rates,
         "verify_recipient": _verify_recipient,
         "initiate_wire": _initiate_wire,
-        "end_call": lambda args: {
+        "end_call": lambda session, args: {
             "status": "call_ended",
             "reason": args.get("reason", "completed"),
             "intent": args.get("intent", ""),
@@ -963,12 +944,22 @@ def handle_function_call(name, arguments, scenario_id=None, phone=None):
 
     handler = handlers.get(name)
     if handler:
-        return json.dumps(handler(arguments))
+        if session.customer is None and name not in _CUSTOMERLESS_FUNCTIONS:
+            result = {"success": False, "error": "Customer not found. No account is on file for this caller, so this request can't be completed. Offer to transfer the caller to an agent."}
+        else:
+            result = handler(session, arguments)
+        session.record(name, result)
+        return json.dumps(result)
     return json.dumps({"error": f"Unknown function: {name}"})
 
 
 # --- Helpers ---
 
+# Handlers that never read the customer record (safe when no profile is loaded)
+_CUSTOMERLESS_FUNCTIONS = frozenset({
+    'calculate_payoff', 'unlock_account', 'enable_contactless', 'verify_recipient', 'end_call',
+})
+
 # Function → account type mapping: maps each banking function to the account
 # type it operates on.  Used to dynamically resolve the expected last-4 digits
 # from the active customer's data (instead of hardcoding digits).
@@ -990,73 +981,67 @@ _FUNC_TO_ACCOUNT_TYPE = {
 }
 
 
-def _func_expected_account(func_name):
-    """Return the expected last-4 digits for a function based on the active customer."""
-    if not _CUST or func_name == 'verify_identity':
+def _func_expected_account(session, func_name):
+    """Return the expected last-4 digits for a function based on the session's customer."""
+    if not session.customer or func_name == 'verify_identity':
         return None
     acct_type = _FUNC_TO_ACCOUNT_TYPE.get(func_name)
-    if acct_type and acct_type in _CUST:
-        return _CUST[acct_type]['last_4']
+    if acct_type:
+        return session.index.last4_for_type.get(acct_type)
     return None
 
 
-def _expected_account(scenario_id=None, func_name=None):
-    """Return the expected last-4 digits for the active scenario or function."""
-    if not _CUST:
+def _expected_account(session, scenario_id=None, func_name=None):
+    """Return the expected last-4 digits for the session's scenario or function."""
+    if not session.customer:
         return None
     # 1. Try scenario-based lookup first
-    sid = scenario_id or _active_scenario
+    sid = scenario_id or session.scenario_id
     if sid:
-        expected = _CUST['accounts'].get(sid)
+        expected = session.customer['accounts'].get(sid)
         if expected:
             return expected
     # 2. Fall back to function-based lookup (for freeform mode)
     if func_name:
-        return _func_expected_account(func_name)
+        return _func_expected_account(session, func_name)
     return None
 
 
-def _account_type_for_last4(last4):
+def _account_type_for_last4(session, last4):
     """Return a human-readable account type name for a last-4."""
-    if not last4 or not _CUST:
+    if not last4 or not session.customer:
         return "account"
-    type_map = {
-        _CUST['checking']['last_4']: _CUST['checking'].get('type', 'Checking'),
-        _CUST['savings']['last_4']: _CUST['savings'].get('type', 'Savings'),
-        _CUST['credit_card']['last_4']: _CUST['credit_card'].get('card_type', 'Credit Card'),
-        _CUST['auto_loan']['last_4']: 'Auto Loan',
-        _CUST['mortgage']['last_4']: 'Mortgage',
-    }
-    return type_map.get(last4, "account")
+    return session.index.type_for_last4.get(last4, "account")
 
 
-def _validate_card(last_4, scenario_id=None, func_name=None):
+def _validate_card(session, last_4, scenario_id=None, func_name=None):
     """Validate card/account last-4 against the expected account for the scenario or function.
     Returns (valid, error_msg) tuple."""
-    if not _CUST:
+    cust = session.customer
+    if not cust:
         return True, None  # no customer loaded — skip validation
-    expected = _expected_account(scenario_id, func_name=func_name)
+    last_4 = str(last_4)  # model-supplied; a list/number must not break the set lookup
+    expected = _expected_account(session, scenario_id, func_name=func_name)
     if expected and last_4 != expected:
-        acct_type = _account_type_for_last4(expected)
+        acct_type = _account_type_for_last4(session, expected)
         return False, f"Card ending in {last_4} does not match the {acct_type} (****{expected}) on file for this request. Ask the caller to provide the correct last 4 digits."
     # Fallback: check against all known accounts (no scenario AND no function mapping)
-    all_known = {
-        _CUST['checking']['last_4'],
-        _CUST['savings']['last_4'],
-        _CUST['credit_card']['last_4'],
-        _CUST['auto_loan']['last_4'],
-        _CUST['mortgage']['last_4'],
-    }
-    if last_4 not in all_known:
+    if last_4 not in session.index.all_last4:
         return False, f"Card ending in {last_4} does not match any account on file. Please verify the number with the caller."
     return True, None
 
 
 # --- Individual mock handlers ---
 
-def _verify_identity(args):
+def _verify_identity(session, args):
     card_last_4 = args.get("card_last_4", "")
     purpose = args.get("purpose", "general")
+    if not session.identified:
+        # Caller's phone isn't on file: a last-4 held by exactly one customer identifies them
+        phones = customer_store.phones_for_last4(str(card_last_4))
+        if len(phones) == 1:
+            session.identify(phones[0])
+    cust = session.customer
 
     # Map purpose to the corresponding action function for account validation
     _PURPOSE_TO_FUNC = {
@@ -1074,15 +1059,15 @@ def _verify_identity(args):
     func_name = _PURPOSE_TO_FUNC.get(purpose)
 
     # Validate: use scenario first, then purpose-based function mapping
-    valid, error = _validate_card(card_last_4, func_name=func_name)
+    valid, error = _validate_card(session, card_last_4, func_name=func_name)
     if valid:
-        acct_type = _account_type_for_last4(card_last_4)
+        acct_type = _account_type_for_last4(session, card_last_4)
         return {
             "verified": True,
             "card_last_4": card_last_4,
             "account_type": acct_type,
-            "account_holder": _CUST['name'],
-            "tier": _CUST['tier']
+            "account_holder": cust['name'],
+            "tier": cust['tier']
         }
     else:
         return {
@@ -1090,10 +1075,11 @@ def _verify_identity(args):
             "error": error
         }
 
-def _block_card(args):
-    cc = _CUST['credit_card']
+def _block_card(session, args):
+    cust = session.customer
+    cc = cust['credit_card']
     card_last_4 = args.get("card_last_4", "")
-    valid, error = _validate_card(card_last_4, func_name='block_card')
+    valid, error = _validate_card(session, card_last_4, func_name='block_card')
     if not valid:
         return {"success": False, "error": error}
     return {
@@ -1106,9 +1092,10 @@ def _block_card(args):
         "replacement_eligible": True
     }
 
-def _order_replacement(args):
+def _order_replacement(session, args):
+    cust = session.customer
     card_last_4 = args.get("card_last_4", "")
-    valid, error = _validate_card(card_last_4, func_name='order_replacement')
+    valid, error = _validate_card(session, card_last_4, func_name='order_replacement')
     if not valid:
         return {"success": False, "error": error}
     expedited = args.get("expedited", True)
@@ -1117,12 +1104,13 @@ def _order_replacement(args):
         "old_card": card_last_4,
         "delivery_method": "Express" if expedited else "Standard",
         "estimated_delivery": "2-3 business days" if expedited else "7-10 business days",
-        "shipping_address": _CUST['address'],
+        "shipping_address": cust['address'],
         "new_card_will_end_in": "Different last 4 digits (assigned at production)"
     }
 
-def _check_loan_balance(args):
-    loan = _CUST['auto_loan']
+def _check_loan_balance(session, args):
+    cust = session.customer
+    loan = cust['auto_loan']
     return {
         "loan_type": "Auto Loan",
         "vehicle": loan['vehicle'],
@@ -1136,7 +1124,7 @@ def _check_loan_balance(args):
         "payment_status": "Current - no missed payments"
     }
 
-def _calculate_payoff(args):
+def _calculate_payoff(session, args):
     return {
         "payoff_amount": 14188.42,
         "valid_through": "February 28, 2026",
@@ -1145,10 +1133,11 @@ def _calculate_payoff(args):
         "savings_vs_full_term": 1842.30
     }
 
-def _get_transaction_details(args):
-    txns = _CUST['recent_transactions']
+def _get_transaction_details(session, args):
+    cust = session.customer
+    txns = cust['recent_transactions']
     return {
-        "account_last_4": _CUST['credit_card']['last_4'],
+        "account_last_4": cust['credit_card']['last_4'],
         "recent_transactions": [
             {"id": t['id'], "date": t['date'], "merchant": t['merchant'],
              "location": t['location'], "amount": t['amount'], "status": t['status']}
@@ -1156,11 +1145,17 @@ def _get_transaction_details(args):
         ]
     }
 
-def _file_dispute(args):
-    txn_id = args.get("transaction_id", "TXN-90421")
+def _file_dispute(session, args):
+    cust = session.customer
+    txn_id = str(args.get("transaction_id", "TXN-90421"))
     reason = args.get("reason", "unauthorized")
     # Find the matching transaction for the provisional credit amount
-    txn = next((t for t in _CUST['recent_transactions'] if t['id'] == txn_id), None)
+    txn = session.index.transactions.get(txn_id)
+    if txn is None and "transaction_id" in args:
+        # Another customer's transaction ID must not be disputed on this call
+        owner = customer_store.transaction(txn_id)
+        if owner and owner[0] != cust.get('phone'):
+            return {"success": False, "error": f"Transaction {txn_id} is not on this customer's accounts. Ask the caller to confirm the transaction ID."}
     credit_amount = txn['amount'] if txn else 847.53
     return {
         "success": True,
@@ -1172,28 +1167,30 @@ def _file_dispute(args):
         "provisional_credit": True,
         "provisional_credit_amount": credit_amount,
         "investigation_timeline": "10-15 business days",
-        "next_steps": f"Provisional credit of ${credit_amount:.2f} applied. Customer will receive updates at {_CUST['email']}"
+        "next_steps": f"Provisional credit of ${credit_amount:.2f} applied. Customer will receive updates at {cust['email']}"
     }
 
-def _get_account_details(args):
-    chk = _CUST['checking']
-    sav = _CUST['savings']
-    mtg = _CUST['mortgage']
-    cc = _CUST['credit_card']
-    joint = _CUST['joint_holder']
+def _get_account_details(session, args):
+    cust = session.customer
+    chk = cust['checking']
+    sav = cust['savings']
+    mtg = cust['mortgage']
+    cc = cust['credit_card']
+    joint = cust['joint_holder']
     return {
-        "customer": _CUST['name'],
-        "member_since": _CUST['member_since'],
+        "customer": cust['name'],
+        "member_since": cust['member_since'],
         "accounts": [
             {"type": "Joint Checking", "last_4": chk['last_4'], "balance": chk['balance'], "joint_holder": joint},
             {"type": "Joint Savings", "last_4": sav['last_4'], "balance": sav['balance'], "joint_holder": joint},
-            {"type": "Joint Mortgage", "last_4": mtg['last_4'], "balance": mtg['balance'], "rate": mtg['rate'], "property": _CUST['address'], "joint_holder": joint},
+            {"type": "Joint Mortgage", "last_4": mtg['last_4'], "balance": mtg['balance'], "rate": mtg['rate'], "property": cust['address'], "joint_holder": joint},
             {"type": "Joint Credit Card", "last_4": cc['last_4'], "balance": cc['balance'], "limit": cc['limit'], "joint_holder": joint},
         ]
     }
 
-def _send_reset_link(args):
-    email = args.get("email", _CUST['email'])
+def _send_reset_link(session, args):
+    cust = session.customer
+    email = args.get("email", cust['email'])
     return {
         "success": True,
         "email_sent_to": email,
@@ -1201,7 +1198,7 @@ def _send_reset_link(args):
         "password_requirements": "At least 12 characters, mix of letters, numbers, and symbols"
     }
 
-def _unlock_account(args):
+def _unlock_account(session, args):
     return {
         "success": True,
         "account_status": "unlocked",
@@ -1209,10 +1206,11 @@ def _unlock_account(args):
         "previous_lock_reason": "Multiple failed login attempts"
     }
 
-def _activate_card(args):
-    cc = _CUST['credit_card']
+def _activate_card(session, args):
+    cust = session.customer
+    cc = cust['credit_card']
     card_last_4 = args.get("card_last_4", "")
-    valid, error = _validate_card(card_last_4, func_name='activate_card')
+    valid, error = _validate_card(session, card_last_4, func_name='activate_card')
     if not valid:
         return {"success": False, "error": error}
     return {
@@ -1226,9 +1224,9 @@ def _activate_card(args):
         "old_card_deactivated": True
     }
 
-def _enable_contactless(args):
+def _enable_contactless(session, args):
     card_last_4 = args.get("card_last_4", "")
-    valid, error = _validate_card(card_last_4, func_name='enable_contactless')
+    valid, error = _validate_card(session, card_last_4, func_name='enable_contactless')
     if not valid:
         return {"success": False, "error": error}
     return {
@@ -1238,10 +1236,11 @@ def _enable_contactless(args):
         "tap_to_pay": True
     }
 
-def _check_balance(args):
+def _check_balance(session, args):
+    cust = session.customer
     account_type = args.get("account_type", "all")
-    chk = _CUST['checking']
-    sav = _CUST['savings']
+    chk = cust['checking']
+    sav = cust['savings']
     accounts = {
         "checking": {"type": chk['type'], "last_4": chk['last_4'], "balance": chk['balance']},
         "savings": {"type": sav['type'], "last_4": sav['last_4'], "balance": sav['balance']},
@@ -1250,12 +1249,13 @@ def _check_balance(args):
         return {"accounts": list(accounts.values())}
     return accounts.get(account_type, {"error": "Account not found"})
 
-def _transfer_funds(args):
+def _transfer_funds(session, args):
+    cust = session.customer
     amount = args.get("amount", 0)
     from_acct = args.get("from_account", "checking")
     to_acct = args.get("to_account", "savings")
-    chk_bal = _CUST['checking']['balance']
-    sav_bal = _CUST['savings']['balance']
+    chk_bal = cust['checking']['balance']
+    sav_bal = cust['savings']['balance']
     source_bal = chk_bal if from_acct == "checking" else sav_bal
     if amount <= 0:
         return {"success": False, "error": "Transfer amount must be greater than zero."}
@@ -1272,22 +1272,24 @@ def _transfer_funds(args):
         "funds_available": "immediately"
     }
 
-def _check_credit_score(args):
-    cc = _CUST['credit_card']
+def _check_credit_score(session, args):
+    cust = session.customer
+    cc = cust['credit_card']
     utilization = round((cc['balance'] / cc['limit']) * 100)
     return {
-        "credit_score": _CUST['credit_score'],
+        "credit_score": cust['credit_score'],
         "score_range": "300-850",
-        "rating": _CUST['credit_rating'],
-        "payment_history": _CUST['payment_history'],
+        "rating": cust['credit_rating'],
+        "payment_history": cust['payment_history'],
         "credit_utilization": f"{utilization}%",
         "current_limit": cc['limit'],
         "current_balance": cc['balance'],
         "average_monthly_spend": 6200
     }
 
-def _request_limit_increase(args):
-    cc = _CUST['credit_card']
+def _request_limit_increase(session, args):
+    cust = session.customer
+    cc = cust['credit_card']
     current = cc['limit']
     requested = args.get("requested_limit", 35000)
     increase = requested - current
@@ -1296,17 +1298,18 @@ def _request_limit_increase(args):
         "current_limit": current,
         "requested_limit": requested,
         "increase_amount": increase,
-        "credit_score": _CUST['credit_score'],
+        "credit_score": cust['credit_score'],
         "requires_underwriting": increase > 5000,
         "status": "Pending underwriting review" if increase > 5000 else "Auto-approved",
         "estimated_decision": "Within 24 hours"
     }
 
-def _get_mortgage_details(args):
-    mtg = _CUST['mortgage']
+def _get_mortgage_details(session, args):
+    cust = session.customer
+    mtg = cust['mortgage']
     return {
         "account_last_4": mtg['last_4'],
-        "property_address": _CUST['address'],
+        "property_address": cust['address'],
         "original_amount": mtg['original'],
         "current_balance": mtg['balance'],
         "current_rate": mtg['rate'] + " fixed",
@@ -1316,8 +1319,9 @@ def _get_mortgage_details(args):
         "ltv_ratio": mtg['ltv']
     }
 
-def _check_rates(args):
-    mtg = _CUST['mortgage']
+def _check_rates(session, args):
+    cust = session.customer
+    mtg = cust['mortgage']
     return {
         "as_of": "February 20, 2026",
         "rates": {
@@ -1333,7 +1337,7 @@ def _check_rates(args):
         }
     }
 
-def _verify_recipient(args):
+def _verify_recipient(session, args):
     name = args.get("recipient_name", "Unknown")
     country = args.get("country", "Unknown")
     return {
@@ -1345,12 +1349,13 @@ def _verify_recipient(args):
         "estimated_delivery": "1-3 business days"
     }
 
-def _initiate_wire(args):
+def _initiate_wire(session, args):
+    cust = session.customer
     amount = args.get("amount", 0)
     recipient = args.get("recipient_name", "Unknown")
     country = args.get("country", "Unknown")
     currency = args.get("currency", "USD")
-    chk = _CUST['checking']
+    chk = cust['checking']
     return {
         "wire_id": "WIR-2026-11234",
         "status": "Pending compliance review",
@@ -0,0 +1,532 @@
+"""
+IRIS Relay Load Generator
+=========================
+How many simultaneous calls can one serve.py carry before audio latency
+degrades? Runs N synthetic browser calls against /ws at once, for each N
+in a list, and writes a JSON report that can be diffed between releases.
+
+Each synthetic caller behaves like index.html on the iris-pcm16
+transport: it streams mic audio as 20 ms PCM16 frames at real-time pace
+(a spoken utterance, then digital silence until the bot has answered),
+consumes the audio deltas and lets the relay execute the tool calls the
+upstream asks for. When the upstream ends the call (end_call), the
+caller hangs up and dials again, so N calls stay up for the whole step.
+
+By default it starts its own stack: fake_realtime.py (with --stamp) as the
+upstream and the root serve.py pointed at it, both as subprocesses, so
+the server's CPU and RSS can be read from /proc. Per step it reports:
+
+  - relay-added latency: receive time minus the upstream's "sent_at"
+    stamp, reported separately for audio deltas (relayAddedAudio — the
+    stamp rides in the PCM, so both transports measure it) and for JSON
+    control events (relayAddedEvents)
+  - turn latency: speech_stopped -> first audio at the caller
+  - frames/sec sent and received, turns and tool calls completed
+  - server CPU % and RSS, total and per call; the loadgen's own CPU and
+    the fake upstream's (if either is near 100%, it, not the server, is
+    the bottleneck)
+  - the server's own /metrics and /api/_debug/loop summaries (cumulative
+    since the server started)
+
+    python loadgen.py --calls 1,10,25,50 --duration 30 --out report.json
+    python loadgen.py --target http://127.0.0.1:8000 --server-pid 1234   # existing server
+"""
+
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+from fake_realtime import (
+    BYTES_PER_MS, CHUNK_MS, FIRST_AUDIO_MS, RESPONSE_AUDIO_MS, SAMPLE_RATE, TOOL_LATENCY_MS, audio_stamp,
+)
+from llm_engine import SCENARIO_TOOLS
+from realtime_relay import PCM16_SUBPROTOCOL
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+
+REPORT_VERSION = 2
+
+# Mic frames, as the browser sends them
+FRAME_MS = 20
+
+# Synthetic caller defaults
+SPEECH_MS = 1200           # each utterance
+SILENCE_PARAM_MS = 500     # relay ?silence= (server VAD end-of-speech)
+PAUSE_MS = 300             # silence after the bot finishes before speaking again
+REPLY_TIMEOUT_S = 10       # give up waiting for a reply and speak anyway
+
+# Every scripted scenario (the fake upstream runs each one's tools in order)
+SCENARIOS = tuple(SCENARIO_TOOLS)
+PHONE = '+1-617-555-0142'
+
+PERCENTILES = (50, 90, 99)
+
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+# ===== Audio =====
+
+def speech_pcm(duration_ms, freq=220, amplitude=6000):
+    """A synthetic utterance: PCM16 tone with a little jitter so it is never digital silence."""
+    rng = random.Random(freq)
+    samples = duration_ms * SAMPLE_RATE // 1000
+    pcm = bytearray()
+    for i in range(samples):
+        value = amplitude * math.sin(2 * math.pi * freq * i / SAMPLE_RATE) + rng.randint(-200, 200)
+        pcm += int(value).to_bytes(2, 'little', signed=True)
+    return bytes(pcm)
+
+
+def load_pcm(path):
+    """Raw 24 kHz mono PCM16 recording (no header)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data[:len(data) // 2 * 2]
+
+
+def split_frames(pcm, frame_ms=FRAME_MS):
+    size = frame_ms * BYTES_PER_MS
+    return [pcm[i:i + size].ljust(size, b'\0') for i in range(0, len(pcm), size)]
+
+
+# ===== Stats =====
+
+def summarize(samples_s):
+    """{count, p50, p90, p99, max, mean} in milliseconds."""
+    if not samples_s:
+        return {'count': 0}
+    ordered = sorted(samples_s)
+    n = len(ordered)
+    out = {'count': n}
+    for p in PERCENTILES:
+        out[f'p{p}'] = round(ordered[min(n - 1, math.ceil(p / 100 * n) - 1)] * 1000, 2)
+    out['max'] = round(ordered[-1] * 1000, 2)
+    out['mean'] = round(sum(ordered) / n * 1000, 2)
+    return out
+
+
+class StepStats:
+    """Counters and latency samples shared by every caller in one step."""
+
+    def __init__(self):
+        self.calls_started = 0
+        self.calls_completed = 0
+        self.errors = []
+        self.turns = 0
+        self.tool_calls = 0
+        self.frames_sent = 0
+        self.audio_frames = 0
+        self.events = 0
+        self.connect = []
+        self.turn = []
+        self.relay = []
+        self.relay_audio = []
+
+    def error(self, message):
+        if len(self.errors) < 20:
+            self.errors.append(message)
+
+
+# ===== Process sampling (/proc) =====
+
+def proc_cpu_seconds(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def proc_rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def self_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# ===== Synthetic caller =====
+
+class SyntheticCall:
+    """One browser: streams mic frames in real time and consumes the relay's output."""
+
+    def __init__(self, url, stats, utterance, transport, deadline):
+        self.url = url
+        self.stats = stats
+        self.utterance = utterance
+        self.transport = transport
+        self.deadline = deadline
+        self.silence = bytes(FRAME_MS * BYTES_PER_MS)
+        self.ended = False            # upstream called end_call
+        self.replied = asyncio.Event()
+        self.speech_stopped_at = None
+
+    async def run(self):
+        stats = self.stats
+        stats.calls_started += 1
+        subprotocols = [PCM16_SUBPROTOCOL] if self.transport == 'pcm16' else None
+        started = time.monotonic()
+        try:
+            async with websockets.connect(self.url, subprotocols=subprotocols, max_size=2**24,
+                                          open_timeout=REPLY_TIMEOUT_S) as ws:
+                reader = asyncio.ensure_future(self.read(ws, started))
+                try:
+                    await self.speak(ws)
+                finally:
+                    reader.cancel()
+                    await asyncio.gather(reader, return_exceptions=True)
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            stats.error(f'{type(e).__name__}: {e}')
+            return
+        if self.ended:
+            stats.calls_completed += 1
+
+    def encode(self, frame):
+        if self.transport == 'pcm16':
+            return frame
+        return json.dumps({'type': 'input_audio_buffer.append', 'audio': base64.b64encode(frame).decode('ascii')})
+
+    async def speak(self, ws):
+        loop = asyncio.get_running_loop()
+        frame_s = FRAME_MS / 1000
+        next_at = loop.time()
+
+        async def send(frame):
+            nonlocal next_at
+            await ws.send(self.encode(frame))
+            self.stats.frames_sent += 1
+            # Absolute schedule — real-time pace without drift
+            next_at += frame_s
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+        while not self.ended and loop.time() < self.deadline:
+            self.replied.clear()
+            for frame in self.utterance:
+                await send(frame)
+            # Keep the mic open (silence) until the bot has answered, then pause
+            wait_until = loop.time() + REPLY_TIMEOUT_S
+            while not self.replied.is_set() and loop.time() < min(wait_until, self.deadline):
+                await send(self.silence)
+            pause_until = loop.time() + PAUSE_MS / 1000
+            while loop.time() < min(pause_until, self.deadline) and not self.ended:
+                await send(self.silence)
+
+    async def read(self, ws, started):
+        stats = self.stats
+        try:
+            async for message in ws:
+                now = time.monotonic()
+                if isinstance(message, bytes):
+                    stats.audio_frames += 1
+                    sent_at = audio_stamp(message)
+                    if sent_at is not None:
+                        stats.relay_audio.append(now - sent_at)
+                    self.first_audio(now)
+                    continue
+                stats.events += 1
+                data = json.loads(message)
+                sent_at = data.get('sent_at')
+                evt_type = data.get('type')
+                if evt_type == 'response.audio.delta':
+                    stats.audio_frames += 1
+                    if sent_at is not None:
+                        stats.relay_audio.append(now - sent_at)
+                    self.first_audio(now)
+                    continue
+                # session.created may come from a pre-warmed connection — held on purpose, not relay delay
+                if sent_at is not None and evt_type != 'session.created':
+                    stats.relay.append(now - sent_at)
+                if evt_type == 'session.created':
+                    stats.connect.append(now - started)
+                elif evt_type == 'input_audio_buffer.speech_stopped':
+                    self.speech_stopped_at = now
+                elif evt_type == 'response.function_call_arguments.done':
+                    stats.tool_calls += 1
+                    if data.get('name') == 'end_call':
+                        self.ended = True
+                elif evt_type == 'response.done':
+                    output = (data.get('response') or {}).get('output') or []
+                    # A tool-call response is followed by the spoken one; wait for that
+                    if not any(item.get('type') == 'function_call' for item in output):
+                        self.replied.set()
+                elif evt_type == 'error':
+                    stats.error(f"relay error: {data.get('error', {}).get('message')}")
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def first_audio(self, now):
+        if self.speech_stopped_at is not None:
+            self.stats.turn.append(now - self.speech_stopped_at)
+            self.stats.turns += 1
+            self.speech_stopped_at = None
+
+
+async def caller_loop(base_url, index, stats, utterance, transport, deadline, scenarios):
+    """Keep one call slot busy until the deadline, redialing after each end_call."""
+    n = 0
+    while time.monotonic() < deadline:
+        scenario = scenarios[(index + n) % len(scenarios)]
+        url = f'{base_url}/ws?scenario={scenario}&phone={PHONE}&silence={SILENCE_PARAM_MS}'
+        call = SyntheticCall(url, stats, utterance, transport, deadline)
+        await call.run()
+        n += 1
+        if not call.ended:
+            # Error or deadline — don't spin on a failing server
+            await asyncio.sleep(0.5)
+
+
+# ===== Server stack =====
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _http_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def _wait_for_port(port, proc, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{proc.args} exited with {proc.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'port {port} did not open')
+
+
+class LocalStack:
+    """fake_realtime.py + serve.py as subprocesses on free ports."""
+
+    def __init__(self, first_audio_ms, tool_latency_ms, chunk_ms, response_audio_ms, server_log=None):
+        self.fake_port = _free_port()
+        self.port = _free_port()
+        self.fake_args = [
+            sys.executable, os.path.join(_HERE, 'fake_realtime.py'), '--port', str(self.fake_port), '--stamp',
+            '--first-audio-ms', str(first_audio_ms), '--tool-latency-ms', str(tool_latency_ms),
+            '--chunk-ms', str(chunk_ms), '--response-audio-ms', str(response_audio_ms),
+        ]
+        self.server_log = server_log
+        self.procs = []
+
+    def __enter__(self):
+        fake = subprocess.Popen(self.fake_args, stdout=subprocess.DEVNULL, cwd=_HERE)
+        self.procs.append(fake)
+        self.upstream_pid = fake.pid
+        _wait_for_port(self.fake_port, fake)
+        env = dict(os.environ, PORT=str(self.port), OPENAI_API_KEY='loadgen',
+                   OPENAI_REALTIME_URL=f'ws://127.0.0.1:{self.fake_port}')
+        log = open(self.server_log, 'w') if self.server_log else subprocess.DEVNULL
+        server = subprocess.Popen([sys.executable, os.path.join(_ROOT, 'serve.py')], env=env,
+                                  stdout=log, stderr=subprocess.STDOUT, cwd=_ROOT)
+        if log is not subprocess.DEVNULL:
+            log.close()
+        self.procs.append(server)
+        self.server_pid = server.pid
+        _wait_for_port(self.port, server)
+        return self
+
+    def __exit__(self, *exc):
+        for proc in reversed(self.procs):
+            proc.terminate()
+            try:
+                proc.wait(5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+
+# ===== Steps =====
+
+async def run_step(base_url, calls, duration_s, utterance, transport, scenarios, server_pid, ramp_s,
+                   upstream_pid=None):
+    stats = StepStats()
+    rss_samples = []
+    cpu_before = proc_cpu_seconds(server_pid) if server_pid else None
+    upstream_before = proc_cpu_seconds(upstream_pid) if upstream_pid else None
+    self_before = self_cpu_seconds()
+    started = time.monotonic()
+    deadline = started + duration_s
+
+    async def sample_rss():
+        while True:
+            rss = proc_rss_mb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.ensure_future(sample_rss()) if server_pid else None
+
+    async def staggered(index):
+        # Spread connects over the ramp so every call doesn't speak in lockstep
+        await asyncio.sleep(ramp_s * index / max(1, calls))
+        await caller_loop(base_url.replace('http', 'ws', 1), index, stats, utterance, transport, deadline, scenarios)
+
+    await asyncio.gather(*(staggered(i) for i in range(calls)))
+    elapsed = time.monotonic() - started
+    if sampler:
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+
+    cpu_after = proc_cpu_seconds(server_pid) if server_pid else None
+    upstream_after = proc_cpu_seconds(upstream_pid) if upstream_pid else None
+    server = {}
+    if cpu_before is not None and cpu_after is not None:
+        cpu_percent = (cpu_after - cpu_before) / elapsed * 100
+        server['cpuPercent'] = round(cpu_percent, 1)
+        server['cpuPercentPerCall'] = round(cpu_percent / calls, 2)
+    if rss_samples:
+        server['rssMb'] = round(rss_samples[-1], 1)
+        server['rssPeakMb'] = round(max(rss_samples), 1)
+
+    step = {
+        'calls': calls,
+        'durationS': round(elapsed, 2),
+        'callsStarted': stats.calls_started,
+        'callsCompleted': stats.calls_completed,
+        'errors': len(stats.errors),
+        'errorSamples': stats.errors,
+        'turns': stats.turns,
+        'toolCalls': stats.tool_calls,
+        'latencyMs': {
+            'relayAddedEvents': summarize(stats.relay),
+            'relayAddedAudio': summarize(stats.relay_audio),
+            'turn': summarize(stats.turn),
+            'connect': summarize(stats.connect),
+        },
+        'framesPerSec': {
+            'sent': round(stats.frames_sent / elapsed, 1),
+            'received': round((stats.audio_frames + stats.events) / elapsed, 1),
+            'audioReceived': round(stats.audio_frames / elapsed, 1),
+            'receivedPerCall': round((stats.audio_frames + stats.events) / elapsed / calls, 1),
+        },
+        'server': server,
+        'loadgenCpuPercent': round((self_cpu_seconds() - self_before) / elapsed * 100, 1),
+    }
+    if upstream_before is not None and upstream_after is not None:
+        # The fake upstream shares the host — if it saturates, latency is its, not the relay's
+        step['upstreamCpuPercent'] = round((upstream_after - upstream_before) / elapsed * 100, 1)
+    try:
+        step['serverMetrics'] = _http_json(f'{base_url}/metrics?format=json')['histograms']
+        loop = _http_json(f'{base_url}/api/_debug/loop?top=3')
+        step['serverLoop'] = {'lag': loop['lag'], 'stalls': loop['stalls'], 'refusedCalls': loop['refusedCalls'],
+                              'offenders': loop['offenders']}
+    except (OSError, ValueError, KeyError):
+        pass
+    return step
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=_ROOT, capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run(args):
+    utterance = split_frames(load_pcm(args.pcm) if args.pcm else speech_pcm(SPEECH_MS))
+    scenarios = args.scenario.split(',') if args.scenario else list(SCENARIOS)
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenario(s): {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    steps = [int(n) for n in args.calls.split(',')]
+    report = {
+        'tool': 'iris-loadgen',
+        'version': REPORT_VERSION,
+        'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git': _git_revision(),
+        'python': sys.version.split()[0],
+        'config': {
+            'calls': steps, 'durationS': args.duration, 'transport': args.transport, 'scenarios': scenarios,
+            'target': args.target or 'local', 'frameMs': FRAME_MS, 'speechMs': len(utterance) * FRAME_MS,
+            'silenceParamMs': SILENCE_PARAM_MS, 'firstAudioMs': args.first_audio_ms,
+            'toolLatencyMs': args.tool_latency_ms, 'chunkMs': args.chunk_ms,
+            'responseAudioMs': args.response_audio_ms,
+        },
+        'steps': [],
+    }
+
+    async def run_steps(base_url, server_pid, upstream_pid=None):
+        idle_rss = proc_rss_mb(server_pid) if server_pid else None
+        report['serverIdleRssMb'] = round(idle_rss, 1) if idle_rss is not None else None
+        for calls in steps:
+            print(f'  {calls} calls for {args.duration}s...', file=sys.stderr)
+            step = await run_step(base_url, calls, args.duration, utterance, args.transport, scenarios,
+                                  server_pid, args.ramp, upstream_pid)
+            if idle_rss is not None and 'rssPeakMb' in step['server']:
+                step['server']['rssPerCallMb'] = round((step['server']['rssPeakMb'] - idle_rss) / calls, 2)
+            report['steps'].append(step)
+            latency = step['latencyMs']
+            print(f"    relay p99 audio {latency['relayAddedAudio'].get('p99')}ms / events "
+                  f"{latency['relayAddedEvents'].get('p99')}ms, turn p50 {latency['turn'].get('p50')}ms, "
+                  f"server cpu {step['server'].get('cpuPercent')}%, errors {step['errors']}", file=sys.stderr)
+
+    if args.target:
+        await run_steps(args.target.rstrip('/'), args.server_pid)
+    else:
+        stack = LocalStack(args.first_audio_ms, args.tool_latency_ms, args.chunk_ms, args.response_audio_ms,
+                           server_log=args.server_log)
+        with stack:
+            await run_steps(stack.base_url, stack.server_pid, stack.upstream_pid)
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Concurrent-call load test for the /ws relay')
+    parser.add_argument('--calls', default='1,5,10', help='comma-separated concurrent call counts, one step each')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per step')
+    parser.add_argument('--ramp', type=float, default=2, help='seconds over which each step opens its calls')
+    parser.add_argument('--scenario', help=f"comma-separated scenarios (default: {','.join(SCENARIOS)})")
+    parser.add_argument('--transport', choices=('pcm16', 'json'), default='pcm16',
+                        help='iris-pcm16 binary audio (browser default) or base64 JSON frames')
+    parser.add_argument('--pcm', help='raw 24 kHz mono PCM16 file to use as the caller utterance')
+    parser.add_argument('--target', help='existing server base URL (default: start fake upstream + serve.py)')
+    parser.add_argument('--server-pid', type=int, help='PID of --target, for CPU/RSS sampling')
+    parser.add_argument('--server-log', help='write the spawned serve.py output here')
+    parser.add_argument('--first-audio-ms', type=int, default=FIRST_AUDIO_MS)
+    parser.add_argument('--tool-latency-ms', type=int, default=TOOL_LATENCY_MS)
+    parser.add_argument('--chunk-ms', type=int, default=CHUNK_MS)
+    parser.add_argument('--response-audio-ms', type=int, default=RESPONSE_AUDIO_MS)
+    parser.add_argument('--out', help='write the JSON report here (default: stdout)')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
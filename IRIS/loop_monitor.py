@@ -0,0 +1,258 @@
+"""
+IRIS Event-Loop Monitor
+=======================
+Loop health for the aiohttp servers. Every live /ws call shares one event
+loop, so anything synchronous inside it (a blocking HTTP call, a slow tool
+handler, print() to a slow terminal) delays every call's audio frames.
+
+  - lag sampler: a timer on the loop that records how late it fires
+    (scheduling lag) into a histogram
+  - watchdog thread: notices when the loop has stopped ticking for longer
+    than the slow threshold and grabs the loop thread's stack while the
+    culprit is still running (sys._current_frames), so stalls are
+    attributed to the code that caused them
+  - admission: overloaded() is true while recent lag is over the limit, so
+    the /ws relay can turn new calls away instead of degrading live ones
+
+    loop_monitor.start()      # on the loop, at app startup
+    loop_monitor.snapshot()   # JSON-ready stats for /api/_debug/loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+# Stalls longer than this get a stack captured (ms)
+SLOW_CALLBACK_MS = float(os.environ.get('IRIS_LOOP_SLOW_MS', 100))
+
+# Refuse new /ws calls while recent lag exceeds this (ms; 0 disables)
+LAG_LIMIT_MS = float(os.environ.get('IRIS_LOOP_LAG_LIMIT_MS', 500))
+
+# Lag sampler period (ms)
+SAMPLE_INTERVAL_MS = 50
+
+# overloaded() looks at the worst lag over this window (s)
+LAG_WINDOW_S = 2
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Distinct stall stacks kept (least recently seen are dropped)
+MAX_OFFENDERS = 50
+
+# Frames kept per captured stack (innermost last)
+STACK_DEPTH = 12
+
+
+class _Offender:
+    """One distinct stall stack and how often / how long it blocked the loop."""
+
+    __slots__ = ('stack', 'count', 'total_ms', 'max_ms', 'last_seen')
+
+    def __init__(self, stack):
+        self.stack = stack
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'totalMs': round(self.total_ms, 1),
+            'maxMs': round(self.max_ms, 1),
+            'lastSeen': self.last_seen,
+            'stack': self.stack,
+        }
+
+
+class LoopMonitor:
+    """Scheduling-lag histogram, stall watchdog and admission check for one event loop."""
+
+    def __init__(self, slow_ms=SLOW_CALLBACK_MS, lag_limit_ms=LAG_LIMIT_MS,
+                 interval_ms=SAMPLE_INTERVAL_MS, window_s=LAG_WINDOW_S):
+        self.slow_ms = slow_ms
+        self.lag_limit_ms = lag_limit_ms
+        self.interval_s = interval_ms / 1000
+        self._recent = deque(maxlen=max(1, int(window_s / self.interval_s)))
+        self._buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._samples = 0
+        self._lag_total_ms = 0.0
+        self._lag_max_ms = 0.0
+        self._stalls = 0
+        self._refused = 0
+        self._offenders = {}  # stack key -> _Offender
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread_id = None
+        self._timer = None
+        self._expected = 0.0
+        self._heartbeat = 0.0
+        self._watchdog = None
+        self._stop = threading.Event()
+        self.started_at = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Begin sampling the running loop and start the watchdog thread."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self._heartbeat = time.monotonic()
+        self._schedule()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        self._loop = None
+
+    async def on_startup(self, app):
+        self.start()
+
+    async def on_cleanup(self, app):
+        self.stop()
+
+    # --- Lag sampler (runs on the loop) ---
+
+    def _schedule(self):
+        self._expected = self._loop.time() + self.interval_s
+        self._timer = self._loop.call_at(self._expected, self._tick)
+
+    def _tick(self):
+        lag_ms = max(0.0, (self._loop.time() - self._expected) * 1000)
+        self._heartbeat = time.monotonic()
+        self._record_lag(lag_ms)
+        self._schedule()
+
+    def _record_lag(self, lag_ms):
+        self._recent.append(lag_ms)
+        self._samples += 1
+        self._lag_total_ms += lag_ms
+        if lag_ms > self._lag_max_ms:
+            self._lag_max_ms = lag_ms
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self._buckets[i] += 1
+                break
+        else:
+            self._buckets[-1] += 1
+
+    # --- Watchdog (own thread) ---
+
+    def _watch(self):
+        poll_s = max(0.005, min(self.interval_s, self.slow_ms / 2000))
+        stall_started = None
+        stall_key = None
+        while not self._stop.wait(poll_s):
+            # The sampler is due every interval; anything beyond that is the loop being blocked
+            overdue_ms = (time.monotonic() - self._heartbeat - self.interval_s) * 1000
+            if overdue_ms >= self.slow_ms:
+                if stall_started is None:
+                    stall_started = self._heartbeat
+                    stall_key = self._capture_stack()
+            elif stall_started is not None:
+                # Loop ticked again — charge the whole stall to the stack seen during it
+                self._record_stall(stall_key, (self._heartbeat - stall_started - self.interval_s) * 1000)
+                stall_started = stall_key = None
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return tuple(
+            f"{os.path.basename(f.filename)}:{f.lineno} in {f.name}"
+            for f in traceback.extract_stack(frame, limit=STACK_DEPTH)
+        )
+
+    def _record_stall(self, stack, duration_ms):
+        duration_ms = max(duration_ms, self.slow_ms)
+        with self._lock:
+            self._stalls += 1
+            if stack is None:
+                return
+            offender = self._offenders.get(stack)
+            if offender is None:
+                if len(self._offenders) >= MAX_OFFENDERS:
+                    stale = min(self._offenders, key=lambda k: self._offenders[k].last_seen)
+                    del self._offenders[stale]
+                offender = self._offenders[stack] = _Offender(list(stack))
+            offender.count += 1
+            offender.total_ms += duration_ms
+            offender.max_ms = max(offender.max_ms, duration_ms)
+            offender.last_seen = time.time()
+
+    # --- Queries ---
+
+    def recent_lag_ms(self):
+        """Worst lag over the last LAG_WINDOW_S, including a stall in progress."""
+        worst = max(self._recent, default=0.0)
+        if self._loop is not None:
+            overdue_ms = (time.monotonic() - self._heartbeat - self.interval_s) * 1000
+            worst = max(worst, overdue_ms)
+        return worst
+
+    def overloaded(self):
+        """True when new calls should be refused (recent lag over the limit)."""
+        return self.lag_limit_ms > 0 and self.recent_lag_ms() > self.lag_limit_ms
+
+    def refuse(self):
+        """Count a refused call."""
+        self._refused += 1
+
+    def _percentile_ms(self, q):
+        if not self._samples:
+            return 0.0
+        target = q * self._samples
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self._buckets):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return self._lag_max_ms
+
+    def snapshot(self, top=10):
+        """Lag histogram, stall counts and the worst offending stacks."""
+        with self._lock:
+            offenders = sorted(self._offenders.values(), key=lambda o: o.total_ms, reverse=True)[:top]
+            offenders = [o.as_dict() for o in offenders]
+            stalls = self._stalls
+        buckets = {f'le_{bound}': count for bound, count in zip(LAG_BUCKETS_MS, self._buckets)}
+        buckets['inf'] = self._buckets[-1]
+        return {
+            'running': self._loop is not None,
+            'startedAt': self.started_at,
+            'slowMs': self.slow_ms,
+            'lagLimitMs': self.lag_limit_ms,
+            'overloaded': self.overloaded(),
+            'lag': {
+                'samples': self._samples,
+                'recentMaxMs': round(self.recent_lag_ms(), 1),
+                'meanMs': round(self._lag_total_ms / self._samples, 2) if self._samples else 0.0,
+                'p50Ms': self._percentile_ms(0.5),
+                'p99Ms': self._percentile_ms(0.99),
+                'maxMs': round(self._lag_max_ms, 1),
+                'bucketsMs': buckets,
+            },
+            'stalls': stalls,
+            'refusedCalls': self._refused,
+            'offenders': offenders,
+        }
+
+
+# Process-wide monitor for the server's event loop
+loop_monitor = LoopMonitor()
@@ -0,0 +1,157 @@
+"""
+IRIS OpenAI HTTP Client
+=======================
+Shared, pooled aiohttp client for the OpenAI REST endpoints used by the
+servers (model check, chat completions, text-to-speech).
+
+One ClientSession is reused for every request so TLS connections stay
+alive between calls. Each endpoint has its own timeout and its own
+concurrency limit, so a burst of slow summaries can never starve TTS or
+key checks — and, because everything is awaited, never blocks the event
+loop that carries the live /ws audio relays.
+"""
+
+import asyncio
+import json
+
+import aiohttp
+
+OPENAI_API_BASE = 'https://api.openai.com/v1'
+
+# Per-endpoint total timeouts (seconds) — match the old urlopen() timeouts
+ENDPOINT_TIMEOUTS = {
+    'models': 10,
+    'chat': 15,
+    'speech': 15,
+}
+
+# Max in-flight upstream requests per endpoint
+ENDPOINT_CONCURRENCY = {
+    'models': 4,
+    'chat': 8,
+    'speech': 8,
+}
+
+# Connection pool sizing
+MAX_CONNECTIONS = 32
+KEEPALIVE_TIMEOUT_S = 60
+
+
+class UpstreamError(Exception):
+    """Non-2xx response from OpenAI. Mirrors urllib's HTTPError.code as .status."""
+
+    def __init__(self, status, message=''):
+        super().__init__(f'HTTP {status}' + (f': {message}' if message else ''))
+        self.status = status
+        self.message = message
+
+
+class OpenAIClient:
+    """Keep-alive connection pool + per-endpoint timeouts and concurrency limits."""
+
+    def __init__(self, base_url=OPENAI_API_BASE, max_connections=MAX_CONNECTIONS,
+                 timeouts=None, concurrency=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.concurrency = {**ENDPOINT_CONCURRENCY, **(concurrency or {})}
+        self._session = None
+        self._limits = {}
+
+    def _get_session(self):
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=KEEPALIVE_TIMEOUT_S,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _limit(self, endpoint):
+        sem = self._limits.get(endpoint)
+        if sem is None:
+            sem = asyncio.Semaphore(self.concurrency.get(endpoint, 4))
+            self._limits[endpoint] = sem
+        return sem
+
+    def _timeout(self, endpoint):
+        return aiohttp.ClientTimeout(total=self.timeouts.get(endpoint, 15))
+
+    @staticmethod
+    def _headers(api_key, json_body=False):
+        headers = {'Authorization': f'Bearer {api_key}'}
+        if json_body:
+            headers['Content-Type'] = 'application/json'
+        return headers
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # --- Endpoints ---
+
+    async def get_model(self, api_key, model='gpt-4o-mini'):
+        """GET /models/{model}. Returns the HTTP status; raises UpstreamError on >= 400."""
+        async with self._limit('models'):
+            async with self._get_session().get(
+                f'{self.base_url}/models/{model}',
+                headers=self._headers(api_key),
+                timeout=self._timeout('models'),
+            ) as resp:
+                if resp.status >= 400:
+                    raise UpstreamError(resp.status, await resp.text())
+                return resp.status
+
+    async def chat_completion(self, api_key, payload):
+        """POST /chat/completions. Returns the decoded JSON body."""
+        async with self._limit('chat'):
+            async with self._get_session().post(
+                f'{self.base_url}/chat/completions',
+                data=json.dumps(payload),
+                headers=self._headers(api_key, json_body=True),
+                timeout=self._timeout('chat'),
+            ) as resp:
+                if resp.status >= 400:
+                    raise UpstreamError(resp.status, await resp.text())
+                return await resp.json(content_type=None)
+
+    async def speech(self, api_key, payload):
+        """POST /audio/speech. Returns the full audio body as bytes."""
+        async with self._limit('speech'):
+            async with self._get_session().post(
+                f'{self.base_url}/audio/speech',
+                data=json.dumps(payload),
+                headers=self._headers(api_key, json_body=True),
+                timeout=self._timeout('speech'),
+            ) as resp:
+                if resp.status >= 400:
+                    raise UpstreamError(resp.status, await resp.text())
+                return await resp.read()
+
+    async def speech_stream(self, api_key, payload, chunk_size=16384):
+        """
+        POST /audio/speech, yielding audio chunks as they arrive.
+
+        The endpoint timeout applies per read rather than to the whole body,
+        so long prompts keep streaming as long as bytes keep flowing.
+        Raises UpstreamError before the first chunk on >= 400.
+        """
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=self.timeouts.get('speech', 15),
+            sock_read=self.timeouts.get('speech', 15),
+        )
+        async with self._limit('speech'):
+            async with self._get_session().post(
+                f'{self.base_url}/audio/speech',
+                data=json.dumps(payload),
+                headers=self._headers(api_key, json_body=True),
+                timeout=timeout,
+            ) as resp:
+                if resp.status >= 400:
+                    raise UpstreamError(resp.status, await resp.text())
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    yield chunk
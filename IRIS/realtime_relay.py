@@ -0,0 +1,78 @@
+"""
+IRIS Realtime Relay Helpers
+===========================
+Frame-level helpers for the /ws relay in iris_app.py (used by both servers).
+
+OpenAI streams hundreds of response.audio.delta frames per second, each
+several KB of base64 PCM16 the relay never looks at. sniff_event_type()
+reads the event type straight off the raw frame prefix so those frames are
+forwarded byte-for-byte; only events the relay acts on (transcripts,
+function calls, lifecycle) go through json.loads.
+
+Browsers may also opt into the iris-pcm16 subprotocol: mic audio arrives
+as raw PCM16 binary frames and audio deltas leave as raw PCM16, with the
+relay doing the base64 <-> JSON envelope translation for OpenAI.
+"""
+
+import binascii
+import json
+
+# OpenAI serializes "type" as the first key; allow the spaced form too
+_TYPE_PREFIXES = ('{"type":"', '{"type": "')
+
+# Event names are short identifiers — give up rather than scan a huge frame
+_MAX_TYPE_LEN = 96
+
+# Forwarded untouched — the relay never reads or rewrites these
+PASSTHROUGH_EVENTS = frozenset({
+    'response.audio.delta',
+})
+
+
+def sniff_event_type(message):
+    """
+    Event type of a raw Realtime frame, without parsing it.
+
+    Only trusts frames that open with the "type" key, so a nested "type"
+    can never be mistaken for the event's own. Returns None when the
+    prefix doesn't match — callers then fall back to json.loads.
+    """
+    if not isinstance(message, str):
+        return None
+    for prefix in _TYPE_PREFIXES:
+        if message.startswith(prefix):
+            start = len(prefix)
+            end = message.find('"', start, start + _MAX_TYPE_LEN)
+            if end == -1:
+                return None
+            evt_type = message[start:end]
+            # An escape means the real value continues past this quote
+            return None if '\\' in evt_type else evt_type
+    return None
+
+
+# ===== iris-pcm16 binary audio subprotocol =====
+
+PCM16_SUBPROTOCOL = 'iris-pcm16'
+
+_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = '"}'
+_DELTA_KEY = '"delta":"'
+
+
+def encode_audio_append(pcm):
+    """input_audio_buffer.append text frame for a raw PCM16 chunk from the browser."""
+    # Built directly around the base64 text — no dict, no json.dumps
+    return _APPEND_PREFIX + binascii.b2a_base64(pcm, newline=False).decode('ascii') + _APPEND_SUFFIX
+
+
+def decode_audio_delta(message):
+    """Raw PCM16 bytes carried by a response.audio.delta frame."""
+    start = message.find(_DELTA_KEY)
+    if start != -1:
+        start += len(_DELTA_KEY)
+        end = message.find('"', start)
+        # base64 never needs JSON escapes; if there is one, let json handle it
+        if end != -1 and message.find('\\', start, end) == -1:
+            return binascii.a2b_base64(message[start:end])
+    return binascii.a2b_base64(json.loads(message).get('delta', ''))
@@ -4,6 +4,8 @@ IRIS IVR Response Bank
 Response variants and branching trees for all 10 scenarios.
 Each scenario has stages mapped to conversation turn indices.
 Each stage has multiple response variants with keyword triggers.
+Texts may contain {{slot}} placeholders — entities ({{cardLast4}}) and caller
+details ({{firstName}}, {{email}}) — rendered server-side by response_engine.
 """
 
 # Intent keywords for cross-scenario detection
@@ -66,7 +68,7 @@ RESPONSE_BANK = {
                         'id': 'bc-digits-given',
                         'keywords': ['ends in', 'last four', 'digits', 'number'],
                         'requires_entity': 'cardLast4',
-                        'text': "Thank you, Varun. I can see your Visa card ending in {{cardLast4}} on your account. I'm blocking this card now.\n\nDone — your card ending in {{cardLast4}} has been blocked effective immediately. No further transactions will be processed.\n\nHere's what happens next:\n• A replacement card will be mailed within 3–5 business days\n• Recurring payments will need to be updated with the new card\n• Any unauthorized transactions will be investigated automatically\n\nWould you like me to help with anything else?",
+                        'text': "Thank you, {{firstName}}. I can see your Visa card ending in {{cardLast4}} on your account. I'm blocking this card now.\n\nDone — your card ending in {{cardLast4}} has been blocked effective immediately. No further transactions will be processed.\n\nHere's what happens next:\n• A replacement card will be mailed within 3–5 business days\n• Recurring payments will need to be updated with the new card\n• Any unauthorized transactions will be investigated automatically\n\nWould you like me to help with anything else?",
                         'thinkingTime': 2500,
                     },
                     {
@@ -77,7 +79,7 @@ RESPONSE_BANK = {
                         'thinkingTime': 2200,
                     },
                 ],
-                'fallback_text': "Thank you, Varun. I can see your Visa card ending in {{cardLast4}} on your account. I'm blocking this card now.\n\nDone — your card ending in {{cardLast4}} has been blocked effective immediately. No further transactions will be processed.\n\nHere's what happens next:\n• A replacement card will be mailed within 3–5 business days\n• Recurring payments will need to be updated with the new card\n• Any unauthorized transactions will be investigated automatically\n\nWould you like me to help with anything else?",
+                'fallback_text': "Thank you, {{firstName}}. I can see your Visa card ending in {{cardLast4}} on your account. I'm blocking this card now.\n\nDone — your card ending in {{cardLast4}} has been blocked effective immediately. No further transactions will be processed.\n\nHere's what happens next:\n• A replacement card will be mailed within 3–5 business days\n• Recurring payments will need to be updated with the new card\n• Any unauthorized transactions will be investigated automatically\n\nWould you like me to help with anything else?",
             },
             'wrap-up': {
                 'turn_index': 7,  # customer says thanks/goodbye
@@ -86,7 +88,7 @@ RESPONSE_BANK = {
                         'id': 'bc-close-positive',
                         'keywords': ['thanks', 'thank you', 'no', 'everything', 'great', 'good', 'all set', 'that\'s it'],
                         'condition': "yes_no == 'no'",
-                        'text': "You're welcome, Varun. Your account security is our priority. Have a great day!",
+                        'text': "You're welcome, {{firstName}}. Your account security is our priority. Have a great day!",
                         'thinkingTime': 1200,
                     },
                     {
@@ -103,7 +105,7 @@ RESPONSE_BANK = {
                         'thinkingTime': 2000,
                     },
                 ],
-                'fallback_text': "You're welcome, Varun. Your account security is our priority. Have a great day!",
+                'fallback_text': "You're welcome, {{firstName}}. Your account security is our priority. Have a great day!",
             },
         },
     },
@@ -119,7 +121,7 @@ RESPONSE_BANK = {
                     {
                         'id': 'dp-fraud-clear',
                         'keywords': ['fraudulent', 'fraud', 'didn\'t make', 'not mine', 'never been', 'don\'t recognize'],
-                        'text': "I'm sorry to hear about that, Varun. Protecting your account is our top priority. I'll need a few details to locate the charge.\n\nCould you tell me the approximate amount and the merchant name so I can identify the specific transaction?",
+                        'text': "I'm sorry to hear about that, {{firstName}}. Protecting your account is our top priority. I'll need a few details to locate the charge.\n\nCould you tell me the approximate amount and the merchant name so I can identify the specific transaction?",
                         'thinkingTime': 2000,
                     },
                     {
@@ -137,11 +139,11 @@ RESPONSE_BANK = {
                     {
                         'id': 'dp-standard',
                         'keywords': ['dispute', 'charge', 'transaction', 'wrong', 'unauthorized'],
-                        'text': "I'm sorry to hear about that, Varun. Could you tell me the approximate amount or the merchant name so I can identify the specific charge?",
+                        'text': "I'm sorry to hear about that, {{firstName}}. Could you tell me the approximate amount or the merchant name so I can identify the specific charge?",
                         'thinkingTime': 2000,
                     },
                 ],
-                'fallback_text': "I'm sorry to hear about that, Varun. Could you tell me the approximate amount or the merchant name so I can identify the specific charge?",
+                'fallback_text': "I'm sorry to hear about that, {{firstName}}. Could you tell me the approximate amount or the merchant name so I can identify the specific charge?",
             },
             'details': {
                 'turn_index': 5,  # customer provides amounts/merchants
@@ -188,11 +190,11 @@ RESPONSE_BANK = {
                         'id': 'dp-close-positive',
                         'condition': "yes_no == 'no'",
                         'keywords': ['thanks', 'thank you', 'appreciate', 'that covers', 'everything'],
-                        'text': "Of course, Varun. We take fraud very seriously and we'll keep you updated throughout the process. Have a good evening.",
+                        'text': "Of course, {{firstName}}. We take fraud very seriously and we'll keep you updated throughout the process. Have a good evening.",
                         'thinkingTime': 1200,
                     },
                 ],
-                'fallback_text': "Of course, Varun. We take fraud very seriously and we'll keep you updated. Have a good evening.",
+                'fallback_text': "Of course, {{firstName}}. We take fraud very seriously and we'll keep you updated. Have a good evening.",
             },
         },
     },
@@ -279,11 +281,11 @@ RESPONSE_BANK = {
                         'id': 'tf-close',
                         'condition': "yes_no == 'no'",
                         'keywords': ['thanks', 'no', 'that\'s it', 'perfect', 'all good'],
-                        'text': "You're welcome, Varun. Have a wonderful day!",
+                        'text': "You're welcome, {{firstName}}. Have a wonderful day!",
                         'thinkingTime': 1200,
                     },
                 ],
-                'fallback_text': "You're welcome, Varun. Have a wonderful day!",
+                'fallback_text': "You're welcome, {{firstName}}. Have a wonderful day!",
             },
         },
     },
@@ -348,11 +350,11 @@ RESPONSE_BANK = {
                         'id': 'lb-close',
                         'condition': "yes_no == 'no'",
                         'keywords': ['no', 'thanks', 'just wanted', 'that\'s all', 'options'],
-                        'text': "Anytime, Varun. If you decide to make extra payments in the future, just give us a call or log into your online banking. Have a wonderful day!",
+                        'text': "Anytime, {{firstName}}. If you decide to make extra payments in the future, just give us a call or log into your online banking. Have a wonderful day!",
                         'thinkingTime': 1200,
                     },
                 ],
-                'fallback_text': "Anytime, Varun. If you decide to make extra payments in the future, just give us a call or log into your online banking. Have a wonderful day!",
+                'fallback_text': "Anytime, {{firstName}}. If you decide to make extra payments in the future, just give us a call or log into your online banking. Have a wonderful day!",
             },
         },
     },
@@ -387,11 +389,11 @@ RESPONSE_BANK = {
                         'id': 'ac-digits',
                         'keywords': [],
                         'requires_entity': 'newCardLast4',
-                        'text': "Thank you, Varun. Your new Visa Platinum card ending in {{newCardLast4}} is now active and ready to use!\n\n• Contactless payments: Enabled\n• Online transactions: Enabled\n• Credit limit: $15,000\n• Your old card has been automatically deactivated\n\nYou can set your PIN at any First National ATM. Is there anything else I can help with?",
+                        'text': "Thank you, {{firstName}}. Your new Visa Platinum card ending in {{newCardLast4}} is now active and ready to use!\n\n• Contactless payments: Enabled\n• Online transactions: Enabled\n• Credit limit: $15,000\n• Your old card has been automatically deactivated\n\nYou can set your PIN at any First National ATM. Is there anything else I can help with?",
                         'thinkingTime': 2200,
                     },
                 ],
-                'fallback_text': "Thank you, Varun. Your new Visa Platinum card ending in {{newCardLast4}} is now active. Contactless and online payments are enabled. Credit limit: $15,000. Your old card has been deactivated.",
+                'fallback_text': "Thank you, {{firstName}}. Your new Visa Platinum card ending in {{newCardLast4}} is now active. Contactless and online payments are enabled. Credit limit: $15,000. Your old card has been deactivated.",
             },
             'wrap-up': {
                 'turn_index': 7,
@@ -400,7 +402,7 @@ RESPONSE_BANK = {
                         'id': 'ac-close',
                         'condition': "yes_no == 'no'",
                         'keywords': ['no', 'that\'s all', 'pin', 'atm', 'thanks'],
-                        'text': "Sounds good, Varun. You can set your PIN at any First National ATM. Enjoy your new card and have a great day!",
+                        'text': "Sounds good, {{firstName}}. You can set your PIN at any First National ATM. Enjoy your new card and have a great day!",
                         'thinkingTime': 1200,
                     },
                     {
@@ -410,7 +412,7 @@ RESPONSE_BANK = {
                         'thinkingTime': 1500,
                     },
                 ],
-                'fallback_text': "Sounds good, Varun. You can set your PIN at any First National ATM. Enjoy your new card and have a great day!",
+                'fallback_text': "Sounds good, {{firstName}}. You can set your PIN at any First National ATM. Enjoy your new card and have a great day!",
             },
         },
     },
@@ -426,23 +428,23 @@ RESPONSE_BANK = {
                     {
                         'id': 'rp-locked-out',
                         'keywords': ['locked', 'blocked', 'can\'t log in', 'locked out', 'too many attempts'],
-                        'text': "I understand, Varun. Your online banking access was temporarily locked after multiple login attempts — this is a security measure to protect your account.\n\nI'll send a password reset link to your registered email. Can you confirm — is your email still varun.k@email.com?",
+                        'text': "I understand, {{firstName}}. Your online banking access was temporarily locked after multiple login attempts — this is a security measure to protect your account.\n\nI'll send a password reset link to your registered email. Can you confirm — is your email still {{email}}?",
                         'thinkingTime': 2000,
                     },
                     {
                         'id': 'rp-forgot',
                         'keywords': ['forgot', 'don\'t remember', 'can\'t remember', 'what is my'],
-                        'text': "No worries — that happens to everyone! I can send a password reset link to your registered email.\n\nCan you confirm your email address is still varun.k@email.com?",
+                        'text': "No worries — that happens to everyone! I can send a password reset link to your registered email.\n\nCan you confirm your email address is still {{email}}?",
                         'thinkingTime': 1800,
                     },
                     {
                         'id': 'rp-standard',
                         'keywords': ['password', 'reset', 'login', 'online banking', 'access'],
-                        'text': "I can help you reset your online banking password right away. I'll send a reset link to your registered email.\n\nCan you confirm — is your email still varun.k@email.com?",
+                        'text': "I can help you reset your online banking password right away. I'll send a reset link to your registered email.\n\nCan you confirm — is your email still {{email}}?",
                         'thinkingTime': 1800,
                     },
                 ],
-                'fallback_text': "I understand, Varun. I'll send a password reset link to your registered email. Can you confirm — is your email still varun.k@email.com?",
+                'fallback_text': "I understand, {{firstName}}. I'll send a password reset link to your registered email. Can you confirm — is your email still {{email}}?",
             },
             'confirm-email': {
                 'turn_index': 5,
@@ -451,7 +453,7 @@ RESPONSE_BANK = {
                         'id': 'rp-email-yes',
                         'condition': "yes_no == 'yes'",
                         'keywords': ['yes', 'correct', 'that\'s right', 'yep', 'same'],
-                        'text': "I've sent the reset link to varun.k@email.com. Here's what to do:\n\n1. Check your inbox (and spam folder just in case)\n2. Click the \"Reset Password\" link — it's valid for 15 minutes\n3. Create a new password (must be 8+ characters with a number and symbol)\n4. Your account will be unlocked automatically after reset\n\nIs there anything else I can help with?",
+                        'text': "I've sent the reset link to {{email}}. Here's what to do:\n\n1. Check your inbox (and spam folder just in case)\n2. Click the \"Reset Password\" link — it's valid for 15 minutes\n3. Create a new password (must be 8+ characters with a number and symbol)\n4. Your account will be unlocked automatically after reset\n\nIs there anything else I can help with?",
                         'thinkingTime': 2000,
                     },
                     {
@@ -462,7 +464,7 @@ RESPONSE_BANK = {
                         'thinkingTime': 2200,
                     },
                 ],
-                'fallback_text': "I've sent the reset link to varun.k@email.com. Check your inbox, click the link (valid for 15 minutes), and create a new password. Your account will be unlocked automatically.",
+                'fallback_text': "I've sent the reset link to {{email}}. Check your inbox, click the link (valid for 15 minutes), and create a new password. Your account will be unlocked automatically.",
             },
             'wrap-up': {
                 'turn_index': 7,
@@ -471,11 +473,11 @@ RESPONSE_BANK = {
                         'id': 'rp-close',
                         'condition': "yes_no == 'no'",
                         'keywords': ['no', 'thanks', 'that\'s all', 'all i needed'],
-                        'text': "You're welcome, Varun. If you have any trouble with the reset link, just call us back. Have a great day!",
+                        'text': "You're welcome, {{firstName}}. If you have any trouble with the reset link, just call us back. Have a great day!",
                         'thinkingTime': 1200,
                     },
                 ],
-                'fallback_text': "You're welcome, Varun. If you have any trouble with the reset link, just call us back. Have a great day!",
+                'fallback_text': "You're welcome, {{firstName}}. If you have any trouble with the reset link, just call us back. Have a great day!",
             },
         },
     },
@@ -491,17 +493,17 @@ RESPONSE_BANK = {
                     {
                         'id': 'rs-divorce',
                         'keywords': ['divorce', 'separation', 'wife', 'husband', 'spouse', 'splitting'],
-                        'text': "I understand, Varun, and I'm sorry you're going through this. I can see you have several joint accounts that would need to be addressed.\n\nLet me summarize what I see:\n• Joint Checking Account\n• Joint Savings Account\n• Joint Mortgage\n\nIs that correct, or are there other joint accounts I should be aware of?",
+                        'text': "I understand, {{firstName}}, and I'm sorry you're going through this. I can see you have several joint accounts that would need to be addressed.\n\nLet me summarize what I see:\n• Joint Checking Account\n• Joint Savings Account\n• Joint Mortgage\n\nIs that correct, or are there other joint accounts I should be aware of?",
                         'thinkingTime': 2200,
                     },
                     {
                         'id': 'rs-standard',
                         'keywords': ['joint', 'separate', 'restructure', 'accounts', 'split'],
-                        'text': "I understand, Varun. You'd like to separate your joint accounts. Let me pull up your account information.\n\nI can see joint checking, joint savings, and a joint mortgage on your profile. Is that everything, or are there additional joint accounts?",
+                        'text': "I understand, {{firstName}}. You'd like to separate your joint accounts. Let me pull up your account information.\n\nI can see joint checking, joint savings, and a joint mortgage on your profile. Is that everything, or are there additional joint accounts?",
                         'thinkingTime': 2000,
                     },
                 ],
-                'fallback_text': "I understand, Varun. You'd like to: Separate joint checking, Separate joint savings, Address joint mortgage. Is that correct?",
+                'fallback_text': "I understand, {{firstName}}. You'd like to: Separate joint checking, Separate joint savings, Address joint mortgage. Is that correct?",
             },
             'details': {
                 'turn_index': 5,
@@ -545,11 +547,11 @@ RESPONSE_BANK = {
                     {
                         'id': 'rs-close',
                         'keywords': ['thursday', 'friday', 'works', 'great', 'thanks', 'thorough'],
-                        'text': "Of course, Varun. You'll receive a confirmation email within the hour with your new account details and the appointment confirmation. Take care, and we'll speak soon.",
+                        'text': "Of course, {{firstName}}. You'll receive a confirmation email within the hour with your new account details and the appointment confirmation. Take care, and we'll speak soon.",
                         'thinkingTime': 1500,
                     },
                 ],
-                'fallback_text': "Of course, Varun. You'll receive the confirmation email within the hour. Take care, and we'll speak Thursday.",
+                'fallback_text': "Of course, {{firstName}}. You'll receive the confirmation email within the hour. Take care, and we'll speak Thursday.",
             },
         },
     },
@@ -565,7 +567,7 @@ RESPONSE_BANK = {
                     {
                         'id': 'cl-specific-amount',
                         'keywords': ['increase', 'raise', 'bump', 'higher', 'credit limit', 'more credit'],
-                        'text': "Thank you, Varun. I can see your excellent payment history on your Visa card:\n• Current Limit: $15,000\n• Account Age: 36 months\n• Payment History: All on-time\n• Credit Score: 782 (Excellent)\n\nSince the requested increase exceeds our auto-approval threshold, let me connect you with our credit underwriting team. With your track record, this should be straightforward.",
+                        'text': "Thank you, {{firstName}}. I can see your excellent payment history on your Visa card:\n• Current Limit: $15,000\n• Account Age: 36 months\n• Payment History: All on-time\n• Credit Score: 782 (Excellent)\n\nSince the requested increase exceeds our auto-approval threshold, let me connect you with our credit underwriting team. With your track record, this should be straightforward.",
                         'thinkingTime': 2500,
                     },
                     {
@@ -575,7 +577,7 @@ RESPONSE_BANK = {
                         'thinkingTime': 2000,
                     },
                 ],
-                'fallback_text': "Thank you, Varun. I can see your excellent payment history. Current limit $15,000, 36 months on-time, credit score 782. Let me connect you with credit underwriting.",
+                'fallback_text': "Thank you, {{firstName}}. I can see your excellent payment history. Current limit $15,000, 36 months on-time, credit score 782. Let me connect you with credit underwriting.",
             },
             'wrap-up': {
                 'turn_index': 7,
@@ -583,11 +585,11 @@ RESPONSE_BANK = {
                     {
                         'id': 'cl-close',
                         'keywords': ['fast', 'thanks', 'everything', 'great', 'appreciate'],
-                        'text': "You're very welcome, Varun. With your track record, it was an easy decision. Your new $25,000 limit is effective immediately. Enjoy the increased flexibility, and have a great day!",
+                        'text': "You're very welcome, {{firstName}}. With your track record, it was an easy decision. Your new $25,000 limit is effective immediately. Enjoy the increased flexibility, and have a great day!",
                         'thinkingTime': 1500,
                     },
                 ],
-                'fallback_text': "You're very welcome, Varun. With your track record it was an easy decision. Enjoy the increased flexibility!",
+                'fallback_text': "You're very welcome, {{firstName}}. With your track record it was an easy decision. Enjoy the increased flexibility!",
             },
         },
     },
@@ -609,7 +611,7 @@ RESPONSE_BANK = {
                     {
                         'id': 'mr-curious',
                         'keywords': ['wondering', 'seen', 'rates come down', 'should be', 'think'],
-                        'text': "Great timing to look into this, Varun. Your current rate of 6.1% was competitive when you locked it in, but market rates have shifted.\n\nLet me pull up your details and connect you with a mortgage specialist who can present your refinancing options.",
+                        'text': "Great timing to look into this, {{firstName}}. Your current rate of 6.1% was competitive when you locked it in, but market rates have shifted.\n\nLet me pull up your details and connect you with a mortgage specialist who can present your refinancing options.",
                         'thinkingTime': 2200,
                     },
                 ],
@@ -621,7 +623,7 @@ RESPONSE_BANK = {
                     {
                         'id': 'mr-option-a',
                         'keywords': ['option a', 'fixed', 'lower payment', 'savings', 'first', '5.2'],
-                        'text': "Wonderful choice, Varun. The fixed rate gives you predictability. Here's what I'm doing:\n\n• Locking in 5.2% for 60 days\n• Scheduling a property appraisal\n• Sending you a pre-filled refinancing application by email\n\nYour new estimated monthly payment will be approximately $2,333 — saving you about $215 per month or $2,580 per year.\n\nIs there anything else you'd like to know?",
+                        'text': "Wonderful choice, {{firstName}}. The fixed rate gives you predictability. Here's what I'm doing:\n\n• Locking in 5.2% for 60 days\n• Scheduling a property appraisal\n• Sending you a pre-filled refinancing application by email\n\nYour new estimated monthly payment will be approximately $2,333 — saving you about $215 per month or $2,580 per year.\n\nIs there anything else you'd like to know?",
                         'thinkingTime': 2500,
                     },
                     {
@@ -645,11 +647,11 @@ RESPONSE_BANK = {
                     {
                         'id': 'mr-close',
                         'keywords': ['perfect', 'sounds good', 'thanks', 'great', 'help'],
-                        'text': "My pleasure, Varun. You'll receive the email within the hour. Congratulations on the rate reduction — that's significant savings over the life of the loan. Have a great day!",
+                        'text': "My pleasure, {{firstName}}. You'll receive the email within the hour. Congratulations on the rate reduction — that's significant savings over the life of the loan. Have a great day!",
                         'thinkingTime': 1500,
                     },
                 ],
-                'fallback_text': "My pleasure, Varun. You'll receive the email within the hour. Congratulations on the rate reduction!",
+                'fallback_text': "My pleasure, {{firstName}}. You'll receive the email within the hour. Congratulations on the rate reduction!",
             },
         },
     },
@@ -702,11 +704,11 @@ RESPONSE_BANK = {
                     {
                         'id': 'wt-close',
                         'keywords': ['great', 'easier', 'thanks', 'branch'],
-                        'text': "Glad I could help, Varun. Next time you can also initiate international wires through our online banking portal — it's available 24/7 with the same competitive exchange rates. Have a great day!",
+                        'text': "Glad I could help, {{firstName}}. Next time you can also initiate international wires through our online banking portal — it's available 24/7 with the same competitive exchange rates. Have a great day!",
                         'thinkingTime': 1500,
                     },
                 ],
-                'fallback_text': "Glad I could help, Varun. Next time you can also initiate international wires through our online banking portal. Have a great day!",
+                'fallback_text': "Glad I could help, {{firstName}}. Next time you can also initiate international wires through our online banking portal. Have a great day!",
             },
         },
     },
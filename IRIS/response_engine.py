@@ -6,50 +6,241 @@ Ported from BPVA's calculateKeywordScore pattern.
 No external dependencies — stdlib only.
 """
 
+import enum
+import functools
+import json
+import os
 import re
+from collections import namedtuple
+from types import MappingProxyType
+
 from response_bank import RESPONSE_BANK, INTENT_KEYWORDS
 
 # ===== Keyword Scoring (ported from BPVA) =====
 
-def calculate_keyword_score(user_input, keywords):
-    """
-    Score how well user_input matches a list of keywords.
-    Returns normalized 0.0–1.0 score.
+_PUNCT_RE = re.compile(r'[?!.,;:\'"()]')
 
-    Scoring:
-    - Exact substring match: keyword_word_count * 2
-    - Multi-word all-present: keyword_word_count * 1.5
-    - Partial word match: 0.5 (each input word used once)
+
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def _normalize_input(user_input):
+    """
+    Return (input_lower, input_words) for user_input: the same values as
+    Utterance.stripped and Utterance.words, without building the full
+    Utterance (used for bulk scoring).
     """
-    input_lower = re.sub(r'[?!.,;:\'"()]', '', user_input.lower().strip())
+    input_lower = _PUNCT_RE.sub('', user_input.lower().strip())
     input_words = [w for w in input_lower.split() if len(w) > 2]
-    score = 0.0
-    max_possible = len(keywords)
-    if max_possible == 0:
-        return 0.0
+    return input_lower, input_words
 
-    used_words = set()
 
-    for keyword in keywords:
-        kw_lower = keyword.lower()
-        if kw_lower in input_lower:
-            # Exact substring match — strongest signal
-            score += len(kw_lower.split()) * 2
-        else:
-            kw_words = kw_lower.split()
-            if len(kw_words) > 1:
+class Utterance:
+    """
+    One user turn, normalized once and shared by every NLU function.
+
+    Every function in this module takes either a plain string or an
+    Utterance; build one per turn so classification, entity extraction,
+    intent switching and variant scoring don't each re-lowercase and
+    re-tokenize the same text.
+    """
+
+    __slots__ = ('text', 'lower', 'stripped', 'tokens', 'words', '_token_set', '_digit_spans')
+
+    def __init__(self, text):
+        self.text = text                          # as spoken/typed (entity patterns are case-sensitive)
+        self.lower = text.lower().strip()
+        self.stripped = _PUNCT_RE.sub('', self.lower)
+        self.tokens = self.stripped.split()
+        self.words = [w for w in self.tokens if len(w) > 2]  # partial-match candidates
+        self._token_set = None
+        self._digit_spans = None
+
+    @property
+    def token_set(self):
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+    @property
+    def digit_spans(self):
+        """(start, end) of each digit run in text."""
+        if self._digit_spans is None:
+            self._digit_spans = tuple(m.span() for m in _DIGITS_RE.finditer(self.text))
+        return self._digit_spans
+
+    @classmethod
+    def of(cls, user_input):
+        """user_input as an Utterance (returned as-is if it already is one)."""
+        return user_input if isinstance(user_input, cls) else cls(user_input)
+
+    def __repr__(self):
+        return f'Utterance({self.text!r})'
+
+
+# Distinct input words remembered per matcher before the memo is reset
+_WORD_CACHE_SIZE = 20000
+
+
+class KeywordMatcher:
+    """
+    Keyword lists compiled once, scored many at a time.
+
+    Every distinct keyword is stored once across all lists, pre-lowercased and
+    pre-split, and indexed by its fragments so partial word matches become dict
+    lookups per input word instead of a keyword x word scan. Scoring normalizes
+    the input a single time and memoizes each substring test, so a keyword
+    shared by several lists (e.g. 'unauthorized', 'card') is only checked once
+    per input. Scores are identical to the original per-list algorithm.
+    """
+
+    def __init__(self, keyword_lists):
+        self._keywords = []   # slot -> (kw_lower, word_count, kw_words)
+        self._lists = {}      # key -> tuple of slots (duplicates preserved)
+        slot_of = {}
+        for key, keywords in keyword_lists.items():
+            slots = []
+            for keyword in keywords:
+                kw_lower = keyword.lower()
+                slot = slot_of.get(kw_lower)
+                if slot is None:
+                    kw_words = tuple(kw_lower.split())
+                    slot = slot_of[kw_lower] = len(self._keywords)
+                    self._keywords.append((kw_lower, len(kw_words), kw_words))
+                slots.append(slot)
+            self._lists[key] = tuple(slots)
+
+        # Token index for partial matches ("kw in word" or "word in kw").
+        # Input words never contain whitespace, so only single-token keywords
+        # can sit inside a word, and only within-token fragments of a keyword
+        # can equal a word.
+        self._slot_of = slot_of
+        self._inner_lengths = sorted({
+            len(kw_lower) for kw_lower, _, _ in self._keywords if not kw_lower.split()[1:]
+        })
+        self._containing = {}  # fragment -> slots whose keyword contains it
+        for slot, (kw_lower, _, kw_words) in enumerate(self._keywords):
+            for part in kw_words:
+                for i in range(len(part) - 2):
+                    for j in range(i + 3, len(part) + 1):
+                        self._containing.setdefault(part[i:j], set()).add(slot)
+        self._word_slots = {}  # input word -> partial-match slots (memo)
+
+    def __contains__(self, key):
+        return key in self._lists
+
+    @property
+    def keywords(self):
+        """Distinct compiled keywords by slot: (kw_lower, word_count, kw_words)."""
+        return tuple(self._keywords)
+
+    @property
+    def lists(self):
+        """key -> tuple of keyword slots, in list order (duplicates preserved)."""
+        return MappingProxyType(self._lists)
+
+    def score(self, user_input, key):
+        """Score one compiled list against user_input."""
+        return self.score_many(user_input, (key,))[key]
+
+    def score_many(self, user_input, keys=None):
+        """Score several compiled lists (default: all) against one input (str or Utterance)."""
+        utterance = Utterance.of(user_input)
+        input_lower, input_words = utterance.stripped, utterance.words
+        seen = {}  # substring -> present in input_lower (shared across lists)
+        partial = self.partial_candidates(input_words)
+        if keys is None:
+            keys = self._lists.keys()
+        return {
+            key: self._score_slots(self._lists[key], input_lower, seen, partial)
+            for key in keys
+        }
+
+    def partial_candidates(self, input_words):
+        """Map slot -> input words (in input order) that partially match it."""
+        partial = {}
+        for word in input_words:
+            slots = self._word_slots.get(word)
+            if slots is None:
+                slots = self._index_word(word)
+            for slot in slots:
+                partial.setdefault(slot, []).append(word)
+        return partial
+
+    def _index_word(self, word):
+        """Slots whose keyword contains `word` or is contained in it (memoized)."""
+        slots = set(self._containing.get(word, ()))
+        for length in self._inner_lengths:
+            if length > len(word):
+                break
+            for i in range(len(word) - length + 1):
+                slot = self._slot_of.get(word[i:i + length])
+                if slot is not None:
+                    slots.add(slot)
+        if len(self._word_slots) >= _WORD_CACHE_SIZE:
+            self._word_slots.clear()
+        slots = self._word_slots[word] = tuple(slots)
+        return slots
+
+    def _score_slots(self, slots, input_lower, seen, partial):
+        """Same scoring as calculate_keyword_score, over precompiled slots."""
+        if not slots:
+            return 0.0
+        score = 0.0
+        used_words = set()
+
+        for slot in slots:
+            kw_lower, word_count, kw_words = self._keywords[slot]
+            hit = seen.get(kw_lower)
+            if hit is None:
+                hit = seen[kw_lower] = kw_lower in input_lower
+            if hit:
+                # Exact substring match — strongest signal
+                score += word_count * 2
+                continue
+            if word_count > 1:
                 # Multi-word: check if ALL keyword words appear in input
-                if all(kw in input_lower for kw in kw_words):
-                    score += len(kw_words) * 1.5
+                for kw in kw_words:
+                    hit = seen.get(kw)
+                    if hit is None:
+                        hit = seen[kw] = kw in input_lower
+                    if not hit:
+                        break
+                else:
+                    score += word_count * 1.5
                     continue
             # Partial: only count if there's a NEW input word matching
-            for word in input_words:
-                if word not in used_words and (kw_lower in word or word in kw_lower):
+            for word in partial.get(slot, ()):
+                if word not in used_words:
                     score += 0.5
                     used_words.add(word)
                     break
 
-    return score / max_possible
+        return score / len(slots)
+
+
+@functools.lru_cache(maxsize=256)
+def _adhoc_matcher(keywords):
+    return KeywordMatcher({None: keywords})
+
+
+def calculate_keyword_score(user_input, keywords):
+    """
+    Score how well user_input (str or Utterance) matches a list of keywords.
+    Returns normalized 0.0–1.0 score.
+
+    Scoring:
+    - Exact substring match: keyword_word_count * 2
+    - Multi-word all-present: keyword_word_count * 1.5
+    - Partial word match: 0.5 (each input word used once)
+    """
+    if not keywords:
+        return 0.0
+    return _adhoc_matcher(tuple(keywords)).score(user_input, None)
+
+
+# Intent lists compiled once at import (variant keywords: see STAGE_INDEX below)
+INTENT_MATCHER = KeywordMatcher(INTENT_KEYWORDS)
 
 
 # ===== Entity Extraction =====
@@ -62,7 +253,7 @@ ENTITY_PATTERNS = {
     'wireAmount':      r'\$\s?(\d[\d,]*\.?\d{0,2})',
     'disputeAmount':   r'\$\s?(\d[\d,]*\.?\d{0,2})',
     'merchantName':    r'(?:at|from|called|store called)\s+([A-Z][A-Za-z\']+(?:\s+[A-Z][A-Za-z\']+){0,2})',
-    'email':           r'[\w.-]+@[\w.-]+\.\w+',
+    'email':           r'([\w.-]+@[\w.-]+\.\w+)',
     'percentage':      r'(\d+(?:\.\d+)?)\s*%',
 }
 
@@ -81,26 +272,98 @@ SCENARIO_ENTITIES = {
 }
 
 
-def extract_entities(text, scenario_id):
-    """Extract entities from user text based on scenario context."""
-    entities = {}
-    entity_names = SCENARIO_ENTITIES.get(scenario_id, [])
-
-    for entity_name in entity_names:
-        pattern = ENTITY_PATTERNS.get(entity_name)
-        if not pattern:
+# Entities that collect every match (a dispute can name several charges/merchants)
+_MULTI_ENTITIES = frozenset({'disputeAmount', 'merchantName'})
+
+# Entities whose pattern can't match without a digit in the text
+_DIGIT_ENTITIES = frozenset({
+    'cardLast4', 'newCardLast4', 'dollarAmount', 'transferAmount',
+    'wireAmount', 'disputeAmount', 'percentage',
+})
+
+EntitySpan = namedtuple('EntitySpan', 'name value start end')
+
+# Shared by every entity with the same pattern string
+_ENTITY_REGEXES = {pattern: re.compile(pattern) for pattern in set(ENTITY_PATTERNS.values())}
+
+# One scan of a scenario's entity patterns: every entity sharing the regex reads its result
+_EntityScan = namedtuple('_EntityScan', 'regex needs_digits names find_all')
+
+
+def _compile_entity_scans(scenario_entities):
+    """scenario_id -> (scans, output order or None if the scans already follow it)."""
+    plans = {}
+    for scenario_id, entity_names in scenario_entities.items():
+        by_pattern = {}
+        for entity_name in dict.fromkeys(entity_names):
+            pattern = ENTITY_PATTERNS.get(entity_name)
+            if pattern:
+                by_pattern.setdefault(pattern, []).append(entity_name)
+        scans = tuple(
+            _EntityScan(
+                _ENTITY_REGEXES[pattern],
+                all(n in _DIGIT_ENTITIES for n in names),
+                tuple(names),
+                any(n in _MULTI_ENTITIES for n in names),
+            )
+            for pattern, names in by_pattern.items()
+        )
+        order = tuple(n for n in dict.fromkeys(entity_names) if n in ENTITY_PATTERNS)
+        plans[scenario_id] = (scans, None if order == sum((scan.names for scan in scans), ()) else order)
+    return plans
+
+
+# Compiled at import, like STAGE_INDEX — edit SCENARIO_ENTITIES in source, not at runtime
+_SCENARIO_ENTITY_SCANS = _compile_entity_scans(SCENARIO_ENTITIES)
+
+
+def _entity_matches(utterance, scenario_id):
+    """entity name -> match objects, in SCENARIO_ENTITIES order; each distinct regex runs once."""
+    plan = _SCENARIO_ENTITY_SCANS.get(scenario_id)
+    if plan is None:
+        return {}
+    scans, order = plan
+    found = {}
+    for scan in scans:
+        if scan.needs_digits and not utterance.digit_spans:
             continue
-
-        # For dispute, extract multiple amounts/merchants
-        if entity_name in ('disputeAmount', 'merchantName'):
-            matches = re.findall(pattern, text)
-            if matches:
-                entities[entity_name] = matches
+        if scan.find_all:
+            matches = list(scan.regex.finditer(utterance.text))
         else:
-            match = re.search(pattern, text)
-            if match:
-                entities[entity_name] = match.group(1)
+            match = scan.regex.search(utterance.text)
+            matches = [match] if match else None
+        if matches:
+            for entity_name in scan.names:
+                found[entity_name] = matches if entity_name in _MULTI_ENTITIES else matches[:1]
+    if order is not None:
+        found = {name: found[name] for name in order if name in found}
+    return found
+
+
+def extract_entity_spans(text, scenario_id):
+    """
+    Entities from extract_entities, with where they sit in the text.
+
+    Returns EntitySpan(name, value, start, end) tuples ordered by start, with
+    offsets into the original text — for callers that mask or substitute the
+    matched values without scanning the text again.
+    """
+    spans = [
+        EntitySpan(entity_name, m.group(1), m.start(1), m.end(1))
+        for entity_name, matches in _entity_matches(Utterance.of(text), scenario_id).items()
+        for m in matches
+    ]
+    return sorted(spans, key=lambda span: (span.start, span.end))
 
+
+def extract_entities(text, scenario_id):
+    """Extract entities from user text (str or Utterance) based on scenario context."""
+    entities = {}
+    for entity_name, matches in _entity_matches(Utterance.of(text), scenario_id).items():
+        if entity_name in _MULTI_ENTITIES:
+            entities[entity_name] = [m.group(1) for m in matches]
+        else:
+            entities[entity_name] = matches[0].group(1)
     return entities
 
 
@@ -110,7 +373,7 @@ YES_PATTERNS = [
     'yes', 'yeah', 'yep', 'sure', 'go ahead', 'please', 'do it',
     'proceed', 'correct', "that's right", 'absolutely', 'ok', 'okay',
     'sounds good', "let's do it", 'perfect', 'confirmed', 'affirmative',
-    'right', 'exactly', 'definitely'
+    'right', 'exactly', 'definitely', 'alright', 'all right'
 ]
 
 NO_PATTERNS = [
@@ -126,23 +389,72 @@ MORE_HELP_PATTERNS = [
 ]
 
 
-def classify_yes_no(text):
-    """Classify text as 'yes', 'no', 'more_help', or 'other'."""
-    text_lower = text.lower().strip()
+# Checked in this order: a "more help" phrase anywhere beats yes, yes beats no
+_YES_NO_PRECEDENCE = (
+    ('more_help', MORE_HELP_PATTERNS),
+    ('yes', YES_PATTERNS),
+    ('no', NO_PATTERNS),
+)
 
-    for pattern in MORE_HELP_PATTERNS:
-        if pattern in text_lower:
-            return 'more_help'
+# phrase (single-spaced) -> label
+_YES_NO_LABELS = {
+    ' '.join(phrase.split()): label
+    for label, patterns in _YES_NO_PRECEDENCE
+    for phrase in patterns
+}
+
+
+def _phrase_trie_regex(phrases):
+    """Alternation over phrases factored into a character trie (one branch per next char)."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # end of a phrase
 
-    for pattern in YES_PATTERNS:
-        if pattern in text_lower:
-            return 'yes'
+    def emit(node):
+        branches = [(r'\s+' if ch == ' ' else re.escape(ch)) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and '' not in node else f"(?:{'|'.join(branches)})"
+        # Greedy optional tail: the longer phrase is tried first
+        return body + '?' if '' in node else body
 
-    for pattern in NO_PATTERNS:
-        if pattern in text_lower:
-            return 'no'
+    return emit(trie)
 
-    return 'other'
+
+# One pass over the text for all three lists; the trie keeps failing positions cheap
+_YES_NO_RE = re.compile(rf"\b(?:{_phrase_trie_regex(_YES_NO_LABELS)})\b")
+
+
+def score_yes_no(text):
+    """
+    (label, confidence) for text (str or Utterance); label as classify_yes_no.
+
+    Phrases match whole words only ("no" never fires inside "know", "ok"
+    never inside "book"), and the longest phrase wins where several start
+    on the same word ("not right now" is a no, not a "right").
+
+    Confidence is the share of matched phrase characters that belong to the
+    winning label — 1.0 for an unambiguous answer, lower when phrases for
+    other labels were also heard ("yes — no, wait"), 0.0 for 'other'.
+    """
+    text_lower = text.lower if isinstance(text, Utterance) else text.lower().strip()
+    matched = {}
+    for m in _YES_NO_RE.finditer(text_lower.replace('\u2019', "'")):
+        label = _YES_NO_LABELS[' '.join(m.group().split())]
+        matched[label] = matched.get(label, 0) + m.end() - m.start()
+    for label, _ in _YES_NO_PRECEDENCE:
+        if label in matched:
+            return label, round(matched[label] / sum(matched.values()), 3)
+    return 'other', 0.0
+
+
+def classify_yes_no(text):
+    """Classify text (str or Utterance) as 'yes', 'no', 'more_help', or 'other'."""
+    return score_yes_no(text)[0]
 
 
 # ===== Intent Switch Detection =====
@@ -152,10 +464,10 @@ def detect_intent_switch(user_input, current_scenario_id):
     best_other = None
     best_score = 0.0
 
-    for scenario_id, keywords in INTENT_KEYWORDS.items():
-        if scenario_id == current_scenario_id:
-            continue
-        score = calculate_keyword_score(user_input, keywords)
+    others = [sid for sid in INTENT_KEYWORDS if sid != current_scenario_id]
+    scores = INTENT_MATCHER.score_many(user_input, others)
+    for scenario_id in others:
+        score = scores[scenario_id]
         if score > best_score and score >= 0.3:
             best_score = score
             best_other = scenario_id
@@ -165,78 +477,274 @@ def detect_intent_switch(user_input, current_scenario_id):
     return None
 
 
+# ===== Response Bank Index =====
+
+class Condition(enum.Enum):
+    """Yes/no branch a variant is gated on (values match classify_yes_no)."""
+    YES = 'yes'
+    NO = 'no'
+    MORE_HELP = 'more_help'
+
+
+# classify_yes_no label -> Condition ('other' maps to nothing)
+_CONDITION_FOR_CLASS = {c.value: c for c in Condition}
+
+# Condition strings as written in response_bank.py
+_CONDITION_SOURCES = {f"yes_no == '{c.value}'": c for c in Condition}
+
+# ===== Response Templates =====
+
+_SLOT_RE = re.compile(r'\{\{(\w+)\}\}')
+
+# disputeAmount1 -> ('disputeAmount', 0): 1-based item of a list entity
+_INDEXED_SLOT_RE = re.compile(r'^(\w+?)(\d+)$')
+
+# Scripted demo persona — used when the caller isn't in the customer DB
+DEFAULT_TEMPLATE_VALUES = MappingProxyType({'firstName': 'Varun', 'email': 'varun.k@email.com'})
+
+_Slot = namedtuple('_Slot', 'name base index raw')
+
+
+class Template:
+    """
+    Response text pre-split into literal and slot segments at bank load.
+
+    render() is one pass over the segments and one join — no regex at
+    request time. Slots with no value are left as {{name}} so the client's
+    resolveTemplate can still fill them from its ENTITY_DEFAULTS.
+    """
+
+    __slots__ = ('text', 'segments', 'slots')
+
+    def __init__(self, text):
+        self.text = text
+        segments = []
+        pos = 0
+        for m in _SLOT_RE.finditer(text):
+            if m.start() > pos:
+                segments.append(text[pos:m.start()])
+            name = m.group(1)
+            indexed = _INDEXED_SLOT_RE.match(name)
+            base, index = (indexed.group(1), int(indexed.group(2)) - 1) if indexed else (None, None)
+            segments.append(_Slot(name, base, index, m.group()))
+            pos = m.end()
+        if pos < len(text):
+            segments.append(text[pos:])
+        self.segments = tuple(segments)
+        self.slots = frozenset(seg.name for seg in segments if isinstance(seg, _Slot))
+
+    def render(self, values):
+        """Text with each slot filled from values (lists join with ', ')."""
+        if not self.slots:
+            return self.text
+        parts = []
+        for seg in self.segments:
+            if isinstance(seg, str):
+                parts.append(seg)
+                continue
+            value = values.get(seg.name)
+            if value is None and seg.base is not None:
+                items = values.get(seg.base)
+                if isinstance(items, list) and 0 <= seg.index < len(items):
+                    value = items[seg.index]
+            if value is None:
+                parts.append(seg.raw)
+            elif isinstance(value, list):
+                parts.append(', '.join(str(v) for v in value))
+            else:
+                parts.append(str(value))
+        return ''.join(parts)
+
+    def __repr__(self):
+        return f'Template({self.text!r})'
+
+
+def caller_profile(context, scenario_id, lookup_customer):
+    """
+    lookup_customer(context['phone'], scenario_id) — the caller's profile for
+    template slots — or None when there is no lookup or no phone. Servers
+    pass llm_engine.lookup_customer; this module never imports it.
+    """
+    phone = context.get('phone') if isinstance(context, dict) else None
+    if lookup_customer is None or not phone or not isinstance(phone, str):
+        return None
+    return lookup_customer(phone, scenario_id)
+
+
+def template_values(entities, customer=None):
+    """
+    Slot values for one turn: demo defaults, then the caller's profile
+    (a caller_profile() result), then extracted entities.
+    """
+    values = dict(DEFAULT_TEMPLATE_VALUES)
+    if customer:
+        values['firstName'] = customer['name'].split()[0]
+        values['customerName'] = customer['name']
+        values['tier'] = customer['tier']
+        values['email'] = customer['email']
+        values['accountLast4'] = customer['accountLast4']
+    values.update(entities)
+    return values
+
+
+Variant = namedtuple('Variant', 'id keywords condition requires_entity text thinking_time template')
+Stage = namedtuple('Stage', 'name turn_index variants fallback_text fallback_template')
+
+
+def _bank_error(where, message):
+    return ValueError(f"RESPONSE_BANK[{where}]: {message}")
+
+
+def _compile_variant(where, raw, seen_ids):
+    if not isinstance(raw, dict):
+        raise _bank_error(where, 'variant must be a dict')
+    variant_id = raw.get('id')
+    if not isinstance(variant_id, str) or not variant_id:
+        raise _bank_error(where, 'variant is missing an id')
+    where = f"{where}/{variant_id}"
+    if variant_id in seen_ids:
+        raise _bank_error(where, 'duplicate variant id')
+    seen_ids.add(variant_id)
+
+    text = raw.get('text')
+    if not isinstance(text, str) or not text:
+        raise _bank_error(where, 'variant has no text')
+    keywords = raw.get('keywords', [])
+    if not isinstance(keywords, (list, tuple)) or not all(isinstance(k, str) for k in keywords):
+        raise _bank_error(where, 'keywords must be a list of strings')
+    condition = raw.get('condition')
+    if condition is not None:
+        if condition not in _CONDITION_SOURCES:
+            raise _bank_error(where, f'unknown condition {condition!r}')
+        condition = _CONDITION_SOURCES[condition]
+    requires = raw.get('requires_entity')
+    if requires is not None and requires not in ENTITY_PATTERNS:
+        raise _bank_error(where, f'unknown requires_entity {requires!r}')
+    thinking_time = raw.get('thinkingTime', 1800)
+    if not isinstance(thinking_time, int):
+        raise _bank_error(where, 'thinkingTime must be an int (ms)')
+
+    return Variant(variant_id, tuple(keywords), condition, requires, text, thinking_time, Template(text))
+
+
+def compile_response_bank(bank):
+    """
+    Validate RESPONSE_BANK and index it by (scenario_id, turn_index).
+
+    Raises ValueError on malformed entries so a bad bank fails at import
+    rather than silently falling back mid-call.
+    """
+    index = {}
+    seen_ids = set()
+    for scenario_id, scenario in bank.items():
+        stages = scenario.get('stages') if isinstance(scenario, dict) else None
+        if not isinstance(stages, dict):
+            raise _bank_error(scenario_id, "missing 'stages' dict")
+        for stage_name, stage in stages.items():
+            where = f"{scenario_id}/{stage_name}"
+            turn_index = stage.get('turn_index')
+            if not isinstance(turn_index, int):
+                raise _bank_error(where, 'turn_index must be an int')
+            if (scenario_id, turn_index) in index:
+                raise _bank_error(where, f'turn_index {turn_index} already used by another stage')
+            fallback_text = stage.get('fallback_text')
+            if fallback_text is not None and not isinstance(fallback_text, str):
+                raise _bank_error(where, 'fallback_text must be a string')
+            variants = tuple(_compile_variant(where, v, seen_ids) for v in stage.get('variants', []))
+            fallback_template = Template(fallback_text) if fallback_text is not None else None
+            index[(scenario_id, turn_index)] = Stage(stage_name, turn_index, variants, fallback_text, fallback_template)
+    return MappingProxyType(index)
+
+
+STAGE_INDEX = compile_response_bank(RESPONSE_BANK)
+
+# Keyword lists for every variant, compiled once (keyed by variant id)
+VARIANT_MATCHER = KeywordMatcher({
+    variant.id: variant.keywords
+    for stage in STAGE_INDEX.values()
+    for variant in stage.variants
+})
+
+
 # ===== Main Response Selection =====
 
-def get_response(scenario_id, turn_index, user_input, context=None):
+def _no_response():
+    return {
+        'text': None,
+        'thinkingTime': 1500,
+        'entitiesExtracted': {},
+        'fallbackUsed': True,
+        'dynamicScore': 0.0
+    }
+
+
+def get_response(scenario_id, turn_index, user_input, context=None, customer=None):
     """
     Select the best response variant for a given scenario turn.
 
+    context may carry extractedEntities (from earlier turns); they and the
+    caller's profile (customer, from caller_profile) fill the chosen text's
+    {{slots}}.
+
     Returns:
         dict with: text, thinkingTime, entitiesExtracted, fallbackUsed, dynamicScore
     """
     context = context or {}
-    existing_entities = context.get('extractedEntities', {})
-
-    # Get response bank for this scenario
-    scenario_bank = RESPONSE_BANK.get(scenario_id)
-    if not scenario_bank:
-        return {
-            'text': None,
-            'thinkingTime': 1500,
-            'entitiesExtracted': {},
-            'fallbackUsed': True,
-            'dynamicScore': 0.0
-        }
-
-    # Find the stage that matches this turn_index
-    stages = scenario_bank.get('stages', {})
-    matched_stage = None
-    for stage_name, stage_data in stages.items():
-        if stage_data.get('turn_index') == turn_index:
-            matched_stage = stage_data
-            break
 
+    # O(1) stage lookup in the precompiled bank
+    try:
+        matched_stage = STAGE_INDEX.get((scenario_id, turn_index))
+    except TypeError:  # unhashable ids from a malformed request
+        matched_stage = None
     if not matched_stage:
-        return {
-            'text': None,
-            'thinkingTime': 1500,
-            'entitiesExtracted': {},
-            'fallbackUsed': True,
-            'dynamicScore': 0.0
-        }
-
-    # Extract entities from user input
-    new_entities = extract_entities(user_input, scenario_id)
-    all_entities = {**existing_entities, **new_entities}
-
-    # Classify yes/no for branching
-    yes_no = classify_yes_no(user_input)
+        return _no_response()
+
+    utterance = Utterance.of(user_input)
+    return _select_response(
+        scenario_id,
+        matched_stage,
+        utterance,
+        extract_entities(utterance, scenario_id),
+        context,
+        classify_yes_no(utterance),
+        customer,
+    )
+
+
+def _select_response(scenario_id, matched_stage, utterance, new_entities, context, classification, customer=None):
+    """Variant selection for one stage, given the turn's already-computed NLU results."""
+    all_entities = {**context.get('extractedEntities', {}), **new_entities}
+
+    def render(template):
+        if template is None:
+            return None
+        if not template.slots:
+            return template.text
+        return template.render(template_values(all_entities, customer))
+
+    # Yes/no for branching (None when the answer is neither)
+    yes_no = _CONDITION_FOR_CLASS.get(classification)
 
     # Score all variants
     best_variant = None
     best_score = 0.0
+    keyword_scores = VARIANT_MATCHER.score_many(
+        utterance, [v.id for v in matched_stage.variants if v.keywords]
+    )
 
-    for variant in matched_stage.get('variants', []):
+    for variant in matched_stage.variants:
         # Check condition (yes/no branching)
-        condition = variant.get('condition')
-        if condition:
-            if condition == "yes_no == 'yes'" and yes_no != 'yes':
-                continue
-            elif condition == "yes_no == 'no'" and yes_no != 'no':
-                continue
-            elif condition == "yes_no == 'more_help'" and yes_no != 'more_help':
-                continue
+        if variant.condition is not None and variant.condition is not yes_no:
+            continue
 
         # Check required entity
-        requires = variant.get('requires_entity')
-        if requires and requires not in all_entities:
+        if variant.requires_entity and variant.requires_entity not in all_entities:
             continue
 
         # Score keywords
-        keywords = variant.get('keywords', [])
-        if keywords:
-            score = calculate_keyword_score(user_input, keywords)
-        elif condition:
+        if variant.keywords:
+            score = keyword_scores[variant.id]
+        elif variant.condition is not None:
             # Condition-only variants (yes/no) get a base score if condition matched
             score = 0.5
         else:
@@ -249,48 +757,159 @@ def get_response(scenario_id, turn_index, user_input, context=None):
     # Threshold check
     if best_variant and best_score >= 0.1:
         return {
-            'text': best_variant['text'],
-            'thinkingTime': best_variant.get('thinkingTime', 1800),
+            'text': render(best_variant.template),
+            'thinkingTime': best_variant.thinking_time,
             'entitiesExtracted': new_entities,
             'fallbackUsed': False,
             'dynamicScore': round(best_score, 3)
         }
 
     # Check if there's a yes/no match with just condition (no keywords needed)
-    for variant in matched_stage.get('variants', []):
-        condition = variant.get('condition')
-        if condition:
-            if condition == "yes_no == 'yes'" and yes_no == 'yes':
-                return {
-                    'text': variant['text'],
-                    'thinkingTime': variant.get('thinkingTime', 1800),
-                    'entitiesExtracted': new_entities,
-                    'fallbackUsed': False,
-                    'dynamicScore': 0.5
-                }
-            elif condition == "yes_no == 'no'" and yes_no == 'no':
-                return {
-                    'text': variant['text'],
-                    'thinkingTime': variant.get('thinkingTime', 1800),
-                    'entitiesExtracted': new_entities,
-                    'fallbackUsed': False,
-                    'dynamicScore': 0.5
-                }
-            elif condition == "yes_no == 'more_help'" and yes_no == 'more_help':
+    if yes_no is not None:
+        for variant in matched_stage.variants:
+            if variant.condition is yes_no:
                 return {
-                    'text': variant['text'],
-                    'thinkingTime': variant.get('thinkingTime', 1800),
+                    'text': render(variant.template),
+                    'thinkingTime': variant.thinking_time,
                     'entitiesExtracted': new_entities,
                     'fallbackUsed': False,
                     'dynamicScore': 0.5
                 }
 
     # Fallback to scripted message
-    fallback_text = matched_stage.get('fallback_text')
     return {
-        'text': fallback_text,
+        'text': render(matched_stage.fallback_template),
         'thinkingTime': 1800,
         'entitiesExtracted': new_entities,
-        'fallbackUsed': True if fallback_text else True,
+        'fallbackUsed': True,
         'dynamicScore': 0.0
     }
+
+
+# ===== Combined Turn (one request per utterance) =====
+
+# Upper bound on turns accepted by one /api/batch request
+MAX_BATCH_TURNS = 100
+
+
+def run_turn(scenario_id, turn_index, user_input, context=None, current_scenario_id=None, customer=None):
+    """
+    classify_yes_no + extract_entities + detect_intent_switch + get_response
+    for one utterance (str or Utterance), normalizing it once.
+
+    current_scenario_id defaults to scenario_id. Each result is exactly what
+    the standalone endpoint would return.
+    """
+    context = context or {}
+    if current_scenario_id is None:
+        current_scenario_id = scenario_id
+    utterance = Utterance.of(user_input)
+    classification, confidence = score_yes_no(utterance)
+    entities = extract_entities(utterance, scenario_id)
+
+    try:
+        matched_stage = STAGE_INDEX.get((scenario_id, turn_index))
+    except TypeError:
+        matched_stage = None
+    if matched_stage:
+        response = _select_response(scenario_id, matched_stage, utterance, entities, context, classification, customer)
+    else:
+        response = _no_response()
+
+    return {
+        'classification': classification,
+        'classificationConfidence': confidence,
+        'entities': entities,
+        'switch': detect_intent_switch(utterance, current_scenario_id),
+        'response': response,
+    }
+
+
+def run_turn_request(data, lookup_customer=None):
+    """
+    run_turn for a /api/turn JSON body. Raises ValueError on a malformed body.
+
+    lookup_customer(phone, scenario_id) supplies the caller's profile for
+    context.phone (see caller_profile); without it templates use the demo
+    defaults.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Turn must be a JSON object')
+    scenario_id = data.get('scenarioId')
+    turn_index = data.get('turnIndex')
+    if scenario_id is None or turn_index is None:
+        raise ValueError('Missing scenarioId or turnIndex')
+    if not isinstance(scenario_id, str):
+        raise ValueError('scenarioId must be a string')
+    user_input = data.get('userInput', '')
+    if not isinstance(user_input, str):
+        raise ValueError('userInput must be a string')
+    context = data.get('context') or {}
+    if not isinstance(context, dict):
+        raise ValueError('context must be an object')
+    current_scenario_id = data.get('currentScenarioId')
+    if current_scenario_id is not None and not isinstance(current_scenario_id, str):
+        raise ValueError('currentScenarioId must be a string')
+    customer = caller_profile(context, scenario_id, lookup_customer)
+    return run_turn(scenario_id, turn_index, user_input, context, current_scenario_id, customer)
+
+
+def run_batch_request(data, lookup_customer=None):
+    """
+    run_turn_request over a /api/batch body: a list of turns or {"turns": [...]}.
+
+    Raises ValueError if the batch itself is malformed; a bad turn only fails
+    its own slot, as {"error": ...}.
+    """
+    turns = data.get('turns') if isinstance(data, dict) else data
+    if not isinstance(turns, list):
+        raise ValueError('Expected a list of turns')
+    if len(turns) > MAX_BATCH_TURNS:
+        raise ValueError(f'Too many turns (max {MAX_BATCH_TURNS})')
+    if lookup_customer is not None:
+        # A batch usually replays one caller — look each (phone, scenario) up once
+        lookup_customer = functools.lru_cache(maxsize=None)(lookup_customer)
+    results = []
+    for turn in turns:
+        try:
+            results.append(run_turn_request(turn, lookup_customer))
+        except ValueError as e:
+            results.append({'error': str(e)})
+    return {'results': results}
+
+
+# ===== Yes/No Regression Corpus =====
+
+# demo-script.csv user lines plus short replies, each with the label expected
+# now and the label the old substring word lists gave ("legacy")
+YES_NO_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'yes_no_corpus.jsonl')
+
+
+def check_yes_no_corpus(path=YES_NO_CORPUS_PATH):
+    """
+    Problems found running classify_yes_no over the corpus: a label that
+    differs from 'expected', or an expected label that departs from the old
+    word-list behaviour ('legacy') without a 'why'. Empty when all is well.
+    """
+    problems = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            got = classify_yes_no(case['text'])
+            if got != case['expected']:
+                problems.append(f"{case['text']!r}: expected {case['expected']}, got {got}")
+            elif got != case['legacy'] and not case.get('why'):
+                problems.append(f"{case['text']!r}: {got} differs from word-list {case['legacy']} with no 'why'")
+    return problems
+
+
+if __name__ == '__main__':
+    import sys
+
+    problems = check_yes_no_corpus(sys.argv[1] if len(sys.argv) > 1 else YES_NO_CORPUS_PATH)
+    for problem in problems:
+        print(problem)
+    print(f"yes/no corpus: {len(problems)} problem(s)")
+    sys.exit(1 if problems else 0)
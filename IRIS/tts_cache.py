@@ -0,0 +1,323 @@
+"""
+IRIS TTS Audio Cache
+====================
+Content-addressed cache for /api/tts audio so the fixed IVR prompts are
+synthesized once instead of on every demo run.
+
+Entries are keyed by sha256(text, voice, model, format). Two tiers:
+  - memory: LRU bounded by total bytes (not entry count)
+  - disk:   one file per key under IRIS_TTS_CACHE_DIR, survives restarts,
+            trimmed oldest-first when it grows past its byte budget (a
+            running byte total; the directory is only walked to trim)
+
+The key doubles as a strong ETag, so handlers can answer If-None-Match
+with 304 without touching the audio at all.
+
+Warm-up (pre-render every prompt in demo-script.csv + the response bank):
+    python tts_cache.py warm [--api-key sk-...] [--voice alloy]
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+TTS_MODEL = 'tts-1'
+TTS_VOICE = 'alloy'
+
+# Voices the tts-1 model accepts — anything else is rejected before it can reach a cache key
+TTS_VOICES = ('alloy', 'ash', 'coral', 'echo', 'fable', 'nova', 'onyx', 'sage', 'shimmer')
+TTS_FORMAT = 'mp3'
+
+# Memory tier — the whole Traditional IVR prompt set is well under this
+MEMORY_MAX_BYTES = int(os.environ.get('IRIS_TTS_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))
+
+# Disk tier — set IRIS_TTS_CACHE_DIR='' to disable it
+DISK_DIR = os.environ.get('IRIS_TTS_CACHE_DIR', os.path.join(_HERE, '.tts_cache'))
+DISK_MAX_BYTES = int(os.environ.get('IRIS_TTS_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+
+# A trim deletes down to this share of the budget, so a full cache isn't rescanned on every write
+DISK_TRIM_TARGET = 0.9
+
+# In-flight writes (renamed into place when complete) — never counted or trimmed
+_TMP_SUFFIX = '.tmp'
+
+
+def cache_key(text, voice=TTS_VOICE, model=TTS_MODEL, fmt=TTS_FORMAT):
+    """Stable hex digest for one synthesis request."""
+    h = hashlib.sha256()
+    for part in (model, voice, fmt, text):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def etag_for(key):
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match, key):
+    """True if an If-None-Match header value covers this key."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    tag = etag_for(key)
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+class TTSCache:
+    """Byte-bounded in-memory LRU in front of an optional on-disk store. Thread-safe."""
+
+    def __init__(self, max_bytes=MEMORY_MAX_BYTES, disk_dir=DISK_DIR, max_disk_bytes=DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # running disk-tier total (None: not scanned yet)
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- Memory tier ---
+
+    def lookup(self, key):
+        """Memory-only lookup. Cheap enough to call on the event loop."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    # --- Disk tier (blocking I/O — run off the event loop) ---
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def load(self, key):
+        """Disk lookup; promotes a hit into the memory tier. Returns bytes or None."""
+        if self.disk_dir:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data:
+                try:
+                    os.utime(path)  # keep recently used files out of the trim
+                except OSError:
+                    pass
+                self._remember(key, data)
+                with self._lock:
+                    self.disk_hits += 1
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get(self, key):
+        """Memory, then disk."""
+        data = self.lookup(key)
+        return data if data is not None else self.load(key)
+
+    def store(self, key, data):
+        """Add to both tiers. Empty bodies are never cached."""
+        if not data:
+            return
+        self._remember(key, data)
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}{_TMP_SUFFIX}'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)  # atomic — readers never see a partial file
+        except OSError as e:
+            print(f"  [TTS cache] Disk write failed: {e}")
+            return
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]  # first write: includes this file
+            else:
+                self._disk_bytes += len(data) - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._trim_disk()
+
+    def _scan_disk(self):
+        """([(mtime, size, path), ...], total bytes) for every finished cache file."""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(_TMP_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        return files, total
+
+    def _trim_disk(self):
+        """Delete least recently used files down to DISK_TRIM_TARGET of the budget (under _disk_lock)."""
+        files, total = self._scan_disk()
+        target = self.max_disk_bytes * DISK_TRIM_TARGET
+        if total > self.max_disk_bytes:
+            files.sort()
+            for _, size, path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'diskHits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+
+# Process-wide cache shared by the servers
+tts_cache = TTSCache()
+
+
+# ===== Warm-up =====
+
+def _strip_speaker(line):
+    # "Bot: ..." / "Agent Marcus: ..." -> spoken text
+    head, sep, rest = line.partition(':')
+    if sep and (head == 'Bot' or head.startswith('Agent')):
+        return rest.strip()
+    return line.strip()
+
+
+def collect_prompts():
+    """Every fixed prompt in demo-script.csv and the response bank, deduplicated, in order."""
+    import csv
+    from response_engine import DEFAULT_TEMPLATE_VALUES, STAGE_INDEX
+
+    prompts = []
+    with open(os.path.join(_HERE, 'demo-script.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            line = (row.get('Bot/Agent Response That Follows') or '').strip()
+            # Skip annotations like "Intent detected → Block My Credit Card"
+            if line and '→' not in line:
+                prompts.append(_strip_speaker(line))
+
+    # Response bank rendered for the demo persona ({{firstName}} -> Varun)
+    for stage in STAGE_INDEX.values():
+        prompts.extend(variant.template.render(DEFAULT_TEMPLATE_VALUES) for variant in stage.variants)
+        if stage.fallback_template is not None:
+            prompts.append(stage.fallback_template.render(DEFAULT_TEMPLATE_VALUES))
+
+    seen = set()
+    result = []
+    for text in prompts:
+        text = text.strip()
+        # Still templated (entities) — depends on the caller, render it live
+        if text and '{{' not in text and text not in seen:
+            seen.add(text)
+            result.append(text)
+    return result
+
+
+async def warm(api_key, voice=TTS_VOICE, cache=None, concurrency=4):
+    """Synthesize every uncached prompt. Returns (rendered, already_cached, failed)."""
+    import asyncio
+    from openai_client import OpenAIClient
+
+    cache = cache or tts_cache
+    client = OpenAIClient(concurrency={'speech': concurrency})
+    counts = {'rendered': 0, 'cached': 0, 'failed': 0}
+
+    async def render(text):
+        key = cache_key(text, voice)
+        if cache.get(key) is not None:
+            counts['cached'] += 1
+            return
+        try:
+            audio = await client.speech(api_key, {
+                "model": TTS_MODEL,
+                "input": text,
+                "voice": voice,
+                "response_format": TTS_FORMAT,
+            })
+        except Exception as e:
+            counts['failed'] += 1
+            print(f"  [TTS cache] Failed: {text[:60]!r}: {e}")
+            return
+        cache.store(key, audio)
+        counts['rendered'] += 1
+
+    try:
+        await asyncio.gather(*(render(text) for text in collect_prompts()))
+    finally:
+        await client.close()
+    return counts['rendered'], counts['cached'], counts['failed']
+
+
+if __name__ == '__main__':
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description='IRIS TTS cache tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    warm_cmd = sub.add_parser('warm', help='pre-render demo-script.csv and response bank prompts')
+    warm_cmd.add_argument('--api-key', default=os.environ.get('OPENAI_API_KEY', ''))
+    warm_cmd.add_argument('--voice', default=TTS_VOICE, choices=TTS_VOICES)
+    warm_cmd.add_argument('--concurrency', type=int, default=4)
+    sub.add_parser('list', help='print the prompts warm would render')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for prompt in collect_prompts():
+            print(prompt)
+    else:
+        if not args.api_key:
+            parser.error('no API key (pass --api-key or set OPENAI_API_KEY)')
+        if not tts_cache.disk_dir:
+            parser.error('disk tier disabled (IRIS_TTS_CACHE_DIR is empty) — nothing would persist')
+        rendered, cached, failed = asyncio.run(warm(args.api_key, args.voice, concurrency=args.concurrency))
+        print(f"TTS cache warm: {rendered} rendered, {cached} already cached, {failed} failed -> {tts_cache.disk_dir}")
@@ -0,0 +1,229 @@
+"""
+IRIS Realtime Upstream Pool
+===========================
+Pre-warmed OpenAI Realtime connections for the /ws relays.
+
+A cold call pays for DNS + TCP + TLS + the WebSocket upgrade and then waits
+for session.created before it can even send its session.update. The pool
+keeps a few connections open that have already received session.created,
+so a call claims one and goes straight to its own session.update.
+
+  - keyed by API key (the key is part of the handshake); switching keys
+    retires the old key's connections
+  - idle connections are replaced on a timer, well before the upstream
+    session would expire
+  - refills in the background after every claim; a claim never waits on
+    a refill — if the pool is empty it connects inline exactly as before
+  - goes cold after IDLE_SHUTDOWN_S without a call (warm connections are
+    paid upstream sessions); the next call connects inline and re-warms it
+  - a failed pre-warm backs off exponentially; an auth rejection (401/403)
+    stops pre-warming for that key until a call connects with it
+
+Off by default — set IRIS_REALTIME_POOL_SIZE to enable it.
+
+The URL is a constructor argument so the pool can be pointed at a local
+fake Realtime server.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from collections import deque, namedtuple
+
+import websockets
+from websockets.protocol import State
+
+# Warm connections kept per API key (0 disables pre-warming)
+POOL_SIZE = int(os.environ.get('IRIS_REALTIME_POOL_SIZE', 0))
+
+# Replace idle connections after this long (Realtime sessions expire after 30 min)
+MAX_IDLE_S = int(os.environ.get('IRIS_REALTIME_POOL_MAX_IDLE_S', 300))
+
+# Close every warm connection and stop refilling after this long without a call (0 = never)
+IDLE_SHUTDOWN_S = int(os.environ.get('IRIS_REALTIME_POOL_IDLE_SHUTDOWN_S', 600))
+
+# How often the refresher checks for stale connections
+REFRESH_INTERVAL_S = 30
+
+# Delay before retrying a failed pre-warm, doubled per consecutive failure up to the max
+RETRY_BACKOFF_S = 5
+MAX_RETRY_BACKOFF_S = 300
+
+# Handshake statuses meaning the key itself was refused — retrying won't help
+AUTH_FAILURE_STATUSES = (401, 403)
+
+# Handshake + session.created must finish within this
+CONNECT_TIMEOUT_S = 15
+
+_Warm = namedtuple('_Warm', ['ws', 'session_created', 'opened_at'])
+
+
+def realtime_headers(api_key):
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "OpenAI-Beta": "realtime=v1",
+    }
+
+
+class RealtimePool:
+    """Pool of Realtime connections that have already consumed session.created."""
+
+    def __init__(self, url, size=POOL_SIZE, max_idle_s=MAX_IDLE_S,
+                 refresh_interval_s=REFRESH_INTERVAL_S, idle_shutdown_s=IDLE_SHUTDOWN_S, max_size=2**24):
+        self.url = url
+        self.size = size
+        self.max_idle_s = max_idle_s
+        self.refresh_interval_s = refresh_interval_s
+        self.idle_shutdown_s = idle_shutdown_s
+        self.max_size = max_size
+        self._idle = {}      # api_key -> deque[_Warm]
+        self._filling = {}   # api_key -> fill task
+        self._failures = {}  # api_key -> consecutive failed pre-warms
+        self._retry_at = {}  # api_key -> monotonic time before which no pre-warm is tried
+        self._rejected = set()  # keys the upstream refused — never pre-warmed
+        self._last_claim = 0.0
+        self._refresher = None
+        self.hits = 0
+        self.misses = 0
+
+    async def open(self, api_key):
+        """Connect and wait for session.created. Returns (ws, session_created_frame)."""
+        ws = await asyncio.wait_for(
+            websockets.connect(self.url, additional_headers=realtime_headers(api_key), max_size=self.max_size),
+            CONNECT_TIMEOUT_S,
+        )
+        try:
+            session_created = await asyncio.wait_for(ws.recv(), CONNECT_TIMEOUT_S)
+        except BaseException:
+            await ws.close()
+            raise
+        return ws, session_created
+
+    async def acquire(self, api_key):
+        """Claim a warm connection, or open one inline. Returns (ws, session_created_frame)."""
+        if self.size > 0:
+            self._last_claim = time.monotonic()
+            self._retire_other_keys(api_key)
+            idle = self._idle.setdefault(api_key, deque())
+            while idle:
+                warm = idle.popleft()
+                if self._usable(warm):
+                    self.hits += 1
+                    self._schedule_fill(api_key)
+                    return warm.ws, warm.session_created
+                await warm.ws.close()
+            self._schedule_fill(api_key)
+        self.misses += 1
+        ws, session_created = await self.open(api_key)
+        if api_key in self._rejected:
+            # The key works after all (e.g. access was granted since) — warm it again
+            self._rejected.discard(api_key)
+            self._schedule_fill(api_key)
+        return ws, session_created
+
+    @contextlib.asynccontextmanager
+    async def session(self, api_key):
+        """async with pool.session(key) as (ws, session_created): ... — closes ws on exit."""
+        ws, session_created = await self.acquire(api_key)
+        try:
+            yield ws, session_created
+        finally:
+            await ws.close()
+
+    def idle_count(self, api_key):
+        return len(self._idle.get(api_key, ()))
+
+    async def close(self):
+        """Cancel background work and close every idle connection."""
+        refresher, self._refresher = self._refresher, None
+        if refresher and not refresher.done():
+            refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await refresher
+        await self._drain()
+
+    async def _drain(self):
+        """Cancel pending fills and close every idle connection."""
+        tasks = [t for t in self._filling.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        self._filling.clear()
+        for idle in self._idle.values():
+            while idle:
+                await idle.popleft().ws.close()
+        self._idle.clear()
+
+    # --- Internals ---
+
+    def _usable(self, warm):
+        return warm.ws.state is State.OPEN and time.monotonic() - warm.opened_at < self.max_idle_s
+
+    def _retire_other_keys(self, api_key):
+        # One server-wide key at a time — don't hold sessions for a replaced key
+        for key in [k for k in self._idle if k != api_key]:
+            task = self._filling.pop(key, None)
+            if task and not task.done():
+                task.cancel()
+            for warm in self._idle.pop(key):
+                asyncio.ensure_future(warm.ws.close())
+            self._failures.pop(key, None)
+            self._retry_at.pop(key, None)
+        self._rejected.intersection_update((api_key,))
+
+    def _schedule_fill(self, api_key):
+        if api_key in self._rejected or time.monotonic() < self._retry_at.get(api_key, 0):
+            return  # the refresher retries once the backoff has passed
+        task = self._filling.get(api_key)
+        if task is None or task.done():
+            self._filling[api_key] = asyncio.ensure_future(self._fill(api_key))
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+    async def _fill(self, api_key):
+        idle = self._idle.setdefault(api_key, deque())
+        while len(idle) < self.size and self._idle.get(api_key) is idle:
+            try:
+                ws, session_created = await self.open(api_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                status = e.response.status_code if isinstance(e, websockets.exceptions.InvalidStatus) else None
+                if status in AUTH_FAILURE_STATUSES:
+                    self._rejected.add(api_key)
+                    print(f"  [POOL] Upstream refused the API key (HTTP {status}) — pre-warming off for it")
+                    return
+                failures = self._failures[api_key] = self._failures.get(api_key, 0) + 1
+                delay = min(MAX_RETRY_BACKOFF_S, RETRY_BACKOFF_S * 2 ** (failures - 1))
+                self._retry_at[api_key] = time.monotonic() + delay
+                print(f"  [POOL] Pre-warm failed: {e!r} — retrying in {delay}s")
+                return
+            self._failures.pop(api_key, None)
+            self._retry_at.pop(api_key, None)
+            if self._idle.get(api_key) is not idle:
+                await ws.close()
+                return
+            idle.append(_Warm(ws, session_created, time.monotonic()))
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval_s)
+            if self.idle_shutdown_s and time.monotonic() - self._last_claim >= self.idle_shutdown_s:
+                # Nobody is calling — stop holding (and re-opening) paid upstream sessions
+                print(f"  [POOL] No calls for {self.idle_shutdown_s}s — closing warm connections")
+                await self._drain()
+                return
+            for api_key, idle in list(self._idle.items()):
+                fresh = deque()
+                while idle:
+                    warm = idle.popleft()
+                    if self._usable(warm):
+                        fresh.append(warm)
+                    else:
+                        await warm.ws.close()
+                idle.extend(fresh)
+                if len(idle) < self.size:
+                    self._schedule_fill(api_key)
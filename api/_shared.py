@@ -12,15 +12,34 @@ if IRIS_DIR not in sys.path:
     sys.path.insert(0, IRIS_DIR)
 
 try:
-    from response_engine import get_response, extract_entities, classify_yes_no, detect_intent_switch
+    from response_engine import (
+        caller_profile,
+        get_response,
+        extract_entities,
+        classify_yes_no,
+        score_yes_no,
+        detect_intent_switch,
+        run_batch_request,
+        run_turn_request,
+    )
 
     ENGINE_AVAILABLE = True
 except Exception:
     ENGINE_AVAILABLE = False
+    caller_profile = None
     get_response = None
     extract_entities = None
     classify_yes_no = None
+    score_yes_no = None
     detect_intent_switch = None
+    run_batch_request = None
+    run_turn_request = None
+
+# Caller profiles for response templates (graceful if missing)
+try:
+    from llm_engine import lookup_customer
+except Exception:
+    lookup_customer = None
 
 
 def read_json(handler):
@@ -0,0 +1,30 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+from _shared import ENGINE_AVAILABLE, handle_options, lookup_customer, read_json, run_batch_request, send_error, send_json
+
+
+class handler(BaseHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        return
+
+    def do_OPTIONS(self):
+        handle_options(self)
+
+    def do_POST(self):
+        try:
+            data = read_json(self)
+        except json.JSONDecodeError:
+            send_error(self, 400, "Invalid JSON")
+            return
+
+        if not ENGINE_AVAILABLE:
+            send_error(self, 503, "Response engine not available")
+            return
+
+        try:
+            result = run_batch_request(data, lookup_customer)
+        except ValueError as exc:
+            send_error(self, 400, str(exc))
+            return
+        send_json(self, result)
@@ -1,7 +1,7 @@
 import json
 from http.server import BaseHTTPRequestHandler
 
-from _shared import ENGINE_AVAILABLE, classify_yes_no, handle_options, read_json, send_error, send_json
+from _shared import ENGINE_AVAILABLE, handle_options, read_json, score_yes_no, send_error, send_json
 
 
 class handler(BaseHTTPRequestHandler):
@@ -23,4 +23,5 @@ class handler(BaseHTTPRequestHandler):
             return
 
         text = data.get("text", "")
-        send_json(self, {"classification": classify_yes_no(text)})
+        classification, confidence = score_yes_no(text)
+        send_json(self, {"classification": classification, "confidence": confidence})
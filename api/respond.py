@@ -1,7 +1,9 @@
 import json
 from http.server import BaseHTTPRequestHandler
 
-from _shared import ENGINE_AVAILABLE, get_response, handle_options, read_json, send_error, send_json
+from _shared import (
+    ENGINE_AVAILABLE, caller_profile, get_response, handle_options, lookup_customer, read_json, send_error, send_json,
+)
 
 
 class handler(BaseHTTPRequestHandler):
@@ -31,5 +33,6 @@ class handler(BaseHTTPRequestHandler):
             send_error(self, 400, "Missing scenarioId or turnIndex")
             return
 
-        result = get_response(scenario_id, turn_index, user_input, context)
+        customer = caller_profile(context, scenario_id, lookup_customer)
+        result = get_response(scenario_id, turn_index, user_input, context, customer)
         send_json(self, result)